@@ -0,0 +1,125 @@
+"""Compare full-scale decoding with reduced-scale draft decoding.
+
+For large photos and every suggested grid, measures decode time, total
+tiling time and the size of the decoded bitmap at full scale and at the
+scale picked by ImageProcessor.decode_scale(), and reports how far the
+resulting tiles are from the full-scale ones. Run from the repository root:
+
+    python -m benchmarks.draft_decode
+"""
+
+import argparse
+import time
+from typing import List
+
+from PIL import Image, ImageChops, ImageStat
+
+from benchmarks.tiling import best_of, make_photo
+from src.emoji.decoded import bitmap_bytes
+from src.emoji.processor import ImageProcessor
+
+PHOTO_SIZES = [(3840, 2160), (4032, 3024), (6000, 4000), (8000, 6000)]
+
+
+def tiles(processor: ImageProcessor, image_data: bytes, grid_size, padding: int) -> List[Image.Image]:
+    """
+    Cut an image into tiles.
+
+    Args:
+        processor: Image processor under test
+        image_data: Encoded input image
+        grid_size: Tuple of (columns, rows)
+        padding: Padding value (1-5)
+
+    Returns:
+        List of tiles in row-major order
+    """
+    return [tile for _, _, tile in processor.iter_tiles(image_data, grid_size, padding)]
+
+
+def decode_stats(processor: ImageProcessor, image_data: bytes, grid_size, padding: int, repeat: int):
+    """
+    Measure decoding alone.
+
+    Args:
+        processor: Image processor under test
+        image_data: Encoded input image
+        grid_size: Tuple of (columns, rows)
+        padding: Padding value (1-5)
+        repeat: Number of runs
+
+    Returns:
+        Tuple of (best decode time in seconds, decoded bitmap bytes, scale)
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        decoded = processor.decode(image_data, grid_size=grid_size, padding=padding)
+        best = min(best, time.perf_counter() - start)
+        size = bitmap_bytes(decoded.image)
+        scale = decoded.scale
+        decoded.image.close()
+    return best, size, scale
+
+
+def tile_difference(first: List[Image.Image], second: List[Image.Image]):
+    """
+    Compare two tile lists.
+
+    Args:
+        first: Reference tiles
+        second: Tiles under test
+
+    Returns:
+        Tuple of (mean absolute channel difference, largest channel difference)
+    """
+    means, worst = [], 0
+    for a, b in zip(first, second):
+        diff = ImageChops.difference(a.convert("RGB"), b.convert("RGB"))
+        means.append(sum(ImageStat.Stat(diff).mean) / 3)
+        worst = max(worst, max(high for _, high in diff.getextrema()))
+    return sum(means) / len(means), worst
+
+
+def main():
+    """Run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--padding", type=int, default=2)
+    parser.add_argument("--emoji-size", type=int, default=100)
+    parser.add_argument("--reducing-gap", type=float, default=2.0)
+    parser.add_argument("--oversample", type=float, default=2.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    full = ImageProcessor(args.emoji_size, args.reducing_gap)
+    draft = ImageProcessor(args.emoji_size, args.reducing_gap, draft_oversample=args.oversample)
+
+    print(f"Padding {args.padding}, emoji size {args.emoji_size}, reducing gap {args.reducing_gap}, oversample {args.oversample}")
+    print(
+        f"{'photo':>10} {'grid':>6} {'scale':>5} {'decode ms':>10} {'draft ms':>9} {'bitmap MB':>10} {'draft MB':>9} "
+        f"{'tiling ms':>10} {'draft ms':>9} {'speedup':>8} {'mean diff':>9} {'max':>4}"
+    )
+
+    for width, height in PHOTO_SIZES:
+        image_data = make_photo(width, height)
+        for cols, rows in full.suggest_grid_sizes(width, height):
+            grid_size = (cols, rows)
+            full_decode, full_bytes, _ = decode_stats(full, image_data, grid_size, args.padding, args.repeat)
+            draft_decode, draft_bytes, scale = decode_stats(draft, image_data, grid_size, args.padding, args.repeat)
+
+            full_time = best_of(args.repeat, lambda: tiles(full, image_data, grid_size, args.padding))
+            draft_time = best_of(args.repeat, lambda: tiles(draft, image_data, grid_size, args.padding))
+            mean_diff, max_diff = tile_difference(
+                tiles(full, image_data, grid_size, args.padding),
+                tiles(draft, image_data, grid_size, args.padding)
+            )
+
+            print(
+                f"{width}x{height:<5} {cols}x{rows:<4} {scale:>5.1f} {full_decode * 1000:>10.1f} {draft_decode * 1000:>9.1f} "
+                f"{full_bytes / 2 ** 20:>10.1f} {draft_bytes / 2 ** 20:>9.1f} {full_time * 1000:>10.1f} {draft_time * 1000:>9.1f} "
+                f"{full_time / draft_time:>7.2f}x {mean_diff:>9.2f} {max_diff:>4}"
+            )
+
+
+if __name__ == "__main__":
+    main()
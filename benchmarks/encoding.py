@@ -0,0 +1,109 @@
+"""Measure PNG encode time and size for each encode profile.
+
+Run from the repository root:
+
+    python -m benchmarks.encoding
+"""
+
+import argparse
+import io
+import time
+from typing import Dict, List
+
+from PIL import Image, ImageDraw
+
+from benchmarks.tiling import make_photo
+from src.emoji.encoder import ENCODE_PROFILES, MAX_STATIC_STICKER_BYTES, TileEncoder
+from src.emoji.processor import ImageProcessor
+
+
+def make_logo(width: int, height: int) -> bytes:
+    """
+    Build a flat-color logo-like PNG with a transparent background.
+
+    Args:
+        width: Image width
+        height: Image height
+
+    Returns:
+        Encoded PNG bytes
+    """
+    img = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    draw.ellipse((width // 8, height // 8, width * 7 // 8, height * 7 // 8), fill=(220, 40, 60, 255))
+    draw.rectangle((width // 3, height // 3, width * 2 // 3, height * 2 // 3), fill=(255, 255, 255, 255))
+
+    buffer = io.BytesIO()
+    img.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def collect_tiles(image_data: bytes, emoji_size: int) -> List[Image.Image]:
+    """
+    Cut an image into tiles using the largest suggested grid.
+
+    Args:
+        image_data: Encoded input image
+        emoji_size: Tile size in pixels
+
+    Returns:
+        List of tiles
+    """
+    processor = ImageProcessor(emoji_size)
+    width, height = processor.get_image_dimensions(image_data)
+    grid_size = processor.suggest_grid_sizes(width, height)[-1]
+    return [tile for _, _, tile in processor.iter_tiles(image_data, grid_size, 2)]
+
+
+def measure(tiles: List[Image.Image], profile: str) -> Dict[str, float]:
+    """
+    Encode all tiles with a profile.
+
+    Args:
+        tiles: Tiles to encode
+        profile: Encode profile name
+
+    Returns:
+        Dictionary with per-tile time and size statistics
+    """
+    encoder = TileEncoder(profile)
+    start = time.perf_counter()
+    sizes = [len(encoder.encode(tile)) for tile in tiles]
+    elapsed = time.perf_counter() - start
+
+    return {
+        "ms_per_tile": elapsed * 1000 / len(tiles),
+        "avg_bytes": sum(sizes) / len(sizes),
+        "max_bytes": max(sizes),
+        "total_bytes": sum(sizes),
+    }
+
+
+def main():
+    """Run the harness and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=2048)
+    parser.add_argument("--height", type=int, default=1536)
+    parser.add_argument("--emoji-size", type=int, default=100)
+    args = parser.parse_args()
+
+    sources = {
+        "photo": make_photo(args.width, args.height),
+        "logo": make_logo(args.width, args.height),
+    }
+
+    print(f"Size limit per tile: {MAX_STATIC_STICKER_BYTES} bytes")
+    print(f"{'source':>8} {'profile':>9} {'ms/tile':>8} {'avg B':>8} {'max B':>8} {'total KB':>9}")
+
+    for source_name, image_data in sources.items():
+        tiles = collect_tiles(image_data, args.emoji_size)
+        for profile in ENCODE_PROFILES:
+            stats = measure(tiles, profile)
+            print(
+                f"{source_name:>8} {profile:>9} {stats['ms_per_tile']:>8.2f} {stats['avg_bytes']:>8.0f} "
+                f"{stats['max_bytes']:>8} {stats['total_bytes'] / 1024:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Measure caller-side logging cost per simulated update.
+
+Compares the synchronous handler setup with eager f-string messages to the
+queue-based setup from src.config.logger with lazy %-style messages. Only
+the time spent in the calling thread is measured, which is what the event
+loop pays. Run from the repository root:
+
+    python -m benchmarks.log_overhead
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from logging.handlers import RotatingFileHandler
+
+from src.config import logger as app_logger
+
+
+def eager_logger(log_dir: str) -> logging.Logger:
+    """
+    Build a logger with the previous synchronous handler setup.
+
+    Args:
+        log_dir: Directory for the log file
+
+    Returns:
+        Configured logger
+    """
+    logger = logging.getLogger("bench.eager")
+    logger.setLevel(logging.INFO)
+    log_format = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(log_format)
+    logger.addHandler(console_handler)
+
+    file_handler = RotatingFileHandler(os.path.join(log_dir, "eager.log"), maxBytes=10 * 1024 * 1024, backupCount=1)
+    file_handler.setFormatter(log_format)
+    logger.addHandler(file_handler)
+    return logger
+
+
+def simulate_eager(logger: logging.Logger, user_id: int, tiles: int):
+    """Log one update's worth of messages with eager f-strings."""
+    for step in range(10):
+        logger.info(f"User {user_id} step {step} with grid_size={(8, 9)}, padding={2}")
+    for idx in range(tiles):
+        logger.debug(f"User {user_id} uploading sticker {idx + 1}/{tiles}")
+
+
+def simulate_lazy(logger: logging.Logger, user_id: int, tiles: int):
+    """Log one update's worth of messages with lazy %-style arguments."""
+    for step in range(10):
+        logger.info("User %s step %s with grid_size=%s, padding=%s", user_id, step, (8, 9), 2)
+    for idx in range(tiles):
+        logger.debug("User %s uploading sticker %s/%s", user_id, idx + 1, tiles)
+
+
+def main():
+    """Run the measurement and print per-update costs."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--tiles", type=int, default=72)
+    args = parser.parse_args()
+
+    real_stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        eager = eager_logger(log_dir)
+        start = time.perf_counter()
+        for user_id in range(args.updates):
+            simulate_eager(eager, user_id, args.tiles)
+        eager_time = time.perf_counter() - start
+
+        os.environ["LOG_DIR"] = log_dir
+        lazy = app_logger.setup_logger("bench.lazy", logging.INFO)
+        start = time.perf_counter()
+        for user_id in range(args.updates):
+            simulate_lazy(lazy, user_id, args.tiles)
+        lazy_time = time.perf_counter() - start
+        app_logger.shutdown_logger()
+
+    sys.stdout.close()
+    sys.stdout = real_stdout
+
+    print(f"updates: {args.updates}, per-tile debug lines: {args.tiles}")
+    print(f"synchronous handlers, f-strings: {eager_time / args.updates * 1e6:8.1f} us/update")
+    print(f"queue handler, lazy formatting:  {lazy_time / args.updates * 1e6:8.1f} us/update")
+
+
+if __name__ == "__main__":
+    main()
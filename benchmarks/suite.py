@@ -0,0 +1,254 @@
+"""Microbenchmark suite for the emoji processing core with a JSON baseline.
+
+Runs get_image_dimensions and crop_to_grid for every suggested grid and
+every padding from 1 to 5 on synthetic images from small phone photos to
+4K and panoramas. Each case runs in a fresh spawned process so peak RSS
+is measured per case. Run from the repository root:
+
+    python -m benchmarks.suite --save baseline.json
+    python -m benchmarks.suite --baseline baseline.json --threshold 0.15
+
+Exits with status 1 when a case regresses beyond the threshold.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Tuple
+
+import PIL
+
+from benchmarks.tiling import make_photo
+from src.config import settings
+from src.emoji.processor import ImageProcessor
+
+IMAGE_SIZES: Dict[str, Tuple[int, int]] = {
+    "vga": (640, 480),
+    "square_1080": (1080, 1080),
+    "fullhd": (1920, 1080),
+    "phone_12mp": (4032, 3024),
+    "phone_portrait": (3024, 4032),
+    "uhd_4k": (3840, 2160),
+    "panorama": (4000, 1200),
+}
+
+PADDINGS = range(1, 6)
+
+METRICS = ("wall_s", "cpu_s", "peak_rss_kb", "output_bytes")
+
+
+class Case(NamedTuple):
+    """Single benchmark case."""
+
+    image: str
+    operation: str
+    grid_size: Tuple[int, int] = (0, 0)
+    padding: int = 0
+
+    @property
+    def case_id(self) -> str:
+        """Stable identifier used as the baseline key."""
+        if self.operation == "dimensions":
+            return f"{self.image}/dimensions"
+        cols, rows = self.grid_size
+        return f"{self.image}/crop/{cols}x{rows}/p{self.padding}"
+
+
+def build_cases(images: List[str]) -> List[Case]:
+    """
+    Enumerate benchmark cases for the selected images.
+
+    Args:
+        images: Names from IMAGE_SIZES
+
+    Returns:
+        List of cases
+    """
+    processor = ImageProcessor(settings.EMOJI_SIZE)
+    cases = []
+    for image in images:
+        width, height = IMAGE_SIZES[image]
+        cases.append(Case(image, "dimensions"))
+        for grid_size in processor.suggest_grid_sizes(width, height):
+            for padding in PADDINGS:
+                cases.append(Case(image, "crop", grid_size, padding))
+    return cases
+
+
+def run_case(case: Case, image_path: str, repeat: int) -> Dict[str, float]:
+    """
+    Run a case in the current process.
+
+    Args:
+        case: Case to run
+        image_path: Path to the synthetic input image
+        repeat: Number of runs, the fastest one is reported
+
+    Returns:
+        Dictionary of measured metrics
+    """
+    processor = ImageProcessor(
+        settings.EMOJI_SIZE,
+        settings.RESAMPLE_REDUCING_GAP,
+        settings.PNG_ENCODE_PROFILE,
+        settings.DRAFT_OVERSAMPLE
+    )
+    best_wall = best_cpu = float("inf")
+    output_bytes = 0
+
+    for _ in range(repeat):
+        output_dir = tempfile.mkdtemp(prefix="emoji_bench_")
+        try:
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            if case.operation == "dimensions":
+                processor.get_image_dimensions(image_path)
+                output_bytes = 0
+            else:
+                files = processor.crop_to_grid(image_path, output_dir, case.grid_size, case.padding)
+                output_bytes = sum(os.path.getsize(path) for path in files)
+            best_wall = min(best_wall, time.perf_counter() - wall_start)
+            best_cpu = min(best_cpu, time.process_time() - cpu_start)
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+    return {
+        "wall_s": best_wall,
+        "cpu_s": best_cpu,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "output_bytes": output_bytes,
+    }
+
+
+def run_suite(cases: List[Case], image_paths: Dict[str, str], repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    Run every case in its own spawned worker process.
+
+    Args:
+        cases: Cases to run
+        image_paths: Input image path per image name
+        repeat: Number of runs per case
+
+    Returns:
+        Metrics per case id
+    """
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context, max_tasks_per_child=1) as pool:
+        for idx, case in enumerate(cases, start=1):
+            metrics = pool.submit(run_case, case, image_paths[case.image], repeat).result()
+            results[case.case_id] = metrics
+            print(
+                f"[{idx:>3}/{len(cases)}] {case.case_id:<36} {metrics['wall_s'] * 1000:>9.1f} ms "
+                f"{metrics['cpu_s'] * 1000:>9.1f} ms cpu {metrics['peak_rss_kb'] / 1024:>7.1f} MB "
+                f"{metrics['output_bytes'] / 1024:>8.1f} KB"
+            )
+    return results
+
+
+def compare(
+    baseline: Dict[str, Dict[str, float]],
+    results: Dict[str, Dict[str, float]],
+    threshold: float,
+    min_time_delta: float
+) -> List[str]:
+    """
+    Find cases that got worse than the baseline.
+
+    Args:
+        baseline: Metrics per case id from a previous run
+        results: Metrics per case id from this run
+        threshold: Allowed relative increase, e.g. 0.1 for 10%
+        min_time_delta: Time increases below this many seconds are ignored
+
+    Returns:
+        Human-readable regression descriptions
+    """
+    regressions = []
+    for case_id, metrics in results.items():
+        previous = baseline.get(case_id)
+        if previous is None:
+            continue
+        for metric in METRICS:
+            old, new = previous.get(metric), metrics[metric]
+            if not old or new <= old * (1 + threshold):
+                continue
+            if metric in ("wall_s", "cpu_s") and new - old < min_time_delta:
+                continue
+            regressions.append(f"{case_id} {metric}: {old:.4g} -> {new:.4g} (+{(new / old - 1) * 100:.1f}%)")
+    return regressions
+
+
+def main():
+    """Run the suite, save or compare the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", nargs="+", choices=list(IMAGE_SIZES), default=list(IMAGE_SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare results against this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative regression")
+    parser.add_argument("--min-time-delta-ms", type=float, default=2.0, help="ignore smaller time increases")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="emoji_bench_inputs_")
+    try:
+        image_paths = {}
+        for image in args.images:
+            path = os.path.join(work_dir, f"{image}.jpg")
+            with open(path, "wb") as image_file:
+                image_file.write(make_photo(*IMAGE_SIZES[image]))
+            image_paths[image] = path
+
+        cases = build_cases(args.images)
+        print(f"Running {len(cases)} cases, best of {args.repeat}, emoji size {settings.EMOJI_SIZE}, profile {settings.PNG_ENCODE_PROFILE}")
+        results = run_suite(cases, image_paths, args.repeat)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.save:
+        report = {
+            "meta": {
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "pillow": PIL.__version__,
+                "machine": platform.machine(),
+                "cpu_count": os.cpu_count(),
+                "repeat": args.repeat,
+                "emoji_size": settings.EMOJI_SIZE,
+                "reducing_gap": settings.RESAMPLE_REDUCING_GAP,
+                "encode_profile": settings.PNG_ENCODE_PROFILE,
+                "draft_oversample": settings.DRAFT_OVERSAMPLE,
+            },
+            "results": results,
+        }
+        with open(args.save, "w") as report_file:
+            json.dump(report, report_file, indent=2, sort_keys=True)
+        print(f"Saved {len(results)} results to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+
+        missing = sorted(set(results) - set(baseline))
+        if missing:
+            print(f"{len(missing)} cases are not in the baseline")
+
+        regressions = compare(baseline, results, args.threshold, args.min_time_delta_ms / 1000)
+        if regressions:
+            print(f"{len(regressions)} regressions beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Benchmark strip-wise grid resampling against per-tile resizing.
+
+Run from the repository root:
+
+    python -m benchmarks.tiling
+"""
+
+import argparse
+import io
+import time
+from typing import Callable, List, Tuple
+
+from PIL import Image, ImageChops
+
+from src.emoji.processor import ImageProcessor
+
+GRID_SIZES = ((7, 3), (6, 6), (8, 7), (9, 8))
+
+
+def make_photo(width: int, height: int) -> bytes:
+    """
+    Build a synthetic photo-like JPEG.
+
+    Args:
+        width: Image width
+        height: Image height
+
+    Returns:
+        Encoded JPEG bytes
+    """
+    gradient = Image.linear_gradient("L").resize((width, height))
+    noise = Image.effect_noise((width, height), 64)
+    img = Image.merge("RGB", (gradient, noise, gradient.transpose(Image.Transpose.ROTATE_180)))
+
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def per_tile_reference(
+    image_data: bytes,
+    grid_size: Tuple[int, int],
+    padding: int,
+    emoji_size: int
+) -> List[Image.Image]:
+    """
+    Crop and resize every cell separately, like the original crop_to_grid.
+
+    Args:
+        image_data: Encoded input image
+        grid_size: Tuple of (columns, rows)
+        padding: Padding value (1-5)
+        emoji_size: Tile size in pixels
+
+    Returns:
+        List of tiles in row-major order
+    """
+    img = Image.open(io.BytesIO(image_data)).convert("RGBA")
+    cols, rows = grid_size
+    cell_width = img.width // cols
+    cell_height = img.height // rows
+    padding_pixels = padding * 2
+
+    tiles = []
+    for row in range(rows):
+        for col in range(cols):
+            box = (
+                col * cell_width + padding_pixels,
+                row * cell_height + padding_pixels,
+                (col + 1) * cell_width - padding_pixels,
+                (row + 1) * cell_height - padding_pixels,
+            )
+            tiles.append(img.crop(box).resize((emoji_size, emoji_size), Image.Resampling.LANCZOS))
+    return tiles
+
+
+def single_resample(
+    processor: ImageProcessor,
+    image_data: bytes,
+    grid_size: Tuple[int, int],
+    padding: int
+) -> List[Image.Image]:
+    """
+    Resample the grid in column and row strips and slice it into tiles.
+
+    Args:
+        processor: Image processor under test
+        image_data: Encoded input image
+        grid_size: Tuple of (columns, rows)
+        padding: Padding value (1-5)
+
+    Returns:
+        List of tiles in row-major order
+    """
+    return [tile for _, _, tile in processor.iter_tiles(image_data, grid_size, padding)]
+
+
+def best_of(repeat: int, func: Callable[[], object]) -> float:
+    """
+    Return the best wall time of several runs.
+
+    Args:
+        repeat: Number of runs
+        func: Callable to time
+
+    Returns:
+        Best time in seconds
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def max_difference(first: List[Image.Image], second: List[Image.Image]) -> int:
+    """
+    Return the largest per-channel difference between two tile lists.
+
+    Args:
+        first: Reference tiles
+        second: Tiles under test
+
+    Returns:
+        Largest absolute channel difference
+    """
+    worst = 0
+    for a, b in zip(first, second):
+        extrema = ImageChops.difference(a, b).getextrema()
+        worst = max(worst, max(high for _, high in extrema))
+    return worst
+
+
+def main():
+    """Run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=4032)
+    parser.add_argument("--height", type=int, default=3024)
+    parser.add_argument("--padding", type=int, default=2)
+    parser.add_argument("--emoji-size", type=int, default=100)
+    parser.add_argument("--reducing-gap", type=float, default=2.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    image_data = make_photo(args.width, args.height)
+    processors = {
+        "exact": ImageProcessor(args.emoji_size),
+        "reduced": ImageProcessor(args.emoji_size, args.reducing_gap),
+    }
+
+    print(f"Photo {args.width}x{args.height}, padding {args.padding}, emoji size {args.emoji_size}, reducing gap {args.reducing_gap}")
+    print(f"{'grid':>6} {'tiles':>5} {'per-tile ms':>12} {'exact ms':>9} {'speedup':>8} {'diff':>5} {'reduced ms':>11} {'speedup':>8} {'diff':>5}")
+
+    for cols, rows in GRID_SIZES:
+        grid_size = (cols, rows)
+        reference = per_tile_reference(image_data, grid_size, args.padding, args.emoji_size)
+        old = best_of(args.repeat, lambda: per_tile_reference(image_data, grid_size, args.padding, args.emoji_size))
+        row_text = f"{cols}x{rows:<4} {cols * rows:>5} {old * 1000:>12.1f}"
+
+        for processor in processors.values():
+            candidate = single_resample(processor, image_data, grid_size, args.padding)
+            assert [t.size for t in reference] == [t.size for t in candidate]
+            difference = max_difference(reference, candidate)
+            if not processor.reducing_gap:
+                assert difference == 0, f"exact tiles differ from per-tile reference by {difference} at {cols}x{rows}"
+
+            new = best_of(args.repeat, lambda: single_resample(processor, image_data, grid_size, args.padding))
+            row_text += f" {new * 1000:>10.1f} {old / new:>7.2f}x {difference:>5}"
+
+        print(row_text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Local load and latency harnesses running against a fake Bot API."""
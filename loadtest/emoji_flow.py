@@ -0,0 +1,291 @@
+"""Load-test the photo -> grid -> padding flow against a fake Bot API.
+
+Starts a fake Bot API with optional latency and error injection, runs the
+bot application against it and lets N simulated users walk the emoji
+cropper flow through BotHandlers concurrently. Reports throughput,
+p50/p95/p99 latency per step and error rates. Run from the repository root:
+
+    python -m loadtest.emoji_flow --users 50 --latency 20
+    python -m loadtest.emoji_flow --users 20 --error-rate 0.05 --error-methods uploadStickerFile
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Dict, List, Optional
+
+from telegram.ext import Application
+
+from benchmarks.tiling import make_photo
+from loadtest.fake_bot_api import ERROR_KINDS, FakeBotAPI, callback_data
+from main import build_application
+from src.config import strings
+
+STEPS = ("photo", "grid", "padding_ack", "pack", "flow")
+
+FAILURE_TEXTS = (strings.ERROR_CREATING_PACK, strings.ERROR_PROCESSING, strings.ERROR_QUEUE_FULL, strings.ERROR_JOB_RUNNING)
+
+
+class FlowStats:
+    """Latencies and failures collected per step."""
+
+    def __init__(self):
+        """Initialize flow statistics."""
+        self.latencies: Dict[str, List[float]] = {step: [] for step in STEPS}
+        self.failures: Dict[str, Dict[str, int]] = {step: {} for step in STEPS}
+        self.completed = 0
+
+    def record(self, step: str, latency: float):
+        """
+        Record a successful step.
+
+        Args:
+            step: Step name
+            latency: Step latency in seconds
+        """
+        self.latencies[step].append(latency)
+
+    def fail(self, step: str, reason: str):
+        """
+        Record a failed step.
+
+        Args:
+            step: Step name
+            reason: Short failure reason
+        """
+        self.failures[step][reason] = self.failures[step].get(reason, 0) + 1
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of sorted values.
+
+    Args:
+        ordered: Sorted values
+        fraction: Percentile as a fraction, e.g. 0.95
+
+    Returns:
+        Percentile value
+    """
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+async def simulate_user(
+    api: FakeBotAPI,
+    stats: FlowStats,
+    chat_id: int,
+    photo: bytes,
+    photo_size: tuple,
+    padding: int,
+    step_timeout: float,
+    think_time: float,
+    rng: random.Random,
+    with_stickers: bool = False,
+    album: int = 1,
+    as_document: bool = False
+):
+    """
+    Walk one user through the emoji cropper flow.
+
+    Args:
+        api: Running fake Bot API
+        stats: Statistics to record into
+        chat_id: Chat and user id
+        photo: Encoded photo to send
+        photo_size: Photo (width, height)
+        padding: Padding button to press
+        step_timeout: Maximum time to wait for a step in seconds
+        think_time: Maximum random pause between steps in seconds
+        rng: Random generator for think times and grid choice
+        with_stickers: Switch on the additional regular sticker pack
+        album: Number of photos sent as one media group
+        as_document: Send the photo uncompressed as a file instead
+    """
+    flow_start = time.perf_counter()
+
+    async def step(name: str, update: dict, predicate) -> Optional[dict]:
+        reply = api.expect_reply(chat_id, predicate)
+        sent_at = time.perf_counter()
+        await api.push_update(update)
+        try:
+            replied_at, params = await asyncio.wait_for(reply, step_timeout)
+        except asyncio.TimeoutError:
+            stats.fail(name, "timeout")
+            return None
+        stats.record(name, replied_at - sent_at)
+        return params
+
+    media_group_id = f"album-{chat_id}" if album > 1 else None
+    for _ in range(album - 1):
+        await api.push_update(api.photo_update(chat_id, photo, *photo_size, media_group_id))
+    if as_document:
+        update = api.document_update(chat_id, photo)
+    else:
+        update = api.photo_update(chat_id, photo, *photo_size, media_group_id)
+    params = await step(
+        "photo",
+        update,
+        lambda p: any(data.startswith("grid_") for data in callback_data(p))
+    )
+    if params is None:
+        return
+
+    await asyncio.sleep(rng.uniform(0, think_time))
+    grids = [data for data in callback_data(params) if data.startswith("grid_")]
+    params = await step(
+        "grid",
+        api.callback_update(chat_id, params["message_id"], rng.choice(grids)),
+        lambda p: any(data.startswith("padding_") for data in callback_data(p))
+    )
+    if params is None:
+        return
+
+    await asyncio.sleep(rng.uniform(0, think_time))
+    message_id = int(params["message_id"])
+    if with_stickers:
+        toggled = api.expect_reply(chat_id)
+        await api.push_update(api.callback_update(chat_id, message_id, "stickers_toggle"))
+        try:
+            await asyncio.wait_for(toggled, step_timeout)
+        except asyncio.TimeoutError:
+            stats.fail("padding_ack", "timeout")
+            return
+
+    ack = api.expect_reply(chat_id)
+    done = api.expect_reply(
+        chat_id,
+        lambda p: "t.me/addemoji/" in p.get("text", "") or p.get("text") in FAILURE_TEXTS
+    )
+    sent_at = time.perf_counter()
+    await api.push_update(api.callback_update(chat_id, message_id, f"padding_{padding}"))
+
+    try:
+        acked_at, _ = await asyncio.wait_for(ack, step_timeout)
+        stats.record("padding_ack", acked_at - sent_at)
+    except asyncio.TimeoutError:
+        stats.fail("padding_ack", "timeout")
+        return
+
+    try:
+        done_at, params = await asyncio.wait_for(done, step_timeout)
+    except asyncio.TimeoutError:
+        stats.fail("pack", "timeout")
+        return
+
+    text = params.get("text", "")
+    if text in FAILURE_TEXTS:
+        stats.fail("pack", "queue_full" if text == strings.ERROR_QUEUE_FULL else "error_reply")
+        return
+
+    stats.record("pack", done_at - sent_at)
+    stats.record("flow", done_at - flow_start)
+    stats.completed += 1
+
+
+async def run(args: argparse.Namespace):
+    """Run the load test and print a report."""
+    api = FakeBotAPI(
+        args.api_port,
+        args.latency / 1000,
+        error_rate=args.error_rate,
+        error_methods=args.error_methods,
+        error_kind=args.error_kind,
+        seed=args.seed
+    )
+    await api.start()
+
+    builder = (
+        Application.builder()
+        .token("123456:FAKE")
+        .base_url(api.base_url)
+        .base_file_url(api.base_file_url)
+    )
+    application = build_application(builder)
+    await application.initialize()
+    await application.post_init(application)
+    await application.updater.start_polling(poll_interval=0.0, timeout=10)
+    await application.start()
+
+    stats = FlowStats()
+    photo = make_photo(args.width, args.height)
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+
+    async def delayed_user(idx: int):
+        await asyncio.sleep(args.ramp * idx / max(1, args.users))
+        await simulate_user(
+            api,
+            stats,
+            10_000 + idx,
+            photo,
+            (args.width, args.height),
+            args.padding,
+            args.step_timeout,
+            args.think_time / 1000,
+            random.Random(rng.random()),
+            args.stickers,
+            args.album,
+            args.document
+        )
+
+    try:
+        await asyncio.gather(*(delayed_user(idx) for idx in range(args.users)))
+    finally:
+        elapsed = time.perf_counter() - started
+        await application.updater.stop()
+        await application.stop()
+        await application.shutdown()
+        await application.post_shutdown(application)
+        await api.stop()
+
+    print(
+        f"{args.users} users, photo {args.width}x{args.height}, latency {args.latency:.0f}ms, "
+        f"error rate {args.error_rate:.0%} ({args.error_kind})"
+    )
+    print(f"completed {stats.completed}/{args.users} flows in {elapsed:.1f}s, throughput {stats.completed / elapsed:.2f} flows/s")
+    print(f"{'step':>12} {'ok':>5} {'failed':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  failures")
+    for step in STEPS:
+        ordered = sorted(stats.latencies[step])
+        failed = sum(stats.failures[step].values())
+        if ordered:
+            timings = " ".join(f"{percentile(ordered, q) * 1000:>9.1f}" for q in (0.5, 0.95, 0.99))
+        else:
+            timings = " ".join(f"{'-':>9}" for _ in range(3))
+        reasons = ", ".join(f"{reason}={count}" for reason, count in sorted(stats.failures[step].items()))
+        print(f"{step:>12} {len(ordered):>5} {failed:>6} {timings}  {reasons}")
+
+    total_calls = sum(api.calls.values())
+    total_errors = sum(api.errors.values())
+    print(f"API calls {total_calls}, injected errors {total_errors}")
+    for method in sorted(api.calls):
+        injected = api.errors.get(method, 0)
+        print(f"  {method:<22} {api.calls[method]:>6} ok {injected:>5} injected")
+    for method in sorted(set(api.errors) - set(api.calls)):
+        print(f"  {method:<22} {0:>6} ok {api.errors[method]:>5} injected")
+
+
+def main():
+    """Parse arguments and run the load test."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--ramp", type=float, default=0.0, help="seconds over which users start")
+    parser.add_argument("--think-time", type=float, default=0.0, help="max random pause between steps in ms")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=960)
+    parser.add_argument("--padding", type=int, default=2, choices=range(1, 6))
+    parser.add_argument("--stickers", action="store_true", help="also create a regular sticker pack")
+    parser.add_argument("--album", type=int, default=1, help="photos per user sent as one media group")
+    parser.add_argument("--document", action="store_true", help="send the photo as an uncompressed file")
+    parser.add_argument("--latency", type=float, default=20.0, help="simulated one-way latency in ms")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-methods", nargs="*", default=[], help="methods to inject errors into, default all")
+    parser.add_argument("--error-kind", choices=list(ERROR_KINDS), default="server")
+    parser.add_argument("--step-timeout", type=float, default=120.0)
+    parser.add_argument("--api-port", type=int, default=8081)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,464 @@
+"""Local stand-in for the Telegram Bot API."""
+
+import asyncio
+import json
+import random
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from tornado.httpclient import AsyncHTTPClient, HTTPRequest
+from tornado.httpserver import HTTPServer
+from tornado.web import Application, RequestHandler
+
+from src.config.logger import get_logger
+
+logger = get_logger()
+
+BOT_USERNAME = "fake_emoji_bot"
+
+ReplyPredicate = Callable[[Dict[str, Any]], bool]
+
+ERROR_KINDS: Dict[str, Dict[str, Any]] = {
+    "server": {"ok": False, "error_code": 502, "description": "Bad Gateway"},
+    "flood": {"ok": False, "error_code": 429, "description": "Too Many Requests: retry after 1", "parameters": {"retry_after": 1}},
+    "bad_request": {"ok": False, "error_code": 400, "description": "Bad Request: injected error"},
+}
+
+
+class _MethodHandler(RequestHandler):
+    """Dispatch /bot<token>/<method> requests to the fake API."""
+
+    def initialize(self, api: "FakeBotAPI"):
+        self.api = api
+
+    async def get(self, method: str):
+        await self.post(method)
+
+    async def post(self, method: str):
+        params = self._params()
+        handler = getattr(self.api, f"api_{method}", None)
+        self.set_header("Content-Type", "application/json")
+
+        if handler is None:
+            self.write({"ok": False, "error_code": 404, "description": f"Not Found: method {method}"})
+            return
+
+        if self.api.latency and method != "getUpdates":
+            await asyncio.sleep(self.api.latency)
+
+        error = self.api.injected_error(method)
+        if error is not None:
+            self.set_status(error["error_code"])
+            self.write(json.dumps(error))
+            return
+
+        result = await handler(params)
+        if self.api.latency and method == "getUpdates":
+            await asyncio.sleep(self.api.latency)
+        self.write(json.dumps({"ok": True, "result": result}))
+
+    def _params(self) -> Dict[str, Any]:
+        """Collect parameters from the query string, form or JSON body."""
+        content_type = self.request.headers.get("Content-Type", "")
+        if content_type.startswith("application/json") and self.request.body:
+            return json.loads(self.request.body)
+
+        params: Dict[str, Any] = {}
+        for name in self.request.arguments:
+            params[name] = self.get_argument(name)
+        for name, files in self.request.files.items():
+            params[name] = files[0]["body"]
+        return params
+
+
+class _FileHandler(RequestHandler):
+    """Serve file downloads from /file/bot<token>/<file_path>."""
+
+    def initialize(self, api: "FakeBotAPI"):
+        self.api = api
+
+    async def get(self, file_path: str):
+        if self.api.latency:
+            await asyncio.sleep(self.api.latency)
+
+        data = self.api.files.get(file_path)
+        if data is None:
+            self.set_status(404)
+            return
+        self.api._record("download")
+        self.set_header("Content-Type", "application/octet-stream")
+        self.write(data)
+
+
+class FakeBotAPI:
+    """Minimal in-process Bot API server for local latency and load tests."""
+
+    def __init__(
+        self,
+        port: int = 8081,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        error_methods: Iterable[str] = (),
+        error_kind: str = "server",
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize fake Bot API.
+
+        Args:
+            port: Port to listen on
+            latency: Simulated one-way network latency in seconds
+            error_rate: Probability of failing a call to one of error_methods
+            error_methods: Methods subject to error injection, empty means all
+                except getUpdates
+            error_kind: "server" for 502 Bad Gateway, "flood" for 429 with
+                retry_after, "bad_request" for 400
+            seed: Seed for the error injection random generator
+        """
+        if error_kind not in ERROR_KINDS:
+            raise ValueError(f"Unknown error kind: {error_kind}")
+
+        self.port = port
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_methods = set(error_methods)
+        self.error_kind = error_kind
+        self.webhook_url = ""
+        self.secret_token = ""
+        self.calls: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.files: Dict[str, bytes] = {}
+        self.sticker_sets: Dict[str, int] = {}
+
+        self._random = random.Random(seed)
+
+        self._server: Optional[HTTPServer] = None
+        self._updates: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+        self._update_id = 0
+        self._message_id = 0
+        self._file_id = 0
+        self._reply_waiters: Dict[int, List[Tuple[ReplyPredicate, asyncio.Future]]] = {}
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to pass to ApplicationBuilder.base_url."""
+        return f"http://127.0.0.1:{self.port}/bot"
+
+    @property
+    def base_file_url(self) -> str:
+        """Base URL to pass to ApplicationBuilder.base_file_url."""
+        return f"http://127.0.0.1:{self.port}/file/bot"
+
+    async def start(self):
+        """Start serving."""
+        app = Application([
+            (r"/bot[^/]+/(\w+)", _MethodHandler, {"api": self}),
+            (r"/file/bot[^/]+/(.+)", _FileHandler, {"api": self}),
+        ])
+        self._server = HTTPServer(app)
+        self._server.listen(self.port, address="127.0.0.1")
+        logger.info("Fake Bot API listening on %s", self.base_url)
+
+    async def stop(self):
+        """Stop serving."""
+        if self._server is not None:
+            self._server.stop()
+            self._server = None
+
+    async def push_update(self, update: Dict[str, Any]):
+        """
+        Deliver an update via the webhook if set, otherwise via getUpdates.
+
+        Args:
+            update: Update payload without update_id
+        """
+        self._update_id += 1
+        update = {"update_id": self._update_id, **update}
+
+        if not self.webhook_url:
+            await self._updates.put(update)
+            return
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        headers = {"Content-Type": "application/json"}
+        if self.secret_token:
+            headers["X-Telegram-Bot-Api-Secret-Token"] = self.secret_token
+        await AsyncHTTPClient().fetch(
+            HTTPRequest(self.webhook_url, method="POST", headers=headers, body=json.dumps(update))
+        )
+
+    def expect_reply(self, chat_id: int, predicate: Optional[ReplyPredicate] = None) -> "asyncio.Future":
+        """
+        Get a future resolved by the next matching message sent or edited in a chat.
+
+        Args:
+            chat_id: Chat to watch
+            predicate: Filter on the request parameters, defaults to any reply
+
+        Returns:
+            Future resolved with (time.perf_counter() of the reply, request parameters)
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._reply_waiters.setdefault(chat_id, []).append((predicate or (lambda params: True), future))
+        return future
+
+    def injected_error(self, method: str) -> Optional[Dict[str, Any]]:
+        """
+        Decide whether to fail a call.
+
+        Args:
+            method: Bot API method name
+
+        Returns:
+            Error payload to return instead of the result, or None
+        """
+        if not self.error_rate or method == "getUpdates":
+            return None
+        if self.error_methods and method not in self.error_methods:
+            return None
+        if self._random.random() >= self.error_rate:
+            return None
+
+        self.errors[method] = self.errors.get(method, 0) + 1
+        return dict(ERROR_KINDS[self.error_kind])
+
+    def add_file(self, data: bytes) -> Dict[str, Any]:
+        """
+        Register a file that the bot can fetch with getFile.
+
+        Args:
+            data: File contents
+
+        Returns:
+            File object fields (file_id, file_unique_id, file_size)
+        """
+        self._file_id += 1
+        file_id = f"file{self._file_id}"
+        self.files[f"files/{file_id}"] = data
+        return {"file_id": file_id, "file_unique_id": f"unique{self._file_id}", "file_size": len(data)}
+
+    def photo_update(
+        self,
+        chat_id: int,
+        data: bytes,
+        width: int,
+        height: int,
+        media_group_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Build an update carrying a photo.
+
+        Args:
+            chat_id: Chat and user id
+            data: Encoded photo
+            width: Photo width
+            height: Photo height
+            media_group_id: Album the photo belongs to
+
+        Returns:
+            Update payload without update_id
+        """
+        photo = [{**self.add_file(data), "width": width, "height": height}]
+        extra = {"media_group_id": media_group_id} if media_group_id else {}
+        return {"message": self.make_message(chat_id, photo=photo, **extra)}
+
+    def document_update(self, chat_id: int, data: bytes, mime_type: str = "image/jpeg") -> Dict[str, Any]:
+        """
+        Build an update carrying an image sent as a file.
+
+        Args:
+            chat_id: Chat and user id
+            data: Encoded image
+            mime_type: MIME type of the file
+
+        Returns:
+            Update payload without update_id
+        """
+        document = {**self.add_file(data), "mime_type": mime_type, "file_name": "original.jpg"}
+        return {"message": self.make_message(chat_id, document=document)}
+
+    def callback_update(self, chat_id: int, message_id: int, data: str) -> Dict[str, Any]:
+        """
+        Build an update for an inline keyboard button press.
+
+        Args:
+            chat_id: Chat and user id
+            message_id: Message the keyboard is attached to
+            data: Callback data of the button
+
+        Returns:
+            Update payload without update_id
+        """
+        message = self.make_message(chat_id, "keyboard")
+        message["message_id"] = message_id
+        return {
+            "callback_query": {
+                "id": f"{chat_id}-{message_id}-{data}",
+                "from": message["from"],
+                "chat_instance": str(chat_id),
+                "message": message,
+                "data": data,
+            }
+        }
+
+    def make_message(self, chat_id: int, text: str = "", **extra: Any) -> Dict[str, Any]:
+        """
+        Build a message object.
+
+        Args:
+            chat_id: Chat and user id
+            text: Message text
+            **extra: Additional message fields
+
+        Returns:
+            Message payload
+        """
+        self._message_id += 1
+        message = {
+            "message_id": self._message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": f"user{chat_id}"},
+            **extra,
+        }
+        if text:
+            message["text"] = text
+        return message
+
+    def command_update(self, chat_id: int, command: str) -> Dict[str, Any]:
+        """
+        Build an update carrying a bot command.
+
+        Args:
+            chat_id: Chat and user id
+            command: Command text, e.g. "/start"
+
+        Returns:
+            Update payload without update_id
+        """
+        entities = [{"type": "bot_command", "offset": 0, "length": len(command)}]
+        return {"message": self.make_message(chat_id, command, entities=entities)}
+
+    def _record(self, method: str):
+        self.calls[method] = self.calls.get(method, 0) + 1
+
+    def _resolve_reply(self, chat_id: int, params: Dict[str, Any]):
+        replied_at = time.perf_counter()
+        pending = []
+        for predicate, future in self._reply_waiters.pop(chat_id, []):
+            if future.done():
+                continue
+            if predicate(params):
+                future.set_result((replied_at, params))
+            else:
+                pending.append((predicate, future))
+        if pending:
+            self._reply_waiters[chat_id] = pending
+
+    async def api_getMe(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        self._record("getMe")
+        return {"id": 1, "is_bot": True, "first_name": "Fake", "username": BOT_USERNAME}
+
+    async def api_setWebhook(self, params: Dict[str, Any]) -> bool:
+        self._record("setWebhook")
+        self.webhook_url = params.get("url", "")
+        self.secret_token = params.get("secret_token", "")
+        return True
+
+    async def api_deleteWebhook(self, params: Dict[str, Any]) -> bool:
+        self._record("deleteWebhook")
+        self.webhook_url = ""
+        self.secret_token = ""
+        return True
+
+    async def api_getUpdates(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        self._record("getUpdates")
+        timeout = float(params.get("timeout", 0) or 0)
+        updates = []
+        try:
+            updates.append(await asyncio.wait_for(self._updates.get(), timeout or 0.01))
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            return []
+        while not self._updates.empty():
+            updates.append(self._updates.get_nowait())
+        return updates
+
+    async def api_sendMessage(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        self._record("sendMessage")
+        chat_id = int(params["chat_id"])
+        message = self.make_message(chat_id, params.get("text", ""))
+        self._resolve_reply(chat_id, {**params, "message_id": message["message_id"]})
+        return message
+
+    async def api_editMessageText(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        self._record("editMessageText")
+        chat_id = int(params.get("chat_id", 0))
+        self._resolve_reply(chat_id, params)
+        message = self.make_message(chat_id, params.get("text", ""))
+        message["message_id"] = int(params.get("message_id", message["message_id"]))
+        return message
+
+    async def api_editMessageReplyMarkup(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        self._record("editMessageReplyMarkup")
+        chat_id = int(params.get("chat_id", 0))
+        self._resolve_reply(chat_id, params)
+        message = self.make_message(chat_id, "")
+        message["message_id"] = int(params.get("message_id", message["message_id"]))
+        return message
+
+    async def api_answerCallbackQuery(self, params: Dict[str, Any]) -> bool:
+        self._record("answerCallbackQuery")
+        return True
+
+    async def api_getFile(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        self._record("getFile")
+        file_path = f"files/{params['file_id']}"
+        data = self.files[file_path]
+        return {
+            "file_id": params["file_id"],
+            "file_unique_id": params["file_id"].replace("file", "unique", 1),
+            "file_size": len(data),
+            "file_path": file_path,
+        }
+
+    async def api_uploadStickerFile(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        self._record("uploadStickerFile")
+        return self.add_file(params["sticker"])
+
+    async def api_createNewStickerSet(self, params: Dict[str, Any]) -> bool:
+        self._record("createNewStickerSet")
+        stickers = params["stickers"]
+        if isinstance(stickers, str):
+            stickers = json.loads(stickers)
+        self.sticker_sets[params["name"]] = len(stickers)
+        return True
+
+    async def api_addStickerToSet(self, params: Dict[str, Any]) -> bool:
+        self._record("addStickerToSet")
+        self.sticker_sets[params["name"]] = self.sticker_sets.get(params["name"], 0) + 1
+        return True
+
+
+def callback_data(params: Dict[str, Any]) -> List[str]:
+    """
+    Extract inline keyboard callback data from sendMessage/editMessageText parameters.
+
+    Args:
+        params: Request parameters
+
+    Returns:
+        Callback data of all buttons, in order
+    """
+    markup = params.get("reply_markup")
+    if not markup:
+        return []
+    if isinstance(markup, str):
+        markup = json.loads(markup)
+    return [
+        button["callback_data"]
+        for row in markup.get("inline_keyboard", [])
+        for button in row
+        if "callback_data" in button
+    ]
@@ -0,0 +1,119 @@
+"""Compare update-to-response latency of webhook and polling modes.
+
+Starts a fake Bot API, runs the bot application against it in each mode,
+pushes /start updates and measures the time until the bot's reply
+reaches the fake API. Run from the repository root:
+
+    python -m loadtest.webhook_latency
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+from telegram.ext import Application
+
+from loadtest.fake_bot_api import FakeBotAPI
+from main import build_application
+
+
+async def measure_mode(
+    api: FakeBotAPI,
+    mode: str,
+    count: int,
+    webhook_port: int
+) -> List[float]:
+    """
+    Measure reply latency for one serving mode.
+
+    Args:
+        api: Running fake Bot API
+        mode: "webhook" or "polling"
+        count: Number of updates to send
+        webhook_port: Local port for the webhook listener
+
+    Returns:
+        Latencies in seconds
+    """
+    builder = Application.builder().token("123456:FAKE").base_url(api.base_url)
+    application = build_application(builder)
+
+    await application.initialize()
+    await application.post_init(application)
+
+    if mode == "webhook":
+        await application.updater.start_webhook(
+            listen="127.0.0.1",
+            port=webhook_port,
+            url_path="webhook",
+            webhook_url=f"http://127.0.0.1:{webhook_port}/webhook",
+            secret_token="local-secret",
+        )
+    else:
+        await application.updater.start_polling(poll_interval=0.0, timeout=10)
+    await application.start()
+
+    latencies = []
+    try:
+        for idx in range(count):
+            chat_id = 1000 + idx
+            reply = api.expect_reply(chat_id)
+            sent_at = time.perf_counter()
+            await api.push_update(api.command_update(chat_id, "/start"))
+            replied_at, _ = await asyncio.wait_for(reply, 10)
+            latencies.append(replied_at - sent_at)
+    finally:
+        await application.updater.stop()
+        await application.stop()
+        await application.shutdown()
+        await application.post_shutdown(application)
+
+    return latencies
+
+
+def summarize(mode: str, latencies: List[float]) -> str:
+    """
+    Format latency statistics.
+
+    Args:
+        mode: Serving mode
+        latencies: Latencies in seconds
+
+    Returns:
+        One line summary
+    """
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return (
+        f"{mode:>8}: n={len(ordered)} mean={statistics.mean(ordered) * 1000:.1f}ms "
+        f"p50={statistics.median(ordered) * 1000:.1f}ms p95={p95 * 1000:.1f}ms"
+    )
+
+
+async def run(args: argparse.Namespace):
+    """Run both modes against the fake API."""
+    api = FakeBotAPI(args.api_port, args.latency / 1000)
+    await api.start()
+    try:
+        for mode in args.modes:
+            latencies = await measure_mode(api, mode, args.count, args.webhook_port)
+            print(summarize(mode, latencies))
+    finally:
+        await api.stop()
+
+
+def main():
+    """Parse arguments and run the comparison."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=20.0, help="simulated one-way latency in ms")
+    parser.add_argument("--api-port", type=int, default=8081)
+    parser.add_argument("--webhook-port", type=int, default=8443)
+    parser.add_argument("--modes", nargs="+", default=["polling", "webhook"], choices=["polling", "webhook"])
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,78 @@
 """Main entry point for the emoji cropper bot."""
 
 import asyncio
-from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters
+from typing import Optional
+from telegram.ext import (
+    Application,
+    ApplicationBuilder,
+    CommandHandler,
+    MessageHandler,
+    CallbackQueryHandler,
+    filters,
+)
 
 from src.config import settings
 from src.config.logger import setup_logger, get_logger
+from src.config.metrics import MetricsServer
+from src.bot.batch import media_group_collector
+from src.bot.dispatch import PerUserUpdateProcessor
 from src.bot.handlers import BotHandlers
+from src.bot.scheduler import job_scheduler
+from src.bot.session import session_store
+from src.bot.speculation import speculator
+from src.bot.workspace import workspace_manager
+from src.emoji.executor import cpu_executor
+from src.state.backend import state_backend
 
 logger = setup_logger()
 
+metrics_server = MetricsServer(settings.METRICS_LISTEN, settings.METRICS_PORT)
 
-def main():
-    """Start the bot."""
-    logger.info("Starting emoji cropper bot application")
 
-    try:
-        logger.info("Validating configuration settings")
-        settings.validate()
-        logger.info("Configuration validated successfully")
-    except ValueError as e:
-        logger.critical(f"Configuration validation failed: {e}")
-        raise
+async def post_init(application: Application):
+    """Start background services together with the application."""
+    if settings.CROP_MODE == "local":
+        cpu_executor.start()
+    job_scheduler.start()
+    workspace_manager.start()
+    session_store.start()
+    await metrics_server.start()
 
+
+async def post_shutdown(application: Application):
+    """Stop background services after the application shut down."""
+    await metrics_server.stop()
+    await speculator.shutdown()
+    await media_group_collector.shutdown()
+    await job_scheduler.shutdown()
+    await session_store.shutdown()
+    await workspace_manager.shutdown()
+    cpu_executor.shutdown()
+    if state_backend is not None:
+        state_backend.close()
+
+
+def build_application(builder: Optional[ApplicationBuilder] = None) -> Application:
+    """
+    Build the Telegram application and register all handlers.
+
+    Args:
+        builder: Preconfigured application builder, defaults to one using BOT_TOKEN
+
+    Returns:
+        Configured application
+    """
     logger.info("Building Telegram application")
-    application = Application.builder().token(settings.BOT_TOKEN).build()
+    if builder is None:
+        builder = Application.builder().token(settings.BOT_TOKEN)
+
+    application = (
+        builder
+        .concurrent_updates(PerUserUpdateProcessor(settings.MAX_CONCURRENT_UPDATES, state_backend, settings.STATE_LEASE_TTL))
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
     logger.info("Telegram application created successfully")
 
     handlers = BotHandlers()
@@ -37,6 +86,7 @@ def main():
 
     logger.info("Registering message and callback handlers")
     application.add_handler(MessageHandler(filters.PHOTO, handlers.handle_photo))
+    application.add_handler(MessageHandler(filters.Document.IMAGE, handlers.handle_document))
     application.add_handler(
         CallbackQueryHandler(handlers.handle_command_callback, pattern="^cmd_")
     )
@@ -46,15 +96,48 @@ def main():
     application.add_handler(
         CallbackQueryHandler(handlers.handle_padding_selection, pattern="^padding_")
     )
+    application.add_handler(
+        CallbackQueryHandler(handlers.handle_blank_toggle, pattern="^blank_")
+    )
+    application.add_handler(
+        CallbackQueryHandler(handlers.handle_stickers_toggle, pattern="^stickers_")
+    )
     logger.info("Message and callback handlers registered")
 
-    logger.info("Starting bot polling")
-    application.run_polling()
+    return application
+
+
+def main():
+    """Start the bot."""
+    logger.info("Starting emoji cropper bot application")
+
+    try:
+        logger.info("Validating configuration settings")
+        settings.validate()
+        logger.info("Configuration validated successfully")
+    except ValueError as e:
+        logger.critical("Configuration validation failed: %s", e)
+        raise
+
+    application = build_application()
+
+    if settings.BOT_MODE == "webhook":
+        logger.info("Starting bot webhook on %s:%s/%s", settings.WEBHOOK_LISTEN, settings.WEBHOOK_PORT, settings.WEBHOOK_PATH)
+        application.run_webhook(
+            listen=settings.WEBHOOK_LISTEN,
+            port=settings.WEBHOOK_PORT,
+            url_path=settings.WEBHOOK_PATH,
+            webhook_url=settings.webhook_url(),
+            secret_token=settings.WEBHOOK_SECRET_TOKEN or None,
+        )
+    else:
+        logger.info("Starting bot polling")
+        application.run_polling()
 
 
 if __name__ == "__main__":
     try:
         main()
     except Exception as e:
-        logger.critical(f"Bot crashed with error: {e}", exc_info=True)
+        logger.critical("Bot crashed with error: %s", e, exc_info=True)
         raise
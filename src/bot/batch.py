@@ -0,0 +1,141 @@
+"""Collection of album photos that arrive as separate updates."""
+
+import asyncio
+from typing import Any, AsyncContextManager, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from src.config import settings
+from src.config.logger import get_logger
+
+logger = get_logger()
+
+GroupKey = Tuple[int, str]
+FlushCallback = Callable[[int, List[Any]], Awaitable[None]]
+Exclusive = Callable[[int], AsyncContextManager[None]]
+
+
+class MediaGroup:
+    """Photos of one album received so far."""
+
+    __slots__ = ("user_id", "items", "on_complete", "exclusive", "timer")
+
+    def __init__(self, user_id: int, on_complete: FlushCallback, exclusive: Optional[Exclusive]):
+        """
+        Initialize media group.
+
+        Args:
+            user_id: Telegram user ID
+            on_complete: Called with the user ID and the collected items
+            exclusive: Serializes the callback with the user's updates
+        """
+        self.user_id = user_id
+        self.items: List[Any] = []
+        self.on_complete = on_complete
+        self.exclusive = exclusive
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class MediaGroupCollector:
+    """
+    Gather the updates of a media group and hand them over at once.
+
+    Telegram delivers every photo of an album as its own update carrying
+    the same ``media_group_id``. Items are collected per user and group
+    until no new item arrived for ``window`` seconds, then the whole group
+    is passed to its callback in a background task. Handlers only append
+    and return, so the per-user update lock is not held while waiting. The
+    callback runs under the user's lock and lease passed as ``exclusive``,
+    so it never races the user's next update.
+    """
+
+    def __init__(self, window: float):
+        """
+        Initialize media group collector.
+
+        Args:
+            window: Seconds without a new item after which a group is complete
+        """
+        self.window = window
+        self._groups: Dict[GroupKey, MediaGroup] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        logger.info("MediaGroupCollector initialized with window=%s", window)
+
+    def add(
+        self,
+        user_id: int,
+        media_group_id: str,
+        item: Any,
+        on_complete: FlushCallback,
+        exclusive: Optional[Exclusive] = None
+    ) -> bool:
+        """
+        Add an item to its group and restart the group's window.
+
+        Args:
+            user_id: Telegram user ID
+            media_group_id: Telegram media_group_id of the message
+            item: Item to collect
+            on_complete: Called with the user ID and all items of the group
+                once the group is complete, the callback of the first item wins
+            exclusive: Context manager factory taking the user's update lock,
+                e.g. PerUserUpdateProcessor.exclusive
+
+        Returns:
+            True if the item started a new group
+        """
+        key = (user_id, media_group_id)
+        group = self._groups.get(key)
+        created = group is None
+        if created:
+            group = self._groups[key] = MediaGroup(user_id, on_complete, exclusive)
+        else:
+            group.timer.cancel()
+
+        group.items.append(item)
+        group.timer = asyncio.get_running_loop().call_later(self.window, self._flush, key)
+        logger.debug("User %s media group %s has %s items", user_id, media_group_id, len(group.items))
+        return created
+
+    async def shutdown(self):
+        """Drop pending groups and wait for running callbacks."""
+        for group in self._groups.values():
+            group.timer.cancel()
+        self._groups.clear()
+
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        logger.info("MediaGroupCollector shut down")
+
+    def _flush(self, key: GroupKey):
+        """Hand a complete group to its callback."""
+        group = self._groups.pop(key, None)
+        if group is None:
+            return
+
+        logger.info("User %s media group %s complete with %s items", group.user_id, key[1], len(group.items))
+        task = asyncio.get_running_loop().create_task(self._complete(group))
+        self._tasks.add(task)
+        task.add_done_callback(self._finished)
+
+    @staticmethod
+    async def _complete(group: MediaGroup):
+        """Run the callback of a group under the user's update lock."""
+        if group.exclusive is None:
+            await group.on_complete(group.user_id, group.items)
+            return
+        async with group.exclusive(group.user_id):
+            await group.on_complete(group.user_id, group.items)
+
+    def _finished(self, task: asyncio.Task):
+        """Forget a finished callback and log its failure."""
+        self._tasks.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            logger.error("Media group handling failed: %s", error, exc_info=error)
+
+
+media_group_collector = MediaGroupCollector(settings.MEDIA_GROUP_WINDOW)
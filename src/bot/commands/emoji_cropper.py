@@ -1,15 +1,30 @@
 """Emoji cropper command handler."""
 
+import asyncio
 import os
-import shutil
-from telegram import Update
+import time
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from PIL import UnidentifiedImageError
+from telegram import Bot, CallbackQuery, Document, File, InlineKeyboardMarkup, Message, PhotoSize, Update
+from telegram.constants import StickerType
 from telegram.ext import ContextTypes
 
 from src.config import strings, settings
 from src.config.logger import get_logger
+from src.config.metrics import cache_requests_total, errors_total, jobs_total, stage_seconds, tiles_total
+from src.bot.batch import media_group_collector
 from src.bot.keyboards import KeyboardBuilder
-from src.emoji.processor import ImageProcessor
-from src.emoji.sticker import StickerPackCreator
+from src.bot.scheduler import JobRejected, job_scheduler
+from src.bot.session import Session, session_store
+from src.bot.speculation import speculator
+from src.bot.workspace import Workspace, workspace_manager
+from src.emoji.cache import CacheKey, result_cache
+from src.emoji.executor import cpu_executor
+from src.emoji.processor import ImageProcessor, ImageSource, ImageTooLarge
+from src.emoji.sticker import MAX_PACK_SIZES, STICKER_SIZE, EmojiFile, StickerPackCreator
+from src.state.backend import INSTANCE_ID, JOB_COMPLETED, JOB_FAILED, JOB_RUNNING, state_backend
+from src.worker.client import crop_queue
 
 logger = get_logger()
 
@@ -20,9 +35,16 @@ class EmojiCropperCommand:
     def __init__(self):
         """Initialize emoji cropper command handler."""
         logger.info("Initializing EmojiCropperCommand")
-        self.processor = ImageProcessor(settings.EMOJI_SIZE)
+        self.processor = ImageProcessor(
+            settings.EMOJI_SIZE,
+            settings.RESAMPLE_REDUCING_GAP,
+            settings.PNG_ENCODE_PROFILE,
+            settings.DRAFT_OVERSAMPLE,
+            settings.MAX_IMAGE_PIXELS,
+            settings.DECODE_MAX_PIXELS
+        )
         self.keyboard_builder = KeyboardBuilder()
-        logger.info(f"EmojiCropperCommand initialized with emoji size: {settings.EMOJI_SIZE}")
+        logger.info("EmojiCropperCommand initialized with emoji size: %s", settings.EMOJI_SIZE)
 
     async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """
@@ -33,18 +55,18 @@ class EmojiCropperCommand:
             context: Context for the handler
         """
         user_id = update.effective_user.id if update.effective_user else "Unknown"
-        logger.info(f"User {user_id} started emoji cropper flow")
+        logger.info("User %s started emoji cropper flow", user_id)
 
         reply_markup = self.keyboard_builder.build_back_to_menu()
 
         if update.message:
-            logger.debug(f"User {user_id} started via message")
+            logger.debug("User %s started via message", user_id)
             await update.message.reply_text(
                 strings.EMOJI_CROPPER_START,
                 reply_markup=reply_markup
             )
         elif update.callback_query:
-            logger.debug(f"User {user_id} started via callback")
+            logger.debug("User %s started via callback", user_id)
             await update.callback_query.edit_message_text(
                 strings.EMOJI_CROPPER_START,
                 reply_markup=reply_markup
@@ -59,33 +81,92 @@ class EmojiCropperCommand:
             context: Context for the handler
         """
         user_id = update.effective_user.id
-        logger.info(f"User {user_id} uploading photo for processing")
+        logger.info("User %s uploading photo for processing", user_id)
+
+        media_group_id = update.message.media_group_id
+        if media_group_id:
+            exclusive = getattr(context.application.update_processor, "exclusive", None)
+            if media_group_collector.add(user_id, media_group_id, update.message, self._handle_media_group, exclusive):
+                logger.info("User %s started sending media group %s", user_id, media_group_id)
+            return
+
+        await self._receive_image(update, user_id, update.message.photo[-1])
+
+    async def handle_document(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """
+        Handle images sent uncompressed as files.
+
+        Files over DOCUMENT_MAX_BYTES are refused before downloading, images
+        over MAX_IMAGE_PIXELS after reading their header.
+
+        Args:
+            update: Telegram update object
+            context: Context for the handler
+        """
+        user_id = update.effective_user.id
+        document = update.message.document
+        logger.info("User %s uploading document for processing: %s, %s bytes", user_id, document.mime_type, document.file_size)
 
-        photo = update.message.photo[-1]
-        logger.debug(f"User {user_id} photo file_id: {photo.file_id}, size: {photo.file_size} bytes")
+        if document.file_size and document.file_size > settings.DOCUMENT_MAX_BYTES:
+            logger.warning("User %s document of %s bytes exceeds DOCUMENT_MAX_BYTES", user_id, document.file_size)
+            await update.message.reply_text(
+                strings.ERROR_FILE_TOO_LARGE.format(limit=settings.DOCUMENT_MAX_BYTES // (1024 * 1024))
+            )
+            return
 
-        logger.info(f"User {user_id} downloading photo from Telegram")
-        file = await photo.get_file()
+        await self._receive_image(update, user_id, document)
 
-        temp_dir = f"{settings.TEMP_DIR_PREFIX}{user_id}"
-        os.makedirs(temp_dir, exist_ok=True)
-        logger.debug(f"User {user_id} created temp directory: {temp_dir}")
+    async def _receive_image(self, update: Update, user_id: int, image: Union[PhotoSize, Document]):
+        """
+        Download a photo or image file and offer grid sizes for it.
 
-        image_path = os.path.join(temp_dir, "input.jpg")
-        logger.info(f"User {user_id} saving photo to: {image_path}")
-        await file.download_to_drive(image_path)
-        logger.info(f"User {user_id} photo downloaded successfully")
+        Args:
+            update: Telegram update object
+            user_id: Telegram user ID
+            image: Photo size or document to crop
+        """
+        logger.debug("User %s image file_id: %s, size: %s bytes", user_id, image.file_id, image.file_size)
 
-        context.user_data["image_path"] = image_path
-        context.user_data["temp_dir"] = temp_dir
+        session = await session_store.load(user_id, create=True)
+        logger.debug("User %s session opened, store: %s", user_id, session_store.stats())
+        session.file_id = image.file_id
+        session.file_unique_id = image.file_unique_id
+        session.grid_size = None
+        session.release_batch()
 
-        logger.info(f"User {user_id} getting image dimensions")
-        width, height = self.processor.get_image_dimensions(image_path)
-        logger.info(f"User {user_id} image dimensions: {width}x{height}")
+        logger.info("User %s downloading photo from Telegram", user_id)
+        workspace, image_source = await self._download_photo(user_id, session, await image.get_file())
 
-        logger.info(f"User {user_id} calculating suggested grid sizes")
+        logger.info("User %s getting image dimensions", user_id)
+        try:
+            with stage_seconds.time("probe"):
+                width, height = await asyncio.to_thread(
+                    self.processor.get_image_dimensions,
+                    image_source
+                )
+        except (ImageTooLarge, UnidentifiedImageError) as e:
+            logger.warning("User %s image rejected: %s", user_id, e)
+            workspace_manager.release(session.workspace_id)
+            session.workspace_id = None
+            session.file_id = None
+            session.file_unique_id = None
+            await session_store.save(session)
+            if isinstance(e, ImageTooLarge):
+                await update.message.reply_text(
+                    strings.ERROR_IMAGE_TOO_LARGE.format(limit=settings.MAX_IMAGE_PIXELS // 1_000_000)
+                )
+            else:
+                await update.message.reply_text(strings.ERROR_UNSUPPORTED_FILE)
+            return
+        logger.info("User %s image dimensions: %sx%s", user_id, width, height)
+
+        logger.info("User %s calculating suggested grid sizes", user_id)
         suggested_grids = self.processor.suggest_grid_sizes(width, height)
-        logger.info(f"User {user_id} suggested grids: {suggested_grids}")
+        logger.info("User %s suggested grids: %s", user_id, suggested_grids)
+        session.suggested_grids = tuple(suggested_grids)
+        await session_store.save(session)
+
+        self._speculate(session, speculator.likely_grid(suggested_grids), speculator.likely_padding())
 
         reply_markup = self.keyboard_builder.build_grid_selection(suggested_grids)
 
@@ -93,7 +174,58 @@ class EmojiCropperCommand:
             strings.ASK_GRID_SIZE.format(width=width, height=height),
             reply_markup=reply_markup
         )
-        logger.info(f"User {user_id} presented with grid selection options")
+        logger.info("User %s presented with grid selection options", user_id)
+
+    async def _handle_media_group(self, user_id: int, messages: List[Message]):
+        """
+        Download the photos of an album concurrently and offer one shared grid.
+
+        Called by the media group collector once all photos of the album
+        arrived. Grid suggestions follow the first photo and are limited to
+        grids whose tiles over all photos fit into one emoji pack.
+
+        Args:
+            user_id: Telegram user ID
+            messages: Messages of the album
+        """
+        messages = sorted(messages, key=lambda message: message.message_id)
+        photos = [message.photo[-1] for message in messages]
+        logger.info("User %s sent a media group of %s photos", user_id, len(photos))
+
+        session = await session_store.load(user_id, create=True)
+        speculator.cancel(user_id)
+        workspace_manager.release(session.workspace_id)
+        session.workspace_id = None
+        session.file_id = None
+        session.file_unique_id = None
+        session.grid_size = None
+        session.release_batch()
+        session.batch_files = tuple((photo.file_id, photo.file_unique_id) for photo in photos)
+
+        try:
+            await self._download_batch(user_id, session, messages[0].get_bot())
+        except Exception as e:
+            logger.error("User %s media group download failed: %s", user_id, e, exc_info=True)
+            session.release_batch()
+            await session_store.save(session)
+            await messages[-1].reply_text(strings.ERROR_PROCESSING)
+            return
+
+        limit = MAX_PACK_SIZES[StickerType.CUSTOM_EMOJI]
+        suggested_grids = [
+            (cols, rows)
+            for cols, rows in self.processor.suggest_grid_sizes(photos[0].width, photos[0].height)
+            if len(photos) * cols * rows <= limit
+        ] or [(2, 2)]
+        logger.info("User %s suggested grids for %s photos: %s", user_id, len(photos), suggested_grids)
+        session.suggested_grids = tuple(suggested_grids)
+        await session_store.save(session)
+
+        await messages[-1].reply_text(
+            strings.ASK_GRID_SIZE_BATCH.format(count=len(photos)),
+            reply_markup=self.keyboard_builder.build_grid_selection(suggested_grids)
+        )
+        logger.info("User %s presented with grid selection options for media group", user_id)
 
     async def handle_grid_selection(
         self,
@@ -114,17 +246,109 @@ class EmojiCropperCommand:
 
         grid_data = query.data.replace("grid_", "")
         cols, rows = map(int, grid_data.split("x"))
-        logger.info(f"User {user_id} selected grid size: {cols}x{rows}")
+        logger.info("User %s selected grid size: %sx%s", user_id, cols, rows)
+
+        session = await session_store.load(user_id, create=True)
+        session.grid_size = (cols, rows)
+        await session_store.save(session)
 
-        context.user_data["grid_size"] = (cols, rows)
+        if session.grid_size in session.suggested_grids:
+            speculator.record_choice(grid_index=session.suggested_grids.index(session.grid_size))
+        self._speculate(session, session.grid_size, speculator.likely_padding())
 
-        reply_markup = self.keyboard_builder.build_padding_selection()
+        reply_markup = self._padding_keyboard(session)
 
         await query.edit_message_text(
             strings.ASK_PADDING,
             reply_markup=reply_markup
         )
-        logger.info(f"User {user_id} presented with padding selection options")
+        logger.info("User %s presented with padding selection options", user_id)
+
+    async def handle_blank_toggle(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE
+    ):
+        """
+        Switch blank tile omission and update the padding keyboard.
+
+        Args:
+            update: Telegram update object
+            context: Context for the handler
+        """
+        session = await self._toggle_option(update, "skip_blank")
+        if session.grid_size:
+            self._speculate(session, session.grid_size, speculator.likely_padding())
+
+    async def handle_stickers_toggle(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE
+    ):
+        """
+        Switch the additional regular sticker pack and update the padding keyboard.
+
+        Args:
+            update: Telegram update object
+            context: Context for the handler
+        """
+        await self._toggle_option(update, "with_stickers")
+
+    async def _toggle_option(self, update: Update, option: str) -> Session:
+        """
+        Flip a boolean session option and redraw the padding keyboard.
+
+        Args:
+            update: Telegram update object
+            option: Name of the Session attribute
+
+        Returns:
+            Session of the user
+        """
+        user_id = update.effective_user.id
+
+        query = update.callback_query
+        await query.answer()
+
+        session = await session_store.load(user_id, create=True)
+        setattr(session, option, not getattr(session, option))
+        await session_store.save(session)
+        logger.info("User %s set %s to %s", user_id, option, getattr(session, option))
+
+        await query.edit_message_reply_markup(reply_markup=self._padding_keyboard(session))
+        return session
+
+    def _padding_keyboard(self, session: Session) -> InlineKeyboardMarkup:
+        """
+        Build the padding keyboard for the options of a session.
+
+        Args:
+            session: Session of the user
+
+        Returns:
+            InlineKeyboardMarkup with padding options and option toggles
+        """
+        return self.keyboard_builder.build_padding_selection(
+            session.skip_blank,
+            session.with_stickers,
+            self._fits_sticker_pack(session)
+        )
+
+    @staticmethod
+    def _fits_sticker_pack(session: Session) -> bool:
+        """
+        Check whether the tiles of a session fit into a regular sticker pack.
+
+        Args:
+            session: Session of the user
+
+        Returns:
+            True if the chosen grid over all photos stays within the pack limit
+        """
+        if not session.grid_size:
+            return True
+        cols, rows = session.grid_size
+        return session.photo_count * cols * rows <= MAX_PACK_SIZES[StickerType.REGULAR]
 
     async def handle_padding_selection(
         self,
@@ -144,63 +368,941 @@ class EmojiCropperCommand:
         await query.answer()
 
         padding = int(query.data.replace("padding_", ""))
-        logger.info(f"User {user_id} selected padding: {padding}")
+        logger.info("User %s selected padding: %s", user_id, padding)
+        speculator.record_choice(padding=padding)
 
-        await query.edit_message_text(strings.PROCESSING)
-        logger.info(f"User {user_id} starting image processing")
+        session = await session_store.load(user_id)
+        if session and session.batch_files:
+            await self._submit_batch(query, context, session, padding)
+            return
+
+        workspace = workspace_manager.get(session.workspace_id) if session else None
+        grid_size = session.grid_size if session else None
+        image_key = session.file_unique_id if session else None
+        skip_blank = session.skip_blank if session else False
+        with_stickers = session.with_stickers if session else False
 
-        image_path = context.user_data.get("image_path")
-        temp_dir = context.user_data.get("temp_dir")
-        grid_size = context.user_data.get("grid_size")
+        if not workspace and grid_size and session.file_id:
+            logger.info("User %s photo is not in this process, downloading it again", user_id)
+            workspace, _ = await self._download_photo(user_id, session, await context.bot.get_file(session.file_id))
 
-        if not image_path or not grid_size:
-            logger.error(f"User {user_id} missing required data - image_path: {bool(image_path)}, grid_size: {bool(grid_size)}")
+        if not workspace or not grid_size:
+            logger.error("User %s missing required data - workspace: %s, grid_size: %s", user_id, bool(workspace), bool(grid_size))
             await query.edit_message_text(strings.ERROR_PROCESSING)
             return
 
-        logger.info(f"User {user_id} processing with grid_size={grid_size}, padding={padding}")
+        cache_key = self._cache_key(image_key, grid_size, padding, skip_blank)
+
+        allowed, job_id = await self._start_job(query, user_id, {
+            "file_unique_id": image_key,
+            "grid_size": list(grid_size),
+            "padding": padding,
+            "skip_blank": skip_blank,
+            "with_stickers": with_stickers,
+        })
+        if not allowed:
+            return
+
+        await self._submit_job(
+            query,
+            user_id,
+            [workspace],
+            lambda: self._process_pack(
+                query,
+                context,
+                user_id,
+                workspace,
+                grid_size,
+                padding,
+                skip_blank,
+                with_stickers,
+                cache_key,
+                image_key,
+                job_id
+            ),
+            job_id
+        )
 
+    async def _submit_batch(
+        self,
+        query: CallbackQuery,
+        context: ContextTypes.DEFAULT_TYPE,
+        session: Session,
+        padding: int
+    ):
+        """
+        Queue the job turning all photos of a media group into one pack.
+
+        Args:
+            query: Callback query of the padding selection
+            context: Context for the handler
+            session: Session holding the media group
+            padding: Padding value (1-5)
+        """
+        user_id = session.user_id
+        grid_size = session.grid_size
+        if not grid_size:
+            logger.error("User %s missing grid size for media group", user_id)
+            await query.edit_message_text(strings.ERROR_PROCESSING)
+            return
+
+        workspaces = [workspace_manager.get(workspace_id) for workspace_id in session.batch_workspace_ids]
+        if len(workspaces) != len(session.batch_files) or not all(workspaces):
+            logger.info("User %s media group is not in this process, downloading it again", user_id)
+            try:
+                workspaces = [workspace for workspace, _ in await self._download_batch(user_id, session, context.bot)]
+            except Exception as e:
+                logger.error("User %s media group download failed: %s", user_id, e, exc_info=True)
+                await query.edit_message_text(strings.ERROR_PROCESSING)
+                return
+
+        image_keys = [unique_id for _, unique_id in session.batch_files]
+        with_stickers = session.with_stickers and self._fits_sticker_pack(session)
+
+        allowed, job_id = await self._start_job(query, user_id, {
+            "batch": image_keys,
+            "grid_size": list(grid_size),
+            "padding": padding,
+            "skip_blank": session.skip_blank,
+            "with_stickers": with_stickers,
+        })
+        if not allowed:
+            return
+
+        await self._submit_job(
+            query,
+            user_id,
+            workspaces,
+            lambda: self._process_batch(
+                query,
+                context,
+                user_id,
+                workspaces,
+                image_keys,
+                grid_size,
+                padding,
+                session.skip_blank,
+                with_stickers,
+                job_id
+            ),
+            job_id
+        )
+
+    async def _start_job(
+        self,
+        query: CallbackQuery,
+        user_id: int,
+        payload: Dict[str, Any]
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Record a new job unless the user already has one running.
+
+        Args:
+            query: Callback query of the padding selection
+            user_id: Telegram user ID
+            payload: Job parameters stored with the record
+
+        Returns:
+            Tuple of (whether the job may start, job record ID or None
+            without a state backend)
+        """
+        if state_backend is None:
+            return True, None
+
+        job, created = await asyncio.to_thread(state_backend.create_job, user_id, payload, settings.STATE_LEASE_TTL)
+        if not created:
+            logger.info("User %s already has job %s %s by %s", user_id, job.id, job.status, job.owner)
+            await query.edit_message_text(strings.ERROR_JOB_RUNNING)
+            return False, None
+        return True, job.id
+
+    async def _submit_job(
+        self,
+        query: CallbackQuery,
+        user_id: int,
+        workspaces: List[Workspace],
+        run: Callable[[], Awaitable[None]],
+        job_id: Optional[str]
+    ):
+        """
+        Pin the workspaces of a job and hand it to the job scheduler.
+
+        The job record is heartbeated until the job finishes, so jobs running
+        longer than STATE_LEASE_TTL are not mistaken for abandoned ones.
+
+        Args:
+            query: Callback query of the padding selection
+            user_id: Telegram user ID
+            workspaces: Workspaces the job reads, unpinned by the job
+            run: Factory returning the job coroutine
+            job_id: ID of the job record in the state backend
+        """
+        async def report_position(position: int):
+            await query.edit_message_text(strings.QUEUED.format(position=position))
+
+        heartbeat = None
+        if job_id is not None:
+            heartbeat = asyncio.get_running_loop().create_task(self._heartbeat_job(job_id))
+
+        async def run_with_heartbeat():
+            try:
+                await run()
+            finally:
+                if heartbeat is not None:
+                    heartbeat.cancel()
+
+        for workspace in workspaces:
+            workspace_manager.pin(workspace)
+        try:
+            position = job_scheduler.submit(user_id, run_with_heartbeat, on_position=report_position)
+        except JobRejected:
+            if heartbeat is not None:
+                heartbeat.cancel()
+            for workspace in workspaces:
+                workspace_manager.unpin(workspace)
+            jobs_total.inc("rejected")
+            await self._record_job(job_id, JOB_FAILED, "rejected")
+            await query.edit_message_text(
+                strings.ERROR_QUEUE_FULL,
+                reply_markup=self.keyboard_builder.build_back_to_menu()
+            )
+            return
+
+        if position:
+            logger.info("User %s queued at position %s", user_id, position)
+
+    async def _process_pack(
+        self,
+        query: CallbackQuery,
+        context: ContextTypes.DEFAULT_TYPE,
+        user_id: int,
+        workspace: Workspace,
+        grid_size: Tuple[int, int],
+        padding: int,
+        skip_blank: bool,
+        with_stickers: bool,
+        cache_key: Optional[CacheKey],
+        image_key: Optional[str],
+        job_id: Optional[str] = None
+    ):
+        """
+        Crop the image and create the emoji pack, run by the job scheduler.
+
+        The workspace is pinned when the job is submitted and unpinned here.
+
+        Args:
+            query: Callback query of the padding selection
+            context: Context for the handler
+            user_id: Telegram user ID
+            workspace: Workspace holding the downloaded photo
+            grid_size: Tuple of (columns, rows)
+            padding: Padding value (1-5)
+            skip_blank: Leave out uniform and fully transparent tiles
+            with_stickers: Also create a regular sticker pack
+            cache_key: Identity of the crop result, None if the photo is unknown
+            image_key: Photo identity for reusing the decoded image
+            job_id: ID of the job record in the state backend
+        """
         try:
-            output_dir = os.path.join(temp_dir, "emojis")
-            logger.info(f"User {user_id} cropping image to grid")
-            cropped_files = self.processor.crop_to_grid(
-                image_path,
-                output_dir,
+            await self._create_pack(
+                query,
+                context,
+                user_id,
+                workspace,
                 grid_size,
-                padding
+                padding,
+                skip_blank,
+                with_stickers,
+                cache_key,
+                image_key,
+                job_id
             )
-            logger.info(f"User {user_id} created {len(cropped_files)} emoji files")
+        finally:
+            workspace_manager.unpin(workspace)
 
-            await query.edit_message_text(strings.CREATING_PACK)
-            logger.info(f"User {user_id} creating sticker pack")
+    async def _create_pack(
+        self,
+        query: CallbackQuery,
+        context: ContextTypes.DEFAULT_TYPE,
+        user_id: int,
+        workspace: Workspace,
+        grid_size: Tuple[int, int],
+        padding: int,
+        skip_blank: bool,
+        with_stickers: bool,
+        cache_key: Optional[CacheKey],
+        image_key: Optional[str],
+        job_id: Optional[str] = None
+    ):
+        """
+        Crop the image of a pinned workspace and create the emoji pack.
+
+        Args:
+            query: Callback query of the padding selection
+            context: Context for the handler
+            user_id: Telegram user ID
+            workspace: Workspace holding the downloaded photo
+            grid_size: Tuple of (columns, rows)
+            padding: Padding value (1-5)
+            skip_blank: Leave out uniform and fully transparent tiles
+            with_stickers: Also create a regular sticker pack
+            cache_key: Identity of the crop result, None if the photo is unknown
+            image_key: Photo identity for reusing the decoded image
+            job_id: ID of the job record in the state backend
+        """
+        await self._record_job(job_id, JOB_RUNNING)
+        await query.edit_message_text(strings.PROCESSING)
+        logger.info("User %s starting image processing", user_id)
+        logger.info("User %s processing with grid_size=%s, padding=%s", user_id, grid_size, padding)
+
+        image_data = workspace.image_data
+        stage = "crop"
+        try:
+            cropped_files = None
+            sticker_files = None
+            speculative = speculator.claim(user_id, cache_key) if cache_key and not with_stickers else None
+            if speculative is not None:
+                try:
+                    cropped_files = await speculative
+                    logger.info("User %s using %s speculatively cropped tiles", user_id, len(cropped_files))
+                except Exception as e:
+                    logger.warning("User %s speculative crop failed, cropping again: %s", user_id, e)
 
-            sticker_creator = StickerPackCreator(context.bot)
-            emoji_link = await sticker_creator.create_emoji_pack(
-                user_id=user_id,
-                emoji_files=cropped_files
+            if not cropped_files and not with_stickers and cache_key and result_cache.enabled:
+                cropped_files = await asyncio.to_thread(result_cache.get, cache_key)
+                cache_requests_total.inc("hit" if cropped_files else "miss")
+                logger.info("User %s result cache %s: %s", user_id, "hit" if cropped_files else "miss", result_cache.stats())
+
+            if with_stickers:
+                logger.info("User %s cropping image to grid for emoji and sticker packs", user_id)
+                with stage_seconds.time("crop"):
+                    cropped_files, sticker_files = await self._crop_with_stickers(
+                        image_data or workspace.image_path,
+                        grid_size,
+                        padding,
+                        skip_blank,
+                        cache_key,
+                        image_key
+                    )
+            elif cropped_files:
+                logger.info("User %s reusing %s cached emoji tiles", user_id, len(cropped_files))
+            elif image_data and not crop_queue.enabled:
+                logger.info("User %s streaming tiles from crop to upload", user_id)
+                stage = "crop_upload"
+            elif crop_queue.enabled:
+                logger.info("User %s cropping image to grid", user_id)
+                with stage_seconds.time("crop"):
+                    cropped_files = await self._crop_bytes(image_data or workspace.image_path, grid_size, padding, image_key, skip_blank)
+                if cache_key and result_cache.enabled:
+                    await asyncio.to_thread(result_cache.put, cache_key, cropped_files)
+            else:
+                logger.info("User %s cropping image to grid", user_id)
+                output_dir = os.path.join(workspace.path, "emojis")
+                with stage_seconds.time("crop"):
+                    cropped_files = await cpu_executor.run(
+                        self.processor.crop_to_grid,
+                        workspace.image_path,
+                        output_dir,
+                        grid_size,
+                        padding,
+                        image_key,
+                        skip_blank,
+                        key=image_key
+                    )
+                workspace_manager.account_disk(workspace)
+
+            if cropped_files or sticker_files is not None:
+                tiles_total.inc(amount=len(cropped_files) + len(sticker_files or ()))
+                logger.info("User %s created %s emoji files", user_id, len(cropped_files))
+            else:
+                cropped_files = self._stream_tiles(user_id, image_data, grid_size, padding, image_key, skip_blank, cache_key)
+
+            if stage == "crop":
+                stage = "create_pack"
+            await self._publish_packs(
+                query,
+                context,
+                user_id,
+                cropped_files,
+                sticker_files,
+                None if skip_blank else grid_size[0] * grid_size[1],
+                job_id
             )
-            logger.info(f"User {user_id} sticker pack created successfully: {emoji_link}")
 
+            session = session_store.get(user_id)
+            if session and session.workspace_id == workspace.id:
+                session.workspace_id = None
+                await session_store.save(session)
+            workspace_manager.release(workspace.id)
+            logger.info("User %s workspace released", user_id)
+
+        except Exception as e:
+            jobs_total.inc("failed")
+            errors_total.inc(stage)
+            await self._record_job(job_id, JOB_FAILED, f"{stage}: {e}")
+            logger.error("User %s error during processing: %s", user_id, e, exc_info=True)
             reply_markup = self.keyboard_builder.build_back_to_menu()
 
             await query.edit_message_text(
-                strings.SUCCESS.format(link=emoji_link),
+                strings.ERROR_CREATING_PACK,
                 reply_markup=reply_markup
             )
 
-            logger.info(f"User {user_id} cleaning up temp directory: {temp_dir}")
-            shutil.rmtree(temp_dir, ignore_errors=True)
-            logger.info(f"User {user_id} temp directory cleaned up successfully")
+    async def _process_batch(
+        self,
+        query: CallbackQuery,
+        context: ContextTypes.DEFAULT_TYPE,
+        user_id: int,
+        workspaces: List[Workspace],
+        image_keys: List[str],
+        grid_size: Tuple[int, int],
+        padding: int,
+        skip_blank: bool,
+        with_stickers: bool,
+        job_id: Optional[str] = None
+    ):
+        """
+        Crop all photos of a media group and create one pack, run by the job scheduler.
+
+        The workspaces are pinned when the job is submitted and unpinned here.
+
+        Args:
+            query: Callback query of the padding selection
+            context: Context for the handler
+            user_id: Telegram user ID
+            workspaces: Workspaces holding the photos, in album order
+            image_keys: Telegram file_unique_id of every photo
+            grid_size: Tuple of (columns, rows) shared by all photos
+            padding: Padding value (1-5)
+            skip_blank: Leave out uniform and fully transparent tiles
+            with_stickers: Also create a regular sticker pack
+            job_id: ID of the job record in the state backend
+        """
+        try:
+            await self._create_batch_pack(
+                query,
+                context,
+                user_id,
+                workspaces,
+                image_keys,
+                grid_size,
+                padding,
+                skip_blank,
+                with_stickers,
+                job_id
+            )
+        finally:
+            for workspace in workspaces:
+                workspace_manager.unpin(workspace)
+
+    async def _create_batch_pack(
+        self,
+        query: CallbackQuery,
+        context: ContextTypes.DEFAULT_TYPE,
+        user_id: int,
+        workspaces: List[Workspace],
+        image_keys: List[str],
+        grid_size: Tuple[int, int],
+        padding: int,
+        skip_blank: bool,
+        with_stickers: bool,
+        job_id: Optional[str] = None
+    ):
+        """
+        Crop the photos of a media group in parallel and create one combined pack.
+
+        Every photo is a separate crop, so the crops spread over the CPU
+        executor processes or the image workers. The tiles are joined in
+        album order and uploaded as a single pack.
+
+        Args:
+            query: Callback query of the padding selection
+            context: Context for the handler
+            user_id: Telegram user ID
+            workspaces: Workspaces holding the photos, in album order
+            image_keys: Telegram file_unique_id of every photo
+            grid_size: Tuple of (columns, rows) shared by all photos
+            padding: Padding value (1-5)
+            skip_blank: Leave out uniform and fully transparent tiles
+            with_stickers: Also create a regular sticker pack
+            job_id: ID of the job record in the state backend
+        """
+        await self._record_job(job_id, JOB_RUNNING)
+        await query.edit_message_text(strings.PROCESSING_BATCH.format(count=len(workspaces)))
+        logger.info("User %s processing %s photos with grid_size=%s, padding=%s", user_id, len(workspaces), grid_size, padding)
+
+        stage = "crop"
+        try:
+            with stage_seconds.time("crop"):
+                results = await asyncio.gather(*(
+                    self._crop_photo(workspace, image_key, grid_size, padding, skip_blank, with_stickers)
+                    for workspace, image_key in zip(workspaces, image_keys)
+                ))
+
+            emoji_files = [tile for emoji_tiles, _ in results for tile in emoji_tiles]
+            sticker_files = [tile for _, sticker_tiles in results for tile in sticker_tiles] if with_stickers else None
+            tiles_total.inc(amount=len(emoji_files) + len(sticker_files or ()))
+            logger.info("User %s created %s emoji files from %s photos", user_id, len(emoji_files), len(workspaces))
+
+            stage = "create_pack"
+            await self._publish_packs(query, context, user_id, emoji_files, sticker_files, len(emoji_files), job_id)
+
+            session = session_store.get(user_id)
+            if session and session.batch_workspace_ids == tuple(workspace.id for workspace in workspaces):
+                session.batch_workspace_ids = ()
+                await session_store.save(session)
+            for workspace in workspaces:
+                workspace_manager.release(workspace.id)
+            logger.info("User %s media group workspaces released", user_id)
 
         except Exception as e:
-            logger.error(f"User {user_id} error during processing: {e}", exc_info=True)
-            reply_markup = self.keyboard_builder.build_back_to_menu()
+            jobs_total.inc("failed")
+            errors_total.inc(stage)
+            await self._record_job(job_id, JOB_FAILED, f"{stage}: {e}")
+            logger.error("User %s error during media group processing: %s", user_id, e, exc_info=True)
 
             await query.edit_message_text(
                 strings.ERROR_CREATING_PACK,
-                reply_markup=reply_markup
+                reply_markup=self.keyboard_builder.build_back_to_menu()
             )
 
-            if temp_dir and os.path.exists(temp_dir):
-                logger.info(f"User {user_id} cleaning up temp directory after error: {temp_dir}")
-                shutil.rmtree(temp_dir, ignore_errors=True)
+    async def _publish_packs(
+        self,
+        query: CallbackQuery,
+        context: ContextTypes.DEFAULT_TYPE,
+        user_id: int,
+        emoji_files: Union[List[EmojiFile], AsyncIterator[bytes]],
+        sticker_files: Optional[List[bytes]],
+        total: Optional[int],
+        job_id: Optional[str]
+    ):
+        """
+        Upload the tiles, create the packs and send their links.
+
+        Args:
+            query: Callback query of the padding selection
+            context: Context for the handler
+            user_id: Telegram user ID
+            emoji_files: Emoji tiles or paths, or an async iterator producing them
+            sticker_files: Regular sticker tiles, None for an emoji pack only
+            total: Number of emoji tiles, None if unknown
+            job_id: ID of the job record in the state backend
+        """
+        await query.edit_message_text(strings.CREATING_PACK)
+        logger.info("User %s creating sticker pack", user_id)
+        await self._record_job(job_id, JOB_RUNNING)
+
+        async def report_progress(uploaded: int, total: Optional[int]):
+            if total is None:
+                await query.edit_message_text(strings.UPLOADING_UNKNOWN_TOTAL.format(uploaded=uploaded))
+            else:
+                await query.edit_message_text(strings.UPLOADING.format(uploaded=uploaded, total=total))
+
+        sticker_creator = StickerPackCreator(context.bot)
+        with stage_seconds.time("create_pack"):
+            if sticker_files is not None:
+                emoji_link, sticker_link = await sticker_creator.create_packs(
+                    user_id=user_id,
+                    emoji_files=emoji_files,
+                    sticker_files=sticker_files,
+                    on_progress=report_progress
+                )
+                success_text = strings.SUCCESS_WITH_STICKERS.format(link=emoji_link, sticker_link=sticker_link)
+            else:
+                emoji_link = await sticker_creator.create_emoji_pack(
+                    user_id=user_id,
+                    emoji_files=emoji_files,
+                    total=total,
+                    on_progress=report_progress
+                )
+                success_text = strings.SUCCESS.format(link=emoji_link)
+        jobs_total.inc("completed")
+        await self._record_job(job_id, JOB_COMPLETED)
+        logger.info("User %s sticker pack created successfully: %s", user_id, emoji_link)
+
+        reply_markup = self.keyboard_builder.build_back_to_menu()
+
+        await query.edit_message_text(
+            success_text,
+            reply_markup=reply_markup
+        )
+
+    async def _download_photo(self, user_id: int, session: Session, file: File) -> Tuple[Workspace, ImageSource]:
+        """
+        Download a photo into a new workspace of the session.
+
+        Args:
+            user_id: Telegram user ID
+            session: Session of the user
+            file: Telegram file of the photo
+
+        Returns:
+            Tuple of (workspace holding the photo, photo bytes or path)
+        """
+        workspace_manager.release(session.workspace_id)
+        workspace, image_source = await self._download_file(user_id, file)
+        session.workspace_id = workspace.id
+        return workspace, image_source
+
+    async def _download_batch(self, user_id: int, session: Session, bot: Bot) -> List[Tuple[Workspace, ImageSource]]:
+        """
+        Download the photos of a media group concurrently into new workspaces.
+
+        Args:
+            user_id: Telegram user ID
+            session: Session holding the media group
+            bot: Bot to fetch the files with
+
+        Returns:
+            List of (workspace holding the photo, photo bytes or path) in album order
+        """
+        for workspace_id in session.batch_workspace_ids:
+            workspace_manager.release(workspace_id)
+        session.batch_workspace_ids = ()
+
+        async def download(file_id: str) -> Tuple[Workspace, ImageSource]:
+            return await self._download_file(user_id, await bot.get_file(file_id))
+
+        results = await asyncio.gather(
+            *(download(file_id) for file_id, _ in session.batch_files),
+            return_exceptions=True
+        )
+        failures = [result for result in results if isinstance(result, BaseException)]
+        if failures:
+            for result in results:
+                if not isinstance(result, BaseException):
+                    workspace_manager.release(result[0].id)
+            raise failures[0]
+
+        session.batch_workspace_ids = tuple(workspace.id for workspace, _ in results)
+        logger.info("User %s downloaded %s photos of a media group", user_id, len(results))
+        return results
+
+    async def _download_file(self, user_id: int, file: File) -> Tuple[Workspace, ImageSource]:
+        """
+        Download a photo into a new workspace.
+
+        Args:
+            user_id: Telegram user ID
+            file: Telegram file of the photo
+
+        Returns:
+            Tuple of (workspace holding the photo, photo bytes or path)
+        """
+        workspace = workspace_manager.create(user_id, on_disk=not settings.IN_MEMORY_PIPELINE)
+
+        if settings.IN_MEMORY_PIPELINE:
+            with stage_seconds.time("download"):
+                image_source = bytes(await file.download_as_bytearray())
+            logger.info("User %s photo downloaded into memory: %s bytes", user_id, len(image_source))
+            workspace_manager.store_image(workspace, image_source)
+        else:
+            image_source = workspace.image_path
+            logger.info("User %s saving photo to: %s", user_id, image_source)
+            with stage_seconds.time("download"):
+                await file.download_to_drive(image_source)
+            logger.info("User %s photo downloaded successfully", user_id)
+            workspace_manager.account_disk(workspace)
+        return workspace, image_source
+
+    async def _heartbeat_job(self, job_id: str):
+        """
+        Keep a queued or running job from looking abandoned to other processes.
+
+        Args:
+            job_id: ID of the job record in the state backend
+        """
+        while True:
+            await asyncio.sleep(settings.STATE_LEASE_TTL / 3)
+            try:
+                if not await asyncio.to_thread(state_backend.touch_job, job_id):
+                    return
+            except Exception as e:
+                logger.warning("Job %s heartbeat failed: %s", job_id, e)
+
+    async def _record_job(self, job_id: Optional[str], status: str, error: Optional[str] = None):
+        """
+        Update a job record in the state backend.
+
+        Args:
+            job_id: ID of the job record, None without a state backend
+            status: New job status
+            error: Failure description
+        """
+        if job_id is None:
+            return
+        try:
+            await asyncio.to_thread(state_backend.update_job, job_id, status, INSTANCE_ID, error)
+        except Exception as e:
+            logger.warning("Job %s status update to %s failed: %s", job_id, status, e)
+
+    def _speculate(self, session: Session, grid_size: Tuple[int, int], padding: int):
+        """
+        Start cropping the photo for the grid and padding the user is likely to pick.
+
+        Args:
+            session: Session of the user
+            grid_size: Tuple of (columns, rows)
+            padding: Padding value (1-5)
+        """
+        cache_key = self._cache_key(session.file_unique_id, grid_size, padding, session.skip_blank)
+        workspace = workspace_manager.get(session.workspace_id)
+        if cache_key is None or workspace is None:
+            return
+
+        source = workspace.image_data or workspace.image_path
+
+        speculator.speculate(session.user_id, cache_key, lambda: self._precompute(cache_key, source))
+
+    async def _precompute(self, cache_key: CacheKey, source: ImageSource) -> List[bytes]:
+        """
+        Crop a photo ahead of the user's final choice.
+
+        Args:
+            cache_key: Identity of the crop result
+            source: Downloaded photo bytes or path
+
+        Returns:
+            List of PNG-encoded tiles
+        """
+        if result_cache.enabled:
+            cached = await asyncio.to_thread(result_cache.get, cache_key)
+            if cached:
+                return cached
+
+        with stage_seconds.time("speculative_crop"):
+            tiles = await self._crop_bytes(
+                source,
+                cache_key.grid_size,
+                cache_key.padding,
+                cache_key.file_unique_id,
+                cache_key.skip_blank,
+                wait_running=True
+            )
+
+        if result_cache.enabled:
+            await asyncio.to_thread(result_cache.put, cache_key, tiles)
+        return tiles
+
+    async def _stream_tiles(
+        self,
+        user_id: int,
+        source: ImageSource,
+        grid_size: Tuple[int, int],
+        padding: int,
+        image_key: Optional[str],
+        skip_blank: bool,
+        cache_key: Optional[CacheKey]
+    ) -> AsyncIterator[bytes]:
+        """
+        Crop a photo in the CPU executor and yield tiles as they are encoded.
+
+        Once the last tile arrived, all tiles are put into the result cache.
+
+        Args:
+            user_id: Telegram user ID
+            source: Downloaded photo bytes or path
+            grid_size: Tuple of (columns, rows)
+            padding: Padding value (1-5)
+            image_key: Photo identity for reusing the decoded image
+            skip_blank: Leave out uniform and fully transparent tiles
+            cache_key: Identity of the crop result, None if the photo is unknown
+
+        Yields:
+            PNG-encoded tiles in row-major order
+        """
+        tiles = []
+        start = time.perf_counter()
+        stream = cpu_executor.stream(
+            self.processor.iter_encoded_tiles,
+            source,
+            grid_size,
+            padding,
+            image_key,
+            skip_blank,
+            buffer_size=settings.STREAM_BUFFER_TILES,
+            key=image_key
+        )
+        async with aclosing(stream):
+            async for tile in stream:
+                tiles.append(tile)
+                yield tile
+
+        stage_seconds.observe(time.perf_counter() - start, "crop")
+        tiles_total.inc(amount=len(tiles))
+        logger.info("User %s streamed %s emoji tiles", user_id, len(tiles))
+        if cache_key and result_cache.enabled:
+            await asyncio.to_thread(result_cache.put, cache_key, tiles)
+
+    async def _crop_bytes(
+        self,
+        source: ImageSource,
+        grid_size: Tuple[int, int],
+        padding: int,
+        image_key: Optional[str],
+        skip_blank: bool = False,
+        wait_running: bool = False
+    ) -> List[bytes]:
+        """
+        Crop a photo into PNG tiles on an image worker or the CPU executor.
+
+        Args:
+            source: Downloaded photo bytes or path
+            grid_size: Tuple of (columns, rows)
+            padding: Padding value (1-5)
+            image_key: Photo identity for reusing the decoded image
+            skip_blank: Leave out uniform and fully transparent tiles
+            wait_running: When cancelled, return only once the crop that
+                already runs on a worker has finished
+
+        Returns:
+            List of PNG-encoded tiles
+        """
+        if crop_queue.enabled:
+            return await crop_queue.crop(
+                self.processor,
+                source,
+                grid_size,
+                padding,
+                image_key,
+                skip_blank,
+                wait_running=wait_running
+            )
+
+        return await cpu_executor.run(
+            self.processor.crop_to_grid_bytes,
+            source,
+            grid_size,
+            padding,
+            image_key,
+            skip_blank,
+            wait_running=wait_running,
+            key=image_key
+        )
+
+    async def _crop_photo(
+        self,
+        workspace: Workspace,
+        image_key: str,
+        grid_size: Tuple[int, int],
+        padding: int,
+        skip_blank: bool,
+        with_stickers: bool
+    ) -> Tuple[List[bytes], Optional[List[bytes]]]:
+        """
+        Crop one photo of a media group, reusing cached tiles.
+
+        Args:
+            workspace: Workspace holding the photo
+            image_key: Telegram file_unique_id of the photo
+            grid_size: Tuple of (columns, rows)
+            padding: Padding value (1-5)
+            skip_blank: Leave out uniform and fully transparent tiles
+            with_stickers: Also crop regular sticker tiles
+
+        Returns:
+            Tuple of (emoji tiles, sticker tiles or None)
+        """
+        source = workspace.image_data or workspace.image_path
+        cache_key = self._cache_key(image_key, grid_size, padding, skip_blank)
+        if with_stickers:
+            return await self._crop_with_stickers(source, grid_size, padding, skip_blank, cache_key, image_key)
+
+        if cache_key and result_cache.enabled:
+            tiles = await asyncio.to_thread(result_cache.get, cache_key)
+            cache_requests_total.inc("hit" if tiles else "miss")
+            if tiles:
+                return tiles, None
+
+        tiles = await self._crop_bytes(source, grid_size, padding, image_key, skip_blank)
+        if cache_key and result_cache.enabled:
+            await asyncio.to_thread(result_cache.put, cache_key, tiles)
+        return tiles, None
+
+    async def _crop_with_stickers(
+        self,
+        source: ImageSource,
+        grid_size: Tuple[int, int],
+        padding: int,
+        skip_blank: bool,
+        cache_key: Optional[CacheKey],
+        image_key: Optional[str]
+    ) -> Tuple[List[bytes], List[bytes]]:
+        """
+        Crop a photo into custom emoji and regular sticker tiles from one decode.
+
+        Both tile sets are looked up in and stored to the result cache
+        under their own tile size.
+
+        Args:
+            source: Downloaded photo bytes or path
+            grid_size: Tuple of (columns, rows)
+            padding: Padding value (1-5)
+            skip_blank: Leave out uniform and fully transparent tiles
+            cache_key: Identity of the emoji crop result, None if the photo is unknown
+            image_key: Photo identity for reusing the decoded image
+
+        Returns:
+            Tuple of (emoji tiles, sticker tiles)
+        """
+        sizes = (self.processor.emoji_size, STICKER_SIZE)
+        keys = (cache_key, cache_key._replace(emoji_size=STICKER_SIZE)) if cache_key else ()
+
+        if keys and result_cache.enabled:
+            emoji_tiles, sticker_tiles = [await asyncio.to_thread(result_cache.get, key) for key in keys]
+            cache_requests_total.inc("hit" if emoji_tiles and sticker_tiles else "miss")
+            if emoji_tiles and sticker_tiles:
+                return emoji_tiles, sticker_tiles
+
+        if crop_queue.enabled:
+            levels = await crop_queue.crop_sizes(self.processor, source, grid_size, padding, sizes, image_key, skip_blank)
+        else:
+            levels = await cpu_executor.run(
+                self.processor.crop_to_grid_sizes,
+                source,
+                grid_size,
+                padding,
+                sizes,
+                image_key,
+                skip_blank,
+                key=image_key
+            )
+
+        if keys and result_cache.enabled:
+            for key, size in zip(keys, sizes):
+                await asyncio.to_thread(result_cache.put, key, levels[size])
+        return levels[sizes[0]], levels[sizes[1]]
+
+    def _cache_key(
+        self,
+        file_unique_id: Optional[str],
+        grid_size: Tuple[int, int],
+        padding: int,
+        skip_blank: bool = False
+    ) -> Optional[CacheKey]:
+        """
+        Build the identity of a crop result for a photo.
+
+        Args:
+            file_unique_id: Telegram file_unique_id of the photo
+            grid_size: Tuple of (columns, rows)
+            padding: Padding value (1-5)
+            skip_blank: Leave out uniform and fully transparent tiles
+
+        Returns:
+            CacheKey, or None if the photo is unknown
+        """
+        if not file_unique_id:
+            return None
+
+        return CacheKey(
+            file_unique_id=file_unique_id,
+            grid_size=tuple(grid_size),
+            padding=padding,
+            emoji_size=self.processor.emoji_size,
+            encode_profile=self.processor.encoder.profile.name,
+            skip_blank=skip_blank,
+            draft_oversample=self.processor.draft_oversample,
+            reducing_gap=self.processor.reducing_gap,
+            decode_max_pixels=self.processor.decode_max_pixels
+        )
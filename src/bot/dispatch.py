@@ -0,0 +1,176 @@
+"""Update dispatch with per-user ordering and cross-user concurrency."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Dict, Hashable, List, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from src.config.logger import get_logger
+from src.state.backend import INSTANCE_ID, StateBackend
+
+logger = get_logger()
+
+LEASE_RETRY_INTERVAL = 0.2
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """
+    Process updates of different users concurrently and of one user in order.
+
+    Each user has a lock that is held while one of their updates is being
+    handled, so their callbacks never race on the user's session. Updates
+    of different users run concurrently up to ``max_concurrent_updates``.
+    The user lock is taken before a global slot, so a user with a backlog
+    of updates occupies at most one slot. Locks are dropped as soon as a
+    user has no pending updates.
+
+    With a state backend, a user's update is also handled under a lease on
+    the user in the backend, so updates of one user routed to different
+    bot processes are still handled one at a time. The lease is renewed
+    every ``lease_ttl / 3`` seconds while the update runs, so a long
+    update keeps it.
+    """
+
+    def __init__(
+        self,
+        max_concurrent_updates: int,
+        backend: Optional[StateBackend] = None,
+        lease_ttl: float = 0
+    ):
+        """
+        Initialize update processor.
+
+        Args:
+            max_concurrent_updates: Global cap of updates handled at once
+            backend: Shared state backend holding user leases
+            lease_ttl: Seconds a lease of a crashed process blocks the user
+        """
+        super().__init__(max_concurrent_updates)
+        self.backend = backend
+        self.lease_ttl = lease_ttl
+        self._locks: Dict[Hashable, List[Any]] = {}
+        logger.info("PerUserUpdateProcessor initialized with max_concurrent_updates=%s, leases=%s", max_concurrent_updates, backend is not None)
+
+    @property
+    def active_users(self) -> int:
+        """Number of users with updates in flight or waiting."""
+        return len(self._locks)
+
+    async def process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        """
+        Process an update after its user's previous updates have finished.
+
+        Args:
+            update: The update to be processed
+            coroutine: The coroutine that handles the update
+        """
+        key = self._user_key(update)
+        if key is None:
+            await super().process_update(update, coroutine)
+            return
+
+        async with self.exclusive(key):
+            await super().process_update(update, coroutine)
+
+    @asynccontextmanager
+    async def exclusive(self, key: Hashable) -> AsyncIterator[None]:
+        """
+        Hold a user's lock, and lease with a state backend, like an update does.
+
+        Work a handler defers past its update, e.g. a completed media
+        group, runs under this so it never races the user's next update.
+
+        Args:
+            key: User id or other serialization key
+        """
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+
+        try:
+            async with entry[0]:
+                if self.backend is None or not isinstance(key, int):
+                    yield
+                    return
+
+                await self._acquire_lease(key)
+                heartbeat = asyncio.get_running_loop().create_task(self._renew_lease(key))
+                try:
+                    yield
+                finally:
+                    heartbeat.cancel()
+                    await asyncio.gather(heartbeat, return_exceptions=True)
+                    await asyncio.to_thread(self.backend.release_lease, key, INSTANCE_ID)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        """
+        Await the handler coroutine.
+
+        Args:
+            update: The update to be processed
+            coroutine: The coroutine that handles the update
+        """
+        await coroutine
+
+    async def initialize(self) -> None:
+        """Nothing to initialize."""
+
+    async def shutdown(self) -> None:
+        """Drop all user locks."""
+        self._locks.clear()
+
+    async def _acquire_lease(self, user_id: int):
+        """
+        Wait until this process holds the user's lease.
+
+        Args:
+            user_id: Telegram user ID
+        """
+        waited = False
+        while not await asyncio.to_thread(self.backend.acquire_lease, user_id, INSTANCE_ID, self.lease_ttl):
+            if not waited:
+                logger.debug("User %s is leased by another process, waiting", user_id)
+                waited = True
+            await asyncio.sleep(LEASE_RETRY_INTERVAL)
+
+    async def _renew_lease(self, user_id: int):
+        """
+        Keep a held lease from lapsing while the user's update runs.
+
+        Args:
+            user_id: Telegram user ID
+        """
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            try:
+                if not await asyncio.to_thread(self.backend.renew_lease, user_id, INSTANCE_ID, self.lease_ttl):
+                    logger.warning("User %s lease lapsed while an update was running", user_id)
+                    return
+            except Exception as e:
+                logger.warning("User %s lease renewal failed: %s", user_id, e)
+
+    @staticmethod
+    def _user_key(update: object) -> Optional[Hashable]:
+        """
+        Get the serialization key of an update.
+
+        Args:
+            update: The update to be processed
+
+        Returns:
+            User id, chat id as a fallback, or None for anonymous updates
+        """
+        if not isinstance(update, Update):
+            return None
+        if update.effective_user is not None:
+            return update.effective_user.id
+        if update.effective_chat is not None:
+            return ("chat", update.effective_chat.id)
+        return None
@@ -29,7 +29,7 @@ class BotHandlers:
             context: Context for the handler
         """
         user_id = update.effective_user.id if update.effective_user else "Unknown"
-        logger.info(f"User {user_id} executed /start command")
+        logger.info("User %s executed /start command", user_id)
         await self.start_command.handle(update, context)
 
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -41,7 +41,7 @@ class BotHandlers:
             context: Context for the handler
         """
         user_id = update.effective_user.id if update.effective_user else "Unknown"
-        logger.info(f"User {user_id} executed /help command")
+        logger.info("User %s executed /help command", user_id)
         await self.help_command.handle(update, context)
 
     async def emoji_cropper(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -53,7 +53,7 @@ class BotHandlers:
             context: Context for the handler
         """
         user_id = update.effective_user.id if update.effective_user else "Unknown"
-        logger.info(f"User {user_id} executed /emoji_cropper command")
+        logger.info("User %s executed /emoji_cropper command", user_id)
         await self.emoji_cropper_command.start(update, context)
 
     async def handle_photo(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -65,9 +65,21 @@ class BotHandlers:
             context: Context for the handler
         """
         user_id = update.effective_user.id if update.effective_user else "Unknown"
-        logger.info(f"User {user_id} uploaded a photo")
+        logger.info("User %s uploaded a photo", user_id)
         await self.emoji_cropper_command.handle_photo(update, context)
 
+    async def handle_document(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """
+        Handle incoming image files.
+
+        Args:
+            update: Telegram update object
+            context: Context for the handler
+        """
+        user_id = update.effective_user.id if update.effective_user else "Unknown"
+        logger.info("User %s uploaded an image file", user_id)
+        await self.emoji_cropper_command.handle_document(update, context)
+
     async def handle_command_callback(
         self,
         update: Update,
@@ -84,7 +96,7 @@ class BotHandlers:
         command = query.data.replace("cmd_", "")
         user_id = update.effective_user.id if update.effective_user else "Unknown"
 
-        logger.info(f"User {user_id} selected menu command: {command}")
+        logger.info("User %s selected menu command: %s", user_id, command)
 
         if command == "start":
             await self.start_command.handle_callback(update, context)
@@ -109,7 +121,7 @@ class BotHandlers:
         grid_size = query.data.replace("grid_", "")
         user_id = update.effective_user.id if update.effective_user else "Unknown"
 
-        logger.info(f"User {user_id} selected grid size: {grid_size}")
+        logger.info("User %s selected grid size: %s", user_id, grid_size)
         await self.emoji_cropper_command.handle_grid_selection(update, context)
 
     async def handle_padding_selection(
@@ -128,5 +140,39 @@ class BotHandlers:
         padding = query.data.replace("padding_", "")
         user_id = update.effective_user.id if update.effective_user else "Unknown"
 
-        logger.info(f"User {user_id} selected padding: {padding}")
+        logger.info("User %s selected padding: %s", user_id, padding)
         await self.emoji_cropper_command.handle_padding_selection(update, context)
+
+    async def handle_blank_toggle(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE
+    ):
+        """
+        Handle switching blank tile omission on or off.
+
+        Args:
+            update: Telegram update object
+            context: Context for the handler
+        """
+        user_id = update.effective_user.id if update.effective_user else "Unknown"
+
+        logger.info("User %s toggled blank tile omission", user_id)
+        await self.emoji_cropper_command.handle_blank_toggle(update, context)
+
+    async def handle_stickers_toggle(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE
+    ):
+        """
+        Handle switching the additional regular sticker pack on or off.
+
+        Args:
+            update: Telegram update object
+            context: Context for the handler
+        """
+        user_id = update.effective_user.id if update.effective_user else "Unknown"
+
+        logger.info("User %s toggled the regular sticker pack", user_id)
+        await self.emoji_cropper_command.handle_stickers_toggle(update, context)
@@ -67,12 +67,21 @@ class KeyboardBuilder:
         return InlineKeyboardMarkup(keyboard)
 
     @staticmethod
-    def build_padding_selection() -> InlineKeyboardMarkup:
+    def build_padding_selection(
+        skip_blank: bool = False,
+        with_stickers: bool = False,
+        stickers_available: bool = True
+    ) -> InlineKeyboardMarkup:
         """
         Build keyboard for padding selection.
 
+        Args:
+            skip_blank: Whether blank tiles are currently left out
+            with_stickers: Whether a regular sticker pack is created as well
+            stickers_available: Whether the tiles fit into a regular sticker pack
+
         Returns:
-            InlineKeyboardMarkup with padding options
+            InlineKeyboardMarkup with padding options and the option toggles
         """
         keyboard = [
             [InlineKeyboardButton("1 - Минимальный", callback_data="padding_1")],
@@ -80,6 +89,15 @@ class KeyboardBuilder:
             [InlineKeyboardButton("3 - Средний", callback_data="padding_3")],
             [InlineKeyboardButton("4 - Большой", callback_data="padding_4")],
             [InlineKeyboardButton("5 - Максимальный", callback_data="padding_5")],
+            [InlineKeyboardButton(
+                strings.SKIP_BLANK_ON if skip_blank else strings.SKIP_BLANK_OFF,
+                callback_data="blank_toggle"
+            )],
         ]
+        if stickers_available:
+            keyboard.append([InlineKeyboardButton(
+                strings.WITH_STICKERS_ON if with_stickers else strings.WITH_STICKERS_OFF,
+                callback_data="stickers_toggle"
+            )])
 
         return InlineKeyboardMarkup(keyboard)
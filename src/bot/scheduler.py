@@ -0,0 +1,312 @@
+"""Fair job scheduler for heavy crop and upload jobs."""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set
+
+from src.config import settings
+from src.config.logger import get_logger
+from src.config.metrics import jobs_in_flight, jobs_queued, stage_seconds
+
+logger = get_logger()
+
+PositionCallback = Callable[[int], Awaitable[Any]]
+
+
+class JobRejected(Exception):
+    """Raised when the scheduler cannot accept another job."""
+
+
+class Job:
+    """A queued unit of work owned by a user."""
+
+    __slots__ = ("user_id", "run", "on_position", "enqueued_at", "started_at", "last_position", "report", "task")
+
+    def __init__(
+        self,
+        user_id: int,
+        run: Callable[[], Awaitable[Any]],
+        on_position: Optional[PositionCallback] = None
+    ):
+        """
+        Initialize job.
+
+        Args:
+            user_id: Telegram user ID owning the job
+            run: Factory returning the coroutine that performs the job
+            on_position: Callback receiving the 1-based queue position
+        """
+        self.user_id = user_id
+        self.run = run
+        self.on_position = on_position
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.last_position: Optional[int] = None
+        self.report: Optional[asyncio.Task] = None
+        self.task: Optional[asyncio.Task] = None
+
+
+class JobScheduler:
+    """
+    Run jobs with a global in-flight limit and per-user fairness.
+
+    Every user has their own FIFO queue. At most one job per user runs at a
+    time, and free slots are handed out round-robin across users with
+    pending jobs, so one user's burst cannot starve everybody else.
+
+    Queue positions are reported one at a time per job, and a job only
+    starts once its last report is done, so a late position update never
+    overwrites the status messages of the running job.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_queue: int,
+        position_update_interval: float
+    ):
+        """
+        Initialize job scheduler.
+
+        Args:
+            max_in_flight: Maximum number of jobs running at once
+            max_queue: Maximum number of queued jobs before rejecting
+            position_update_interval: Minimum seconds between position updates
+        """
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.position_update_interval = position_update_interval
+
+        self._queues: "OrderedDict[int, Deque[Job]]" = OrderedDict()
+        self._running: Dict[int, Job] = {}
+        self._queued = 0
+        self._notifier: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+        logger.info("JobScheduler initialized with max_in_flight=%s, max_queue=%s", max_in_flight, max_queue)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of jobs waiting to start."""
+        return self._queued
+
+    @property
+    def in_flight(self) -> int:
+        """Number of jobs currently running."""
+        return len(self._running)
+
+    def start(self):
+        """Start the position notifier."""
+        if self._notifier is None:
+            self._notifier = asyncio.get_running_loop().create_task(self._notify_positions())
+
+    async def shutdown(self):
+        """Cancel the notifier, queued and running jobs."""
+        if self._notifier is not None:
+            self._notifier.cancel()
+            self._notifier = None
+
+        self._queues.clear()
+        self._queued = 0
+
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        logger.info("JobScheduler shut down")
+
+    def submit(
+        self,
+        user_id: int,
+        run: Callable[[], Awaitable[Any]],
+        on_position: Optional[PositionCallback] = None
+    ) -> int:
+        """
+        Queue a job.
+
+        Args:
+            user_id: Telegram user ID owning the job
+            run: Factory returning the coroutine that performs the job
+            on_position: Callback receiving the queue position while waiting,
+                starting with the initial one
+
+        Returns:
+            Initial queue position, 0 if the job started immediately
+
+        Raises:
+            JobRejected: If the queue is full
+        """
+        job = Job(user_id, run, on_position)
+        self._queues.setdefault(user_id, deque()).append(job)
+        self._queued += 1
+
+        self._dispatch()
+
+        if job.started_at is None and self._queued > self.max_queue:
+            self._remove(job)
+            self.rejected += 1
+            logger.warning("User %s job rejected, queue is full (%s/%s)", user_id, self._queued, self.max_queue)
+            raise JobRejected("Job queue is full")
+
+        self.submitted += 1
+        position = self.position(job)
+        self._report_position(job, position)
+        logger.info("User %s job submitted, position %s, queue depth %s, in flight %s", user_id, position, self._queued, self.in_flight)
+        return position
+
+    def position(self, job: Job) -> int:
+        """
+        Estimate how many jobs will start before the given job, plus one.
+
+        Args:
+            job: Queued job
+
+        Returns:
+            1-based queue position, 0 if the job is not queued
+        """
+        queue = self._queues.get(job.user_id)
+        if not queue or job not in queue:
+            return 0
+
+        index = queue.index(job)
+        ahead = index
+        before_owner = True
+        for user_id, other in self._queues.items():
+            if user_id == job.user_id:
+                before_owner = False
+                continue
+            ahead += min(len(other), index + 1 if before_owner else index)
+        return ahead + 1
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get scheduler statistics.
+
+        Returns:
+            Dictionary with queue depth, in-flight count and wait times
+        """
+        started = self.completed + self.failed + self.in_flight
+        return {
+            "queue_depth": self._queued,
+            "in_flight": self.in_flight,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait": self.total_wait / started if started else 0.0,
+            "max_wait": self.max_wait,
+        }
+
+    def _remove(self, job: Job):
+        """Remove a queued job."""
+        queue = self._queues[job.user_id]
+        queue.remove(job)
+        if not queue:
+            del self._queues[job.user_id]
+        self._queued -= 1
+
+    def _dispatch(self):
+        """Start queued jobs while there are free slots."""
+        while len(self._running) < self.max_in_flight:
+            job = self._next_job()
+            if job is None:
+                return
+            self._start(job)
+
+    def _next_job(self) -> Optional[Job]:
+        """Pop the next job in round-robin order, skipping busy users."""
+        for user_id in list(self._queues):
+            if user_id in self._running:
+                continue
+
+            queue = self._queues.pop(user_id)
+            job = queue.popleft()
+            if queue:
+                self._queues[user_id] = queue
+            self._queued -= 1
+            return job
+        return None
+
+    def _start(self, job: Job):
+        """Run a job in a task."""
+        job.started_at = time.monotonic()
+        wait = job.started_at - job.enqueued_at
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        stage_seconds.observe(wait, "queue_wait")
+
+        self._running[job.user_id] = job
+        job.task = asyncio.get_running_loop().create_task(self._run(job))
+        self._tasks.add(job.task)
+        job.task.add_done_callback(self._tasks.discard)
+        logger.info("User %s job started after waiting %.2fs", job.user_id, wait)
+
+    async def _run(self, job: Job):
+        """Run a job once its last position report is done, then release its slot."""
+        try:
+            if job.report is not None:
+                await asyncio.gather(job.report, return_exceptions=True)
+            await job.run()
+            self.completed += 1
+        except asyncio.CancelledError:
+            self.failed += 1
+            raise
+        except Exception as e:
+            self.failed += 1
+            logger.error("User %s job failed: %s", job.user_id, e, exc_info=True)
+        finally:
+            self._running.pop(job.user_id, None)
+            logger.info("User %s job finished in %.2fs", job.user_id, time.monotonic() - job.started_at)
+            self._dispatch()
+
+    async def _notify_positions(self):
+        """Periodically report changed queue positions to waiting users."""
+        while True:
+            await asyncio.sleep(self.position_update_interval)
+
+            for queue in list(self._queues.values()):
+                for job in list(queue):
+                    self._report_position(job, self.position(job))
+
+    def _report_position(self, job: Job, position: int):
+        """
+        Report a changed queue position unless a report of the job is still in flight.
+
+        Args:
+            job: Queued job
+            position: Current 1-based queue position, 0 if not queued
+        """
+        if not job.on_position or not position or position == job.last_position:
+            return
+        if job.report is not None and not job.report.done():
+            return
+
+        job.last_position = position
+        job.report = asyncio.get_running_loop().create_task(self._send_position(job, position))
+        self._tasks.add(job.report)
+        job.report.add_done_callback(self._tasks.discard)
+
+    async def _send_position(self, job: Job, position: int):
+        """Call the position callback of a job."""
+        try:
+            await job.on_position(position)
+        except Exception as e:
+            logger.warning("User %s queue position update failed: %s", job.user_id, e)
+
+
+job_scheduler = JobScheduler(
+    settings.MAX_IN_FLIGHT_JOBS,
+    settings.MAX_QUEUED_JOBS,
+    settings.QUEUE_POSITION_UPDATE_INTERVAL
+)
+
+jobs_in_flight.set_function(lambda: job_scheduler.in_flight)
+jobs_queued.set_function(lambda: job_scheduler.queue_depth)
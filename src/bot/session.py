@@ -0,0 +1,353 @@
+"""Bounded store of per-user conversation state."""
+
+import asyncio
+import sys
+import time
+from collections import OrderedDict
+from itertools import islice
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.config import settings
+from src.config.logger import get_logger
+from src.config.metrics import session_bytes, sessions_active
+from src.bot.speculation import speculator
+from src.bot.workspace import workspace_manager
+from src.state.backend import StateBackend, state_backend
+
+logger = get_logger()
+
+FOOTPRINT_SAMPLE = 64
+
+
+class Session:
+    """State of one user's emoji cropper conversation."""
+
+    __slots__ = (
+        "user_id",
+        "file_id",
+        "file_unique_id",
+        "workspace_id",
+        "batch_files",
+        "batch_workspace_ids",
+        "suggested_grids",
+        "grid_size",
+        "skip_blank",
+        "with_stickers",
+        "last_used",
+    )
+
+    def __init__(self, user_id: int):
+        """
+        Initialize session.
+
+        Args:
+            user_id: Telegram user ID
+        """
+        self.user_id = user_id
+        self.file_id: Optional[str] = None
+        self.file_unique_id: Optional[str] = None
+        self.workspace_id: Optional[str] = None
+        self.batch_files: Tuple[Tuple[str, str], ...] = ()
+        self.batch_workspace_ids: Tuple[str, ...] = ()
+        self.suggested_grids: Tuple[Tuple[int, int], ...] = ()
+        self.grid_size: Optional[Tuple[int, int]] = None
+        self.skip_blank = False
+        self.with_stickers = False
+        self.last_used = time.monotonic()
+
+    def footprint(self) -> int:
+        """
+        Estimate the memory held by the session.
+
+        Returns:
+            Size of the record and the objects it owns in bytes
+        """
+        size = sys.getsizeof(self)
+        for value in (self.file_id, self.file_unique_id, self.workspace_id, self.grid_size):
+            if value is not None:
+                size += sys.getsizeof(value)
+        size += sys.getsizeof(self.batch_files) + sys.getsizeof(self.batch_workspace_ids)
+        size += sum(sys.getsizeof(file_id) + sys.getsizeof(unique_id) for file_id, unique_id in self.batch_files)
+        size += sum(sys.getsizeof(workspace_id) for workspace_id in self.batch_workspace_ids)
+        size += sys.getsizeof(self.suggested_grids)
+        size += sum(sys.getsizeof(grid) for grid in self.suggested_grids)
+        return size
+
+    @property
+    def photo_count(self) -> int:
+        """Number of photos the pack is made of."""
+        return len(self.batch_files) or 1
+
+    def release_batch(self):
+        """Release the workspaces of a media group and forget its photos."""
+        for workspace_id in self.batch_workspace_ids:
+            workspace_manager.release(workspace_id)
+        self.batch_files = ()
+        self.batch_workspace_ids = ()
+
+    def to_state(self) -> Dict[str, Any]:
+        """
+        Get the fields shared with other processes.
+
+        The workspaces stay local to the process that downloaded the
+        photos; another process downloads them again by ``file_id``.
+
+        Returns:
+            JSON-serializable session fields
+        """
+        return {
+            "file_id": self.file_id,
+            "file_unique_id": self.file_unique_id,
+            "batch_files": [list(photo) for photo in self.batch_files],
+            "suggested_grids": [list(grid) for grid in self.suggested_grids],
+            "grid_size": list(self.grid_size) if self.grid_size else None,
+            "skip_blank": self.skip_blank,
+            "with_stickers": self.with_stickers,
+        }
+
+    def apply_state(self, data: Dict[str, Any]):
+        """
+        Overwrite the shared fields with stored ones.
+
+        Local workspaces holding different photos are released.
+
+        Args:
+            data: Session fields from ``to_state``
+        """
+        if data.get("file_unique_id") != self.file_unique_id:
+            workspace_manager.release(self.workspace_id)
+            self.workspace_id = None
+        batch_files = tuple(tuple(photo) for photo in data.get("batch_files", ()))
+        if batch_files != self.batch_files:
+            self.release_batch()
+            self.batch_files = batch_files
+        self.file_id = data.get("file_id")
+        self.file_unique_id = data.get("file_unique_id")
+        self.suggested_grids = tuple(tuple(grid) for grid in data.get("suggested_grids", ()))
+        grid_size = data.get("grid_size")
+        self.grid_size = tuple(grid_size) if grid_size else None
+        self.skip_blank = data.get("skip_blank", False)
+        self.with_stickers = data.get("with_stickers", False)
+
+
+class SessionStore:
+    """
+    LRU store of sessions keyed by user ID with idle expiry.
+
+    Sessions are kept in least recently used order, so expiry only looks
+    at the front of the store and every lookup stays O(1). At most
+    ``max_sessions`` sessions are kept; the least recently used one is
+    evicted to make room. Expired and evicted sessions are passed to
+    ``on_evict`` so resources they reference can be released. Lookups
+    expire idle sessions, and a background sweeper expires them while no
+    lookups happen.
+
+    With a state backend the store is a write-through cache: ``load``
+    refreshes a session from the backend, so a conversation survives a
+    restart and can move between processes, and ``save`` writes it back.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int,
+        ttl: float,
+        on_evict: Optional[Callable[[Session], None]] = None,
+        backend: Optional[StateBackend] = None,
+        sweep_interval: float = 60
+    ):
+        """
+        Initialize session store.
+
+        Args:
+            max_sessions: Maximum number of sessions kept
+            ttl: Seconds an idle session is kept
+            on_evict: Called with every expired or evicted session
+            backend: Shared state backend, None to keep sessions in memory only
+            sweep_interval: Seconds between sweeps
+        """
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.backend = backend
+        self.sweep_interval = sweep_interval
+
+        self.expired = 0
+        self.evicted = 0
+
+        self._sessions: "OrderedDict[int, Session]" = OrderedDict()
+        self._sweeper: Optional[asyncio.Task] = None
+
+        logger.info("SessionStore initialized with max_sessions=%s, ttl=%s, backend=%s", max_sessions, ttl, type(backend).__name__ if backend else None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def start(self):
+        """Start the sweeper."""
+        if self._sweeper is None:
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_periodically())
+
+    async def shutdown(self):
+        """Stop the sweeper."""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+        logger.info("SessionStore shut down")
+
+    def get(self, user_id: int) -> Optional[Session]:
+        """
+        Look up a user's session and mark it as used.
+
+        Args:
+            user_id: Telegram user ID
+
+        Returns:
+            Session, or None if the user has none or it expired
+        """
+        now = time.monotonic()
+        self._expire(now)
+
+        session = self._sessions.get(user_id)
+        if session is None:
+            return None
+
+        session.last_used = now
+        self._sessions.move_to_end(user_id)
+        return session
+
+    def open(self, user_id: int) -> Session:
+        """
+        Get a user's session, creating it if needed.
+
+        Args:
+            user_id: Telegram user ID
+
+        Returns:
+            Session of the user
+        """
+        session = self.get(user_id)
+        if session is not None:
+            return session
+
+        session = self._sessions[user_id] = Session(user_id)
+        while len(self._sessions) > self.max_sessions:
+            _, oldest = self._sessions.popitem(last=False)
+            logger.debug("User %s session evicted, store is full", oldest.user_id)
+            self.evicted += 1
+            self._evict(oldest)
+        return session
+
+    async def load(self, user_id: int, create: bool = False) -> Optional[Session]:
+        """
+        Look up a user's session, refreshing it from the state backend.
+
+        Args:
+            user_id: Telegram user ID
+            create: Create the session if the user has none
+
+        Returns:
+            Session, or None if the user has none and ``create`` is False
+        """
+        data = None
+        if self.backend is not None:
+            data = await asyncio.to_thread(self.backend.load_session, user_id)
+
+        if data is None:
+            return self.open(user_id) if create else self.get(user_id)
+
+        session = self.open(user_id)
+        session.apply_state(data)
+        return session
+
+    async def save(self, session: Session):
+        """
+        Write a session to the state backend.
+
+        Args:
+            session: Session of the user
+        """
+        if self.backend is None:
+            return
+        await asyncio.to_thread(self.backend.save_session, session.user_id, session.to_state(), self.ttl)
+
+    def discard(self, user_id: int):
+        """
+        Drop a user's session without calling ``on_evict``.
+
+        Args:
+            user_id: Telegram user ID
+        """
+        self._sessions.pop(user_id, None)
+
+    def sweep(self):
+        """Drop sessions idle for longer than the TTL."""
+        self._expire(time.monotonic())
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get session counters and an estimate of the memory they use.
+
+        The footprint is averaged over the most recently used sessions so
+        the estimate costs the same for any number of sessions.
+
+        Returns:
+            Dictionary of session count, footprint and removal counters
+        """
+        recent = list(islice(reversed(self._sessions.values()), FOOTPRINT_SAMPLE))
+        per_session = sum(session.footprint() for session in recent) // len(recent) if recent else 0
+        return {
+            "sessions": len(self._sessions),
+            "bytes_per_session": per_session,
+            "bytes": per_session * len(self._sessions),
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+    def _expire(self, now: float):
+        """Drop sessions idle for longer than the TTL, oldest first."""
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_used <= self.ttl:
+                break
+            del self._sessions[oldest.user_id]
+            logger.debug("User %s session expired after %.0fs idle", oldest.user_id, now - oldest.last_used)
+            self.expired += 1
+            self._evict(oldest)
+
+    async def _sweep_periodically(self):
+        """Run sweeps until cancelled."""
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error("Session sweep failed: %s", e, exc_info=True)
+
+    def _evict(self, session: Session):
+        """Hand a removed session to the eviction callback."""
+        if self.on_evict is None:
+            return
+        try:
+            self.on_evict(session)
+        except Exception as e:
+            logger.error("User %s session cleanup failed: %s", session.user_id, e, exc_info=True)
+
+
+def _release_session(session: Session):
+    """Release the workspaces and speculation of a dropped session."""
+    speculator.cancel(session.user_id)
+    workspace_manager.release(session.workspace_id)
+    session.release_batch()
+
+
+session_store = SessionStore(
+    settings.SESSION_MAX_ENTRIES,
+    settings.SESSION_TTL,
+    _release_session,
+    state_backend,
+    settings.SESSION_SWEEP_INTERVAL
+)
+
+sessions_active.set_function(lambda: len(session_store))
+session_bytes.set_function(lambda: session_store.stats()["bytes"])
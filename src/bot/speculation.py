@@ -0,0 +1,225 @@
+"""Speculative tile precomputation while users pick grid and padding."""
+
+import asyncio
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from src.config import settings
+from src.config.logger import get_logger
+from src.config.metrics import speculations_total
+from src.bot.scheduler import job_scheduler
+
+logger = get_logger()
+
+DEFAULT_PADDING = 2
+
+
+class Speculation:
+    """A background computation for the choice a user is expected to make."""
+
+    __slots__ = ("key", "task", "started")
+
+    def __init__(self, key: Hashable):
+        """
+        Initialize speculation.
+
+        Args:
+            key: Identity of the result being computed
+        """
+        self.key = key
+        self.task: Optional[asyncio.Task] = None
+        self.started = False
+
+
+class Speculator:
+    """
+    Run at most one speculative job per user under a global CPU budget.
+
+    A new speculation for a user cancels the previous one. Speculation only
+    starts while the job scheduler has idle slots, and at most ``max_jobs``
+    speculative jobs run at once, so confirmed jobs are never queued behind
+    guesses. A cancelled speculation keeps its slot until the crop already
+    running on a worker has finished, so stale guesses never occupy more
+    than ``max_jobs`` workers. Results that nobody claims are dropped after
+    ``ttl`` seconds.
+    """
+
+    def __init__(self, max_jobs: int, ttl: float):
+        """
+        Initialize speculator.
+
+        Args:
+            max_jobs: Maximum number of concurrent speculative jobs, 0 disables speculation
+            ttl: Seconds an unclaimed speculation is kept after it finished
+        """
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+
+        self._semaphore = asyncio.Semaphore(max(1, max_jobs))
+        self._speculations: Dict[int, Speculation] = {}
+        self._grid_choices: Counter = Counter()
+        self._padding_choices: Counter = Counter()
+
+        logger.info("Speculator initialized with max_jobs=%s, ttl=%s", max_jobs, ttl)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether speculation is enabled."""
+        return self.max_jobs > 0
+
+    def likely_grid(self, grid_sizes: List[Tuple[int, int]]) -> Tuple[int, int]:
+        """
+        Guess which of the suggested grids the user will pick.
+
+        Args:
+            grid_sizes: Suggested grid sizes in keyboard order
+
+        Returns:
+            Grid size at the most frequently chosen keyboard position
+        """
+        for index, _ in self._grid_choices.most_common():
+            if index < len(grid_sizes):
+                return grid_sizes[index]
+        return grid_sizes[0]
+
+    def likely_padding(self) -> int:
+        """
+        Guess which padding the user will pick.
+
+        Returns:
+            Most frequently chosen padding
+        """
+        if not self._padding_choices:
+            return DEFAULT_PADDING
+        return self._padding_choices.most_common(1)[0][0]
+
+    def record_choice(self, grid_index: Optional[int] = None, padding: Optional[int] = None):
+        """
+        Record a user's choice to improve later guesses.
+
+        Args:
+            grid_index: Keyboard position of the chosen grid
+            padding: Chosen padding
+        """
+        if grid_index is not None:
+            self._grid_choices[grid_index] += 1
+        if padding is not None:
+            self._padding_choices[padding] += 1
+
+    def speculate(self, user_id: int, key: Hashable, run: Callable[[], Awaitable[Any]]) -> bool:
+        """
+        Start computing a result in the background.
+
+        Args:
+            user_id: Telegram user ID
+            key: Identity of the result
+            run: Factory returning the coroutine that computes the result;
+                when cancelled, it returns only once its worker is free
+
+        Returns:
+            True if a speculation for the key is running or finished
+        """
+        current = self._speculations.get(user_id)
+        if current is not None and current.key == key:
+            return True
+
+        self.cancel(user_id)
+        if not self.enabled:
+            return False
+
+        if job_scheduler.queue_depth or job_scheduler.in_flight >= job_scheduler.max_in_flight:
+            logger.debug("User %s speculation skipped, scheduler is busy", user_id)
+            speculations_total.inc("skipped")
+            return False
+
+        speculation = Speculation(key)
+        speculation.task = asyncio.get_running_loop().create_task(self._run(user_id, speculation, run))
+        speculation.task.add_done_callback(self._finished)
+        self._speculations[user_id] = speculation
+        speculations_total.inc("started")
+        logger.debug("User %s speculation started: %s", user_id, key)
+        return True
+
+    def claim(self, user_id: int, key: Hashable) -> Optional[asyncio.Task]:
+        """
+        Take over the user's speculation if it computes the requested result.
+
+        A speculation for another key, or one still waiting for budget, is
+        cancelled so the confirmed job can run right away.
+
+        Args:
+            user_id: Telegram user ID
+            key: Identity of the result the user asked for
+
+        Returns:
+            Task resolving to the result, or None
+        """
+        speculation = self._speculations.pop(user_id, None)
+        if speculation is None:
+            return None
+
+        if speculation.key != key or not speculation.started:
+            self._cancel(speculation)
+            return None
+
+        speculations_total.inc("claimed")
+        logger.info("User %s claimed speculative result: %s", user_id, key)
+        return speculation.task
+
+    def cancel(self, user_id: int):
+        """
+        Cancel the user's speculation.
+
+        Args:
+            user_id: Telegram user ID
+        """
+        speculation = self._speculations.pop(user_id, None)
+        if speculation is not None:
+            self._cancel(speculation)
+
+    async def shutdown(self):
+        """Cancel all speculations."""
+        tasks = [speculation.task for speculation in self._speculations.values()]
+        for user_id in list(self._speculations):
+            self.cancel(user_id)
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        logger.info("Speculator shut down")
+
+    async def _run(self, user_id: int, speculation: Speculation, run: Callable[[], Awaitable[Any]]) -> Any:
+        """Run a speculation within the budget and expire it when unclaimed."""
+        try:
+            async with self._semaphore:
+                if job_scheduler.queue_depth or job_scheduler.in_flight >= job_scheduler.max_in_flight:
+                    logger.debug("User %s speculation dropped, scheduler became busy", user_id)
+                    speculations_total.inc("skipped")
+                    return None
+                speculation.started = True
+                return await run()
+        finally:
+            asyncio.get_running_loop().call_later(self.ttl, self._expire, user_id, speculation)
+
+    def _expire(self, user_id: int, speculation: Speculation):
+        """Drop a finished speculation nobody claimed."""
+        if self._speculations.get(user_id) is speculation:
+            del self._speculations[user_id]
+            speculations_total.inc("expired")
+
+    @staticmethod
+    def _cancel(speculation: Speculation):
+        """Cancel a speculation that is no longer wanted."""
+        if not speculation.task.done():
+            speculation.task.cancel()
+        speculations_total.inc("wasted")
+
+    @staticmethod
+    def _finished(task: asyncio.Task):
+        """Retrieve the outcome of a speculation so failures are logged once."""
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            logger.warning("Speculation failed: %s", error)
+
+
+speculator = Speculator(settings.SPECULATION_MAX_JOBS, settings.SPECULATION_TTL)
@@ -0,0 +1,337 @@
+"""Per-request workspaces with TTL sweeping and disk and memory budgets."""
+
+import asyncio
+import os
+import shutil
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from src.config import settings
+from src.config.logger import get_logger
+
+logger = get_logger()
+
+WORKSPACE_PREFIX = "ws_"
+TMPFS_DIR = "/dev/shm"
+
+
+class Workspace:
+    """Files and bytes belonging to one uploaded photo."""
+
+    __slots__ = ("id", "user_id", "path", "image_data", "disk_bytes", "created_at", "last_used", "pins", "released")
+
+    def __init__(self, user_id: int, path: Optional[str]):
+        """
+        Initialize workspace.
+
+        Args:
+            user_id: Telegram user ID owning the workspace
+            path: Directory of the workspace, None for a memory-only workspace
+        """
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.path = path
+        self.image_data: Optional[bytes] = None
+        self.disk_bytes = 0
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.pins = 0
+        self.released = False
+
+    @property
+    def image_path(self) -> Optional[str]:
+        """Path of the downloaded photo in a disk workspace."""
+        return os.path.join(self.path, "input.jpg") if self.path else None
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes held in memory."""
+        return len(self.image_data) if self.image_data is not None else 0
+
+
+class WorkspaceManager:
+    """
+    Create, track and expire per-request workspaces.
+
+    Every photo gets its own workspace, so two uploads of one user never
+    share files. Workspaces unused for ``ttl`` seconds are removed by a
+    background sweeper, and the least recently used ones are evicted when
+    the disk or memory budget is exceeded. Workspaces pinned by a running
+    job are never removed; releasing one defers the cleanup to the unpin.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        ttl: float,
+        max_disk_bytes: int,
+        max_memory_bytes: int,
+        sweep_interval: float
+    ):
+        """
+        Initialize workspace manager.
+
+        Args:
+            root: Directory holding the disk workspaces
+            ttl: Seconds an unused workspace is kept
+            max_disk_bytes: Disk budget over all workspaces
+            max_memory_bytes: Memory budget over all workspaces
+            sweep_interval: Seconds between sweeps
+        """
+        self.root = root
+        self.ttl = ttl
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.sweep_interval = sweep_interval
+
+        self.expired = 0
+        self.evicted = 0
+
+        self._workspaces: "OrderedDict[str, Workspace]" = OrderedDict()
+        self._disk_bytes = 0
+        self._memory_bytes = 0
+        self._sweeper: Optional[asyncio.Task] = None
+
+        logger.info("WorkspaceManager initialized with root=%s, ttl=%s, max_disk_bytes=%s, max_memory_bytes=%s", root, ttl, max_disk_bytes, max_memory_bytes)
+
+    def start(self):
+        """Remove workspaces left over by earlier runs and start the sweeper."""
+        self.cleanup_orphans()
+        if self._sweeper is None:
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_periodically())
+
+    async def shutdown(self):
+        """Stop the sweeper and remove all workspaces."""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+
+        for workspace in list(self._workspaces.values()):
+            self._remove(workspace)
+        logger.info("WorkspaceManager shut down")
+
+    def cleanup_orphans(self) -> int:
+        """
+        Delete abandoned workspace directories not tracked by this manager.
+
+        Other bot and worker processes may share the root, so only
+        directories unused for longer than the TTL are removed. Workspaces
+        in use are touched on every lookup and never look abandoned.
+
+        Returns:
+            Number of removed directories
+        """
+        if not os.path.isdir(self.root):
+            return 0
+
+        tracked = {workspace.path for workspace in self._workspaces.values()}
+        cutoff = time.time() - self.ttl
+        removed = 0
+        with os.scandir(self.root) as scanner:
+            for entry in scanner:
+                if not entry.name.startswith(WORKSPACE_PREFIX) or entry.path in tracked:
+                    continue
+                try:
+                    if not entry.is_dir() or entry.stat().st_mtime > cutoff:
+                        continue
+                except OSError:
+                    continue
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+
+        if removed:
+            logger.info("Removed %s orphaned workspaces from %s", removed, self.root)
+        return removed
+
+    def create(self, user_id: int, on_disk: bool) -> Workspace:
+        """
+        Create a workspace for a new photo.
+
+        Args:
+            user_id: Telegram user ID
+            on_disk: Whether the workspace needs a directory
+
+        Returns:
+            New workspace
+        """
+        workspace = Workspace(user_id, None)
+        if on_disk:
+            workspace.path = os.path.join(self.root, f"{WORKSPACE_PREFIX}{user_id}_{workspace.id}")
+            os.makedirs(workspace.path)
+
+        self._workspaces[workspace.id] = workspace
+        logger.debug("User %s created workspace %s", user_id, workspace.id)
+        return workspace
+
+    def get(self, workspace_id: Optional[str]) -> Optional[Workspace]:
+        """
+        Look up a live workspace and mark it as used.
+
+        Args:
+            workspace_id: Workspace id
+
+        Returns:
+            Workspace, or None if it expired, was evicted or released
+        """
+        workspace = self._workspaces.get(workspace_id) if workspace_id else None
+        if workspace is None or workspace.released:
+            return None
+
+        workspace.last_used = time.monotonic()
+        self._workspaces.move_to_end(workspace_id)
+        if workspace.path:
+            try:
+                os.utime(workspace.path)
+            except OSError:
+                pass
+        return workspace
+
+    def store_image(self, workspace: Workspace, data: bytes):
+        """
+        Keep downloaded photo bytes in a workspace.
+
+        Args:
+            workspace: Workspace
+            data: Photo bytes
+        """
+        self._memory_bytes += len(data) - workspace.memory_bytes
+        workspace.image_data = data
+        self._enforce_budgets()
+
+    def account_disk(self, workspace: Workspace):
+        """
+        Recount the disk usage of a workspace after files were written.
+
+        Args:
+            workspace: Workspace
+        """
+        if not workspace.path or workspace.released:
+            return
+
+        size = 0
+        for directory, _, files in os.walk(workspace.path):
+            for name in files:
+                try:
+                    size += os.path.getsize(os.path.join(directory, name))
+                except OSError:
+                    continue
+
+        self._disk_bytes += size - workspace.disk_bytes
+        workspace.disk_bytes = size
+        self._enforce_budgets()
+
+    def pin(self, workspace: Workspace):
+        """
+        Protect a workspace from expiry and eviction while a job needs it.
+
+        Args:
+            workspace: Workspace
+        """
+        workspace.pins += 1
+
+    def unpin(self, workspace: Workspace):
+        """
+        Drop a pin and remove the workspace if it was released meanwhile.
+
+        Args:
+            workspace: Workspace
+        """
+        workspace.pins -= 1
+        workspace.last_used = time.monotonic()
+        if workspace.released and not workspace.pins:
+            self._remove(workspace)
+
+    def release(self, workspace_id: Optional[str]):
+        """
+        Remove a workspace that is no longer needed.
+
+        Args:
+            workspace_id: Workspace id
+        """
+        workspace = self._workspaces.get(workspace_id) if workspace_id else None
+        if workspace is None:
+            return
+
+        workspace.released = True
+        if not workspace.pins:
+            self._remove(workspace)
+
+    def sweep(self):
+        """Expire idle workspaces, remove abandoned ones and evict down to the budgets."""
+        now = time.monotonic()
+        for workspace in list(self._workspaces.values()):
+            if not workspace.pins and now - workspace.last_used > self.ttl:
+                logger.info("User %s workspace %s expired after %.0fs idle", workspace.user_id, workspace.id, now - workspace.last_used)
+                self._remove(workspace)
+                self.expired += 1
+        self.cleanup_orphans()
+        self._enforce_budgets()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get workspace counters.
+
+        Returns:
+            Dictionary of workspace count, usage and removal counters
+        """
+        return {
+            "workspaces": len(self._workspaces),
+            "disk_bytes": self._disk_bytes,
+            "memory_bytes": self._memory_bytes,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+    def _enforce_budgets(self):
+        """Evict least recently used unpinned workspaces while over budget."""
+        for workspace in list(self._workspaces.values()):
+            if self._disk_bytes <= self.max_disk_bytes and self._memory_bytes <= self.max_memory_bytes:
+                return
+            if workspace.pins:
+                continue
+            logger.warning("User %s workspace %s evicted, usage: %s", workspace.user_id, workspace.id, self.stats())
+            self._remove(workspace)
+            self.evicted += 1
+
+    def _remove(self, workspace: Workspace):
+        """Delete a workspace and its files."""
+        self._workspaces.pop(workspace.id, None)
+        workspace.released = True
+
+        self._memory_bytes -= workspace.memory_bytes
+        workspace.image_data = None
+        self._disk_bytes -= workspace.disk_bytes
+        workspace.disk_bytes = 0
+
+        if workspace.path:
+            shutil.rmtree(workspace.path, ignore_errors=True)
+
+    async def _sweep_periodically(self):
+        """Run sweeps until cancelled."""
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error("Workspace sweep failed: %s", e, exc_info=True)
+
+
+def _workspace_root() -> str:
+    """Pick the workspace directory, preferring tmpfs when requested and available."""
+    if settings.WORKSPACE_DIR:
+        return settings.WORKSPACE_DIR
+    if settings.WORKSPACE_TMPFS and os.path.isdir(TMPFS_DIR):
+        return os.path.join(TMPFS_DIR, "emoji_workspaces")
+    return os.path.join(os.getcwd(), "temp")
+
+
+workspace_manager = WorkspaceManager(
+    _workspace_root(),
+    settings.WORKSPACE_TTL,
+    settings.WORKSPACE_DISK_BYTES,
+    settings.WORKSPACE_MEMORY_BYTES,
+    settings.WORKSPACE_SWEEP_INTERVAL
+)
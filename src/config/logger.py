@@ -1,37 +1,177 @@
 """Logging configuration for the application."""
 
+import atexit
+import json
 import logging
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import os
+from typing import Dict, List, Optional, Tuple
 
+_listener: Optional[QueueListener] = None
 
-def setup_logger(name: str = "worksquadbot", level: int = logging.INFO) -> logging.Logger:
+
+class DeferredQueueHandler(QueueHandler):
+    """Queue handler that leaves message formatting to the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Enqueue the record as is.
+
+        The queue is in-process, so the record does not need to be
+        pickled and the default eager formatting can be skipped.
+
+        Args:
+            record: Log record
+
+        Returns:
+            The unchanged record
+        """
+        return record
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Sample repetitive debug messages such as per-tile progress lines.
+
+    Debug records are grouped by logger name and message template. Each
+    group passes at most ``limit`` records per ``interval`` seconds; the
+    rest are dropped and counted, and the count is attached to the next
+    record of that group that gets through. Other levels always pass.
+    """
+
+    def __init__(self, limit: int, interval: float):
+        """
+        Initialize rate limit filter.
+
+        Args:
+            limit: Records allowed per template and interval, 0 disables sampling
+            interval: Interval length in seconds
+        """
+        super().__init__()
+        self.limit = limit
+        self.interval = interval
+        self._windows: Dict[Tuple[str, str], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """
+        Decide whether a record is emitted.
+
+        Args:
+            record: Log record
+
+        Returns:
+            True if the record should be emitted
+        """
+        if not self.limit or record.levelno > logging.DEBUG:
+            return True
+
+        key = (record.name, str(record.msg))
+        now = time.monotonic()
+
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = int(window[2]) if window else 0
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+
+            if window[1] < self.limit:
+                window[1] += 1
+                return True
+
+            window[2] += 1
+            return False
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        Format a record.
+
+        Args:
+            record: Log record
+
+        Returns:
+            JSON line
+        """
+        payload = {
+            "time": self.formatTime(record, self.datefmt),
+            "logger": record.name,
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "suppressed", 0):
+            payload["suppressed"] = record.suppressed
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Plain text formatter that reports sampled-out records."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        Format a record.
+
+        Args:
+            record: Log record
+
+        Returns:
+            Formatted line
+        """
+        line = super().format(record)
+        if getattr(record, "suppressed", 0):
+            line += f" [{record.suppressed} similar messages suppressed]"
+        return line
+
+
+def setup_logger(name: str = "worksquadbot", level: Optional[int] = None) -> logging.Logger:
     """
     Setup and configure application logger with console and file handlers.
 
+    The logger only enqueues records; a listener thread formats them and
+    writes to the console and the rotating log file, so the event loop
+    never blocks on log I/O.
+
     Args:
         name: Logger name
-        level: Logging level
+        level: Logging level, defaults to LOG_LEVEL from the environment
 
     Returns:
         Configured logger instance
     """
+    global _listener
+
+    if level is None:
+        level = logging.getLevelName(os.getenv("LOG_LEVEL", "INFO").upper())
+
     logger = logging.getLogger(name)
     logger.setLevel(level)
 
     if logger.handlers:
         return logger
 
-    log_format = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S"
-    )
+    if os.getenv("LOG_FORMAT", "text").lower() == "json":
+        log_format: logging.Formatter = JsonFormatter(datefmt="%Y-%m-%dT%H:%M:%S")
+    else:
+        log_format = TextFormatter(
+            "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S"
+        )
 
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(level)
     console_handler.setFormatter(log_format)
-    logger.addHandler(console_handler)
 
     log_dir = os.getenv("LOG_DIR", "/app/logs")
     os.makedirs(log_dir, exist_ok=True)
@@ -43,11 +183,32 @@ def setup_logger(name: str = "worksquadbot", level: int = logging.INFO) -> loggi
     )
     file_handler.setLevel(level)
     file_handler.setFormatter(log_format)
-    logger.addHandler(file_handler)
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.setLevel(level)
+    queue_handler.addFilter(RateLimitFilter(
+        int(os.getenv("LOG_SAMPLE_LIMIT", "20")),
+        float(os.getenv("LOG_SAMPLE_INTERVAL", "10"))
+    ))
+    logger.addHandler(queue_handler)
+
+    _listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logger)
 
     return logger
 
 
+def shutdown_logger():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
 def get_logger(name: str = "worksquadbot") -> logging.Logger:
     """
     Get logger instance.
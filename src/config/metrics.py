@@ -0,0 +1,394 @@
+"""Lightweight metrics with Prometheus text exposition."""
+
+import asyncio
+import resource
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.config.logger import get_logger
+
+logger = get_logger()
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+MEMORY_BUCKETS = tuple(mb * 1024 * 1024 for mb in (32, 64, 128, 256, 512, 1024, 2048, 4096))
+
+PROC_CLEAR_REFS = "/proc/self/clear_refs"
+PROC_STATUS = "/proc/self/status"
+
+Observation = Tuple[str, Tuple[str, ...], float]
+
+_capture = threading.local()
+
+
+class Metric:
+    """Base class for a metric family with optional labels."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """
+        Initialize metric.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Names of the labels
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        registry.register(self)
+
+    def _key(self, labelvalues: Sequence[str]) -> Tuple[str, ...]:
+        """Validate label values and turn them into a dictionary key."""
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labelvalues}")
+        return tuple(str(value) for value in labelvalues)
+
+    def _format_labels(self, labelvalues: Tuple[str, ...], extra: str = "") -> str:
+        """Format a label set for the exposition format."""
+        pairs = [f'{name}="{value}"' for name, value in zip(self.labelnames, labelvalues)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        """Render the metric family as exposition lines."""
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonically increasing counter."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self._values: Dict[Tuple[str, ...], float] = {}
+        super().__init__(name, documentation, labelnames)
+
+    def inc(self, *labelvalues: str, amount: float = 1.0):
+        """
+        Increase the counter.
+
+        Inside capture_observations() the increment is collected for the
+        caller instead, like histogram observations.
+
+        Args:
+            *labelvalues: Values for the metric labels
+            amount: Increment
+        """
+        key = self._key(labelvalues)
+        captured = getattr(_capture, "observations", None)
+        if captured is not None:
+            captured.append((self.name, key, amount))
+            return
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{self._format_labels(key)} {value}" for key, value in sorted(self._values.items())]
+
+
+class Gauge(Metric):
+    """Value that can go up and down, or be computed at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function: Optional[Callable[[], float]] = None
+        super().__init__(name, documentation, labelnames)
+
+    def set(self, value: float, *labelvalues: str):
+        """
+        Set the gauge.
+
+        Args:
+            value: New value
+            *labelvalues: Values for the metric labels
+        """
+        self._values[self._key(labelvalues)] = value
+
+    def set_function(self, function: Callable[[], float]):
+        """
+        Compute the unlabelled gauge value when it is scraped.
+
+        Args:
+            function: Callable returning the current value
+        """
+        self._function = function
+
+    def render(self) -> List[str]:
+        values = dict(self._values)
+        if self._function is not None:
+            values[()] = self._function()
+        return [f"{self.name}{self._format_labels(key)} {value}" for key, value in sorted(values.items())]
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value: float, *labelvalues: str):
+        """
+        Record an observation.
+
+        Inside capture_observations() the observation is collected for the
+        caller instead, so work done in a worker process can be replayed
+        into the main process registry.
+
+        Args:
+            value: Observed value
+            *labelvalues: Values for the metric labels
+        """
+        key = self._key(labelvalues)
+        captured = getattr(_capture, "observations", None)
+        if captured is not None:
+            captured.append((self.name, key, value))
+            return
+
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    @contextmanager
+    def time(self, *labelvalues: str) -> Iterator[None]:
+        """
+        Observe the duration of a block in seconds.
+
+        Args:
+            *labelvalues: Values for the metric labels
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelvalues)
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, series in sorted(self._series.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                labels = self._format_labels(key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            labels = self._format_labels(key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {series[-1]}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collection of metric families."""
+
+    def __init__(self):
+        """Initialize registry."""
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric):
+        """
+        Register a metric family.
+
+        Args:
+            metric: Metric to register
+        """
+        self._metrics[metric.name] = metric
+
+    def replay(self, observations: List[Observation]):
+        """
+        Record observations captured elsewhere.
+
+        Args:
+            observations: Captured (metric name, label values, value) tuples
+        """
+        for name, labelvalues, value in observations:
+            metric = self._metrics.get(name)
+            if isinstance(metric, Histogram):
+                metric.observe(value, *labelvalues)
+            elif isinstance(metric, Counter):
+                metric.inc(*labelvalues, amount=value)
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text format.
+
+        Returns:
+            Exposition text
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def capture_observations() -> Iterator[List[Observation]]:
+    """
+    Collect histogram observations and counter increments made by the current thread.
+
+    Yields:
+        List that receives the captured observations
+    """
+    previous = getattr(_capture, "observations", None)
+    _capture.observations = []
+    try:
+        yield _capture.observations
+    finally:
+        _capture.observations = previous
+
+
+def reset_peak_memory() -> bool:
+    """
+    Reset the peak resident set size of the current process.
+
+    Returns:
+        True if the peak was reset, False where the kernel does not support it
+    """
+    try:
+        with open(PROC_CLEAR_REFS, "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_memory() -> int:
+    """
+    Get the peak resident set size of the current process.
+
+    Returns:
+        Peak RSS in bytes since the last reset_peak_memory() or process start
+    """
+    try:
+        with open(PROC_STATUS) as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+@contextmanager
+def track_peak_memory(job: str) -> Iterator[None]:
+    """
+    Observe the peak resident memory of the process while a job runs.
+
+    The peak is process wide and is reset when the job starts, so only use
+    it in a process that runs nothing but the job, never in the bot process.
+    Where the peak cannot be reset, the lifetime peak is observed instead.
+
+    Args:
+        job: Job name used as label
+    """
+    reset = reset_peak_memory()
+    try:
+        yield
+    finally:
+        peak = peak_memory()
+        job_peak_memory_bytes.observe(peak, job)
+        logger.info("Job %s peak memory %.1f MB%s", job, peak / (1024 * 1024), "" if reset else " (process lifetime)")
+
+
+class MetricsServer:
+    """Minimal HTTP server exposing the registry at /metrics."""
+
+    def __init__(self, listen: str, port: int):
+        """
+        Initialize metrics server.
+
+        Args:
+            listen: Address to listen on
+            port: Port to listen on, 0 disables the server
+        """
+        self.listen = listen
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        """Start serving if a port is configured."""
+        if not self.port or self._server is not None:
+            return
+
+        self._server = await asyncio.start_server(self._handle, self.listen, self.port)
+        logger.info("Metrics endpoint listening on http://%s:%s/metrics", self.listen, self.port)
+
+    async def stop(self):
+        """Stop serving."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answer a single HTTP request."""
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, body = "200 OK", registry.render().encode()
+            else:
+                status, body = "404 Not Found", b"Not Found\n"
+
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+registry = Registry()
+
+stage_seconds = Histogram(
+    "emoji_stage_seconds",
+    "Duration of emoji pipeline stages in seconds",
+    ["stage"]
+)
+job_peak_memory_bytes = Histogram(
+    "emoji_job_peak_memory_bytes",
+    "Peak resident memory of image jobs in bytes",
+    ["job"],
+    MEMORY_BUCKETS
+)
+jobs_total = Counter("emoji_jobs_total", "Emoji pack jobs by outcome", ["status"])
+tiles_total = Counter("emoji_tiles_total", "Emoji tiles produced")
+tiles_saved_total = Counter("emoji_tiles_saved_total", "Tile encodes and uploads skipped by deduplication and blank omission", ["operation"])
+errors_total = Counter("emoji_errors_total", "Errors by pipeline stage", ["stage"])
+cache_requests_total = Counter("emoji_cache_requests_total", "Result cache lookups by outcome", ["result"])
+decoded_cache_requests_total = Counter("emoji_decoded_cache_requests_total", "Decoded photo cache lookups by outcome", ["result"])
+worker_tasks_total = Counter("emoji_worker_tasks_total", "Crop tasks sent to image workers by outcome", ["outcome"])
+speculations_total = Counter("emoji_speculations_total", "Speculative crops by outcome", ["outcome"])
+jobs_in_flight = Gauge("emoji_jobs_in_flight", "Emoji pack jobs currently running")
+jobs_queued = Gauge("emoji_jobs_queued", "Emoji pack jobs waiting in the queue")
+sessions_active = Gauge("emoji_sessions_active", "Conversation sessions held in memory")
+session_bytes = Gauge("emoji_session_bytes", "Estimated memory held by conversation sessions")
@@ -10,8 +10,59 @@ class Settings:
     """Application configuration settings."""
 
     BOT_TOKEN: str = os.getenv("BOT_TOKEN", "")
+    BOT_MODE: str = os.getenv("BOT_MODE", "polling")
+    WEBHOOK_LISTEN: str = os.getenv("WEBHOOK_LISTEN", "127.0.0.1")
+    WEBHOOK_PORT: int = int(os.getenv("WEBHOOK_PORT", "8443"))
+    WEBHOOK_PATH: str = os.getenv("WEBHOOK_PATH", "webhook")
+    WEBHOOK_URL: str = os.getenv("WEBHOOK_URL", "")
+    WEBHOOK_SECRET_TOKEN: str = os.getenv("WEBHOOK_SECRET_TOKEN", "")
+    MAX_CONCURRENT_UPDATES: int = int(os.getenv("MAX_CONCURRENT_UPDATES", "32"))
+    METRICS_LISTEN: str = os.getenv("METRICS_LISTEN", "127.0.0.1")
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "9464"))
+    SESSION_MAX_ENTRIES: int = int(os.getenv("SESSION_MAX_ENTRIES", "100000"))
+    SESSION_TTL: float = float(os.getenv("SESSION_TTL", "3600"))
+    SESSION_SWEEP_INTERVAL: float = float(os.getenv("SESSION_SWEEP_INTERVAL", "60"))
+    STATE_URL: str = os.getenv("STATE_URL", "")
+    STATE_LEASE_TTL: float = float(os.getenv("STATE_LEASE_TTL", "120"))
+    STATE_JOB_RETENTION: float = float(os.getenv("STATE_JOB_RETENTION", "86400"))
+    CROP_MODE: str = os.getenv("CROP_MODE", "local")
+    WORKER_HEARTBEAT_INTERVAL: float = float(os.getenv("WORKER_HEARTBEAT_INTERVAL", "5"))
+    WORKER_TIMEOUT: float = float(os.getenv("WORKER_TIMEOUT", "30"))
+    WORKER_MAX_ATTEMPTS: int = int(os.getenv("WORKER_MAX_ATTEMPTS", "3"))
+    WORKER_POLL_INTERVAL: float = float(os.getenv("WORKER_POLL_INTERVAL", "0.1"))
     EMOJI_SIZE: int = int(os.getenv("EMOJI_SIZE", "100"))
-    TEMP_DIR_PREFIX: str = "temp_"
+    WORKSPACE_DIR: str = os.getenv("WORKSPACE_DIR", "")
+    WORKSPACE_TMPFS: bool = os.getenv("WORKSPACE_TMPFS", "false").lower() == "true"
+    WORKSPACE_TTL: float = float(os.getenv("WORKSPACE_TTL", "1800"))
+    WORKSPACE_DISK_BYTES: int = int(os.getenv("WORKSPACE_DISK_BYTES", str(1024 * 1024 * 1024)))
+    WORKSPACE_MEMORY_BYTES: int = int(os.getenv("WORKSPACE_MEMORY_BYTES", str(512 * 1024 * 1024)))
+    WORKSPACE_SWEEP_INTERVAL: float = float(os.getenv("WORKSPACE_SWEEP_INTERVAL", "60"))
+    RESAMPLE_REDUCING_GAP: float = float(os.getenv("RESAMPLE_REDUCING_GAP", "2.0"))
+    DRAFT_OVERSAMPLE: float = float(os.getenv("DRAFT_OVERSAMPLE", "2.0"))
+    MAX_IMAGE_PIXELS: int = int(os.getenv("MAX_IMAGE_PIXELS", "60000000"))
+    DECODE_MAX_PIXELS: int = int(os.getenv("DECODE_MAX_PIXELS", "16000000"))
+    DOCUMENT_MAX_BYTES: int = int(os.getenv("DOCUMENT_MAX_BYTES", str(20 * 1024 * 1024)))
+    PNG_ENCODE_PROFILE: str = os.getenv("PNG_ENCODE_PROFILE", "balanced")
+    IN_MEMORY_PIPELINE: bool = os.getenv("IN_MEMORY_PIPELINE", "true").lower() == "true"
+    DECODED_CACHE_IMAGES: int = int(os.getenv("DECODED_CACHE_IMAGES", "2"))
+    DECODED_CACHE_BYTES: int = int(os.getenv("DECODED_CACHE_BYTES", str(128 * 1024 * 1024)))
+    DECODED_CACHE_TTL: float = float(os.getenv("DECODED_CACHE_TTL", "300"))
+    RESULT_CACHE_BYTES: int = int(os.getenv("RESULT_CACHE_BYTES", str(64 * 1024 * 1024)))
+    RESULT_CACHE_DIR: str = os.getenv("RESULT_CACHE_DIR", "")
+    RESULT_CACHE_DISK_BYTES: int = int(os.getenv("RESULT_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))
+    STICKER_UPLOAD_CONCURRENCY: int = int(os.getenv("STICKER_UPLOAD_CONCURRENCY", "8"))
+    STICKER_INITIAL_CHUNK: int = int(os.getenv("STICKER_INITIAL_CHUNK", "50"))
+    STICKER_UPLOAD_RETRIES: int = int(os.getenv("STICKER_UPLOAD_RETRIES", "3"))
+    STREAM_BUFFER_TILES: int = int(os.getenv("STREAM_BUFFER_TILES", "16"))
+    UPLOAD_PROGRESS_INTERVAL: float = float(os.getenv("UPLOAD_PROGRESS_INTERVAL", "2"))
+    MEDIA_GROUP_WINDOW: float = float(os.getenv("MEDIA_GROUP_WINDOW", "1.0"))
+    MAX_IN_FLIGHT_JOBS: int = int(os.getenv("MAX_IN_FLIGHT_JOBS", str(os.cpu_count() or 1)))
+    MAX_QUEUED_JOBS: int = int(os.getenv("MAX_QUEUED_JOBS", "100"))
+    QUEUE_POSITION_UPDATE_INTERVAL: float = float(os.getenv("QUEUE_POSITION_UPDATE_INTERVAL", "3"))
+    SPECULATION_MAX_JOBS: int = int(os.getenv("SPECULATION_MAX_JOBS", "1"))
+    SPECULATION_TTL: float = float(os.getenv("SPECULATION_TTL", "600"))
+    CPU_WORKERS: int = int(os.getenv("CPU_WORKERS", str(os.cpu_count() or 1)))
+    CPU_JOB_TIMEOUT: float = float(os.getenv("CPU_JOB_TIMEOUT", "60"))
 
     @classmethod
     def validate(cls):
@@ -20,15 +71,204 @@ class Settings:
         logger = get_logger()
 
         logger.info("Validating application settings")
-        logger.debug(f"BOT_TOKEN present: {bool(cls.BOT_TOKEN)}")
-        logger.debug(f"EMOJI_SIZE: {cls.EMOJI_SIZE}")
-        logger.debug(f"TEMP_DIR_PREFIX: {cls.TEMP_DIR_PREFIX}")
+        logger.debug("BOT_TOKEN present: %s", bool(cls.BOT_TOKEN))
+        logger.debug("BOT_MODE: %s", cls.BOT_MODE)
+        logger.debug("WEBHOOK_LISTEN: %s", cls.WEBHOOK_LISTEN)
+        logger.debug("WEBHOOK_PORT: %s", cls.WEBHOOK_PORT)
+        logger.debug("WEBHOOK_PATH: %s", cls.WEBHOOK_PATH)
+        logger.debug("WEBHOOK_URL: %s", cls.WEBHOOK_URL)
+        logger.debug("WEBHOOK_SECRET_TOKEN present: %s", bool(cls.WEBHOOK_SECRET_TOKEN))
+        logger.debug("MAX_CONCURRENT_UPDATES: %s", cls.MAX_CONCURRENT_UPDATES)
+        logger.debug("METRICS_LISTEN: %s", cls.METRICS_LISTEN)
+        logger.debug("METRICS_PORT: %s", cls.METRICS_PORT)
+        logger.debug("SESSION_MAX_ENTRIES: %s", cls.SESSION_MAX_ENTRIES)
+        logger.debug("SESSION_TTL: %s", cls.SESSION_TTL)
+        logger.debug("SESSION_SWEEP_INTERVAL: %s", cls.SESSION_SWEEP_INTERVAL)
+        logger.debug("STATE_URL: %s", cls.STATE_URL)
+        logger.debug("STATE_LEASE_TTL: %s", cls.STATE_LEASE_TTL)
+        logger.debug("STATE_JOB_RETENTION: %s", cls.STATE_JOB_RETENTION)
+        logger.debug("CROP_MODE: %s", cls.CROP_MODE)
+        logger.debug("WORKER_HEARTBEAT_INTERVAL: %s", cls.WORKER_HEARTBEAT_INTERVAL)
+        logger.debug("WORKER_TIMEOUT: %s", cls.WORKER_TIMEOUT)
+        logger.debug("WORKER_MAX_ATTEMPTS: %s", cls.WORKER_MAX_ATTEMPTS)
+        logger.debug("WORKER_POLL_INTERVAL: %s", cls.WORKER_POLL_INTERVAL)
+        logger.debug("EMOJI_SIZE: %s", cls.EMOJI_SIZE)
+        logger.debug("WORKSPACE_DIR: %s", cls.WORKSPACE_DIR)
+        logger.debug("WORKSPACE_TMPFS: %s", cls.WORKSPACE_TMPFS)
+        logger.debug("WORKSPACE_TTL: %s", cls.WORKSPACE_TTL)
+        logger.debug("WORKSPACE_DISK_BYTES: %s", cls.WORKSPACE_DISK_BYTES)
+        logger.debug("WORKSPACE_MEMORY_BYTES: %s", cls.WORKSPACE_MEMORY_BYTES)
+        logger.debug("WORKSPACE_SWEEP_INTERVAL: %s", cls.WORKSPACE_SWEEP_INTERVAL)
+        logger.debug("RESAMPLE_REDUCING_GAP: %s", cls.RESAMPLE_REDUCING_GAP)
+        logger.debug("DRAFT_OVERSAMPLE: %s", cls.DRAFT_OVERSAMPLE)
+        logger.debug("MAX_IMAGE_PIXELS: %s", cls.MAX_IMAGE_PIXELS)
+        logger.debug("DECODE_MAX_PIXELS: %s", cls.DECODE_MAX_PIXELS)
+        logger.debug("DOCUMENT_MAX_BYTES: %s", cls.DOCUMENT_MAX_BYTES)
+        logger.debug("PNG_ENCODE_PROFILE: %s", cls.PNG_ENCODE_PROFILE)
+        logger.debug("IN_MEMORY_PIPELINE: %s", cls.IN_MEMORY_PIPELINE)
+        logger.debug("DECODED_CACHE_IMAGES: %s", cls.DECODED_CACHE_IMAGES)
+        logger.debug("DECODED_CACHE_BYTES: %s", cls.DECODED_CACHE_BYTES)
+        logger.debug("DECODED_CACHE_TTL: %s", cls.DECODED_CACHE_TTL)
+        logger.debug("RESULT_CACHE_BYTES: %s", cls.RESULT_CACHE_BYTES)
+        logger.debug("RESULT_CACHE_DIR: %s", cls.RESULT_CACHE_DIR)
+        logger.debug("RESULT_CACHE_DISK_BYTES: %s", cls.RESULT_CACHE_DISK_BYTES)
+        logger.debug("STICKER_UPLOAD_CONCURRENCY: %s", cls.STICKER_UPLOAD_CONCURRENCY)
+        logger.debug("STICKER_INITIAL_CHUNK: %s", cls.STICKER_INITIAL_CHUNK)
+        logger.debug("STICKER_UPLOAD_RETRIES: %s", cls.STICKER_UPLOAD_RETRIES)
+        logger.debug("STREAM_BUFFER_TILES: %s", cls.STREAM_BUFFER_TILES)
+        logger.debug("UPLOAD_PROGRESS_INTERVAL: %s", cls.UPLOAD_PROGRESS_INTERVAL)
+        logger.debug("MEDIA_GROUP_WINDOW: %s", cls.MEDIA_GROUP_WINDOW)
+        logger.debug("MAX_IN_FLIGHT_JOBS: %s", cls.MAX_IN_FLIGHT_JOBS)
+        logger.debug("MAX_QUEUED_JOBS: %s", cls.MAX_QUEUED_JOBS)
+        logger.debug("QUEUE_POSITION_UPDATE_INTERVAL: %s", cls.QUEUE_POSITION_UPDATE_INTERVAL)
+        logger.debug("SPECULATION_MAX_JOBS: %s", cls.SPECULATION_MAX_JOBS)
+        logger.debug("SPECULATION_TTL: %s", cls.SPECULATION_TTL)
+        logger.debug("CPU_WORKERS: %s", cls.CPU_WORKERS)
+        logger.debug("CPU_JOB_TIMEOUT: %s", cls.CPU_JOB_TIMEOUT)
 
         if not cls.BOT_TOKEN:
             logger.error("BOT_TOKEN not found in environment variables")
             raise ValueError("BOT_TOKEN not found in environment variables")
 
+        if cls.BOT_MODE not in ("polling", "webhook"):
+            logger.error("Unknown BOT_MODE: %s", cls.BOT_MODE)
+            raise ValueError("BOT_MODE must be 'polling' or 'webhook'")
+
+        if cls.BOT_MODE == "webhook" and not cls.WEBHOOK_URL:
+            logger.error("WEBHOOK_URL is required in webhook mode")
+            raise ValueError("WEBHOOK_URL is required in webhook mode")
+
+        if cls.MAX_CONCURRENT_UPDATES < 1:
+            logger.error("MAX_CONCURRENT_UPDATES must be positive, got %s", cls.MAX_CONCURRENT_UPDATES)
+            raise ValueError("MAX_CONCURRENT_UPDATES must be positive")
+
+        if not 0 <= cls.METRICS_PORT <= 65535:
+            logger.error("METRICS_PORT must be between 0 and 65535, got %s", cls.METRICS_PORT)
+            raise ValueError("METRICS_PORT must be between 0 and 65535")
+
+        if cls.SESSION_MAX_ENTRIES < 1 or cls.SESSION_TTL <= 0:
+            logger.error("Invalid session limits: SESSION_MAX_ENTRIES=%s, SESSION_TTL=%s", cls.SESSION_MAX_ENTRIES, cls.SESSION_TTL)
+            raise ValueError("SESSION_MAX_ENTRIES and SESSION_TTL must be positive")
+
+        if cls.SESSION_SWEEP_INTERVAL <= 0:
+            logger.error("SESSION_SWEEP_INTERVAL must be positive, got %s", cls.SESSION_SWEEP_INTERVAL)
+            raise ValueError("SESSION_SWEEP_INTERVAL must be positive")
+
+        if cls.STATE_URL and not cls.STATE_URL.startswith("sqlite://"):
+            logger.error("Unsupported STATE_URL: %s", cls.STATE_URL)
+            raise ValueError("STATE_URL must be empty or a sqlite:// URL")
+
+        if cls.STATE_LEASE_TTL <= 0 or cls.STATE_JOB_RETENTION <= 0:
+            logger.error("Invalid state limits: STATE_LEASE_TTL=%s, STATE_JOB_RETENTION=%s", cls.STATE_LEASE_TTL, cls.STATE_JOB_RETENTION)
+            raise ValueError("STATE_LEASE_TTL and STATE_JOB_RETENTION must be positive")
+
+        if cls.CROP_MODE not in ("local", "worker"):
+            logger.error("Unknown CROP_MODE: %s", cls.CROP_MODE)
+            raise ValueError("CROP_MODE must be 'local' or 'worker'")
+
+        if cls.CROP_MODE == "worker" and not cls.STATE_URL:
+            logger.error("STATE_URL is required with CROP_MODE=worker")
+            raise ValueError("STATE_URL is required with CROP_MODE=worker")
+
+        if cls.WORKER_HEARTBEAT_INTERVAL <= 0 or cls.WORKER_TIMEOUT <= cls.WORKER_HEARTBEAT_INTERVAL:
+            logger.error("Invalid worker heartbeat: WORKER_HEARTBEAT_INTERVAL=%s, WORKER_TIMEOUT=%s", cls.WORKER_HEARTBEAT_INTERVAL, cls.WORKER_TIMEOUT)
+            raise ValueError("WORKER_HEARTBEAT_INTERVAL must be positive and below WORKER_TIMEOUT")
+
+        if cls.WORKER_MAX_ATTEMPTS < 1 or cls.WORKER_POLL_INTERVAL <= 0:
+            logger.error("Invalid worker limits: WORKER_MAX_ATTEMPTS=%s, WORKER_POLL_INTERVAL=%s", cls.WORKER_MAX_ATTEMPTS, cls.WORKER_POLL_INTERVAL)
+            raise ValueError("WORKER_MAX_ATTEMPTS and WORKER_POLL_INTERVAL must be positive")
+
+        if cls.WORKSPACE_TTL <= 0 or cls.WORKSPACE_SWEEP_INTERVAL <= 0:
+            logger.error("WORKSPACE_TTL and WORKSPACE_SWEEP_INTERVAL must be positive")
+            raise ValueError("WORKSPACE_TTL and WORKSPACE_SWEEP_INTERVAL must be positive")
+
+        if cls.WORKSPACE_DISK_BYTES <= 0 or cls.WORKSPACE_MEMORY_BYTES <= 0:
+            logger.error("Workspace budgets must be positive")
+            raise ValueError("WORKSPACE_DISK_BYTES and WORKSPACE_MEMORY_BYTES must be positive")
+
+        if cls.RESAMPLE_REDUCING_GAP and cls.RESAMPLE_REDUCING_GAP < 1:
+            logger.error("RESAMPLE_REDUCING_GAP must be 0 or at least 1, got %s", cls.RESAMPLE_REDUCING_GAP)
+            raise ValueError("RESAMPLE_REDUCING_GAP must be 0 or at least 1")
+
+        if cls.DRAFT_OVERSAMPLE and cls.DRAFT_OVERSAMPLE < 1:
+            logger.error("DRAFT_OVERSAMPLE must be 0 or at least 1, got %s", cls.DRAFT_OVERSAMPLE)
+            raise ValueError("DRAFT_OVERSAMPLE must be 0 or at least 1")
+
+        if cls.MAX_IMAGE_PIXELS < 0 or cls.DECODE_MAX_PIXELS < 0:
+            logger.error("Pixel budgets must be non-negative: max_image=%s, decode=%s", cls.MAX_IMAGE_PIXELS, cls.DECODE_MAX_PIXELS)
+            raise ValueError("MAX_IMAGE_PIXELS and DECODE_MAX_PIXELS must be non-negative")
+
+        if cls.DOCUMENT_MAX_BYTES <= 0:
+            logger.error("DOCUMENT_MAX_BYTES must be positive, got %s", cls.DOCUMENT_MAX_BYTES)
+            raise ValueError("DOCUMENT_MAX_BYTES must be positive")
+
+        from src.emoji.encoder import ENCODE_PROFILES
+        if cls.PNG_ENCODE_PROFILE not in ENCODE_PROFILES:
+            logger.error("Unknown PNG_ENCODE_PROFILE: %s", cls.PNG_ENCODE_PROFILE)
+            raise ValueError(f"PNG_ENCODE_PROFILE must be one of: {', '.join(ENCODE_PROFILES)}")
+
+        if cls.DECODED_CACHE_IMAGES < 0 or cls.DECODED_CACHE_BYTES < 0 or cls.DECODED_CACHE_TTL <= 0:
+            logger.error("Invalid decoded cache limits: images=%s, bytes=%s, ttl=%s", cls.DECODED_CACHE_IMAGES, cls.DECODED_CACHE_BYTES, cls.DECODED_CACHE_TTL)
+            raise ValueError("DECODED_CACHE_IMAGES and DECODED_CACHE_BYTES must be non-negative and DECODED_CACHE_TTL positive")
+
+        if cls.RESULT_CACHE_BYTES < 0 or cls.RESULT_CACHE_DISK_BYTES < 0:
+            logger.error("Result cache budgets must be non-negative")
+            raise ValueError("RESULT_CACHE_BYTES and RESULT_CACHE_DISK_BYTES must be non-negative")
+
+        if cls.STICKER_UPLOAD_CONCURRENCY < 1:
+            logger.error("STICKER_UPLOAD_CONCURRENCY must be positive, got %s", cls.STICKER_UPLOAD_CONCURRENCY)
+            raise ValueError("STICKER_UPLOAD_CONCURRENCY must be positive")
+
+        if not 1 <= cls.STICKER_INITIAL_CHUNK <= 50:
+            logger.error("STICKER_INITIAL_CHUNK must be between 1 and 50, got %s", cls.STICKER_INITIAL_CHUNK)
+            raise ValueError("STICKER_INITIAL_CHUNK must be between 1 and 50")
+
+        if cls.STICKER_UPLOAD_RETRIES < 0:
+            logger.error("STICKER_UPLOAD_RETRIES must be non-negative, got %s", cls.STICKER_UPLOAD_RETRIES)
+            raise ValueError("STICKER_UPLOAD_RETRIES must be non-negative")
+
+        if cls.STREAM_BUFFER_TILES < 1 or cls.UPLOAD_PROGRESS_INTERVAL <= 0:
+            logger.error("Invalid streaming limits: STREAM_BUFFER_TILES=%s, UPLOAD_PROGRESS_INTERVAL=%s", cls.STREAM_BUFFER_TILES, cls.UPLOAD_PROGRESS_INTERVAL)
+            raise ValueError("STREAM_BUFFER_TILES and UPLOAD_PROGRESS_INTERVAL must be positive")
+
+        if cls.MEDIA_GROUP_WINDOW <= 0:
+            logger.error("MEDIA_GROUP_WINDOW must be positive, got %s", cls.MEDIA_GROUP_WINDOW)
+            raise ValueError("MEDIA_GROUP_WINDOW must be positive")
+
+        if cls.MAX_IN_FLIGHT_JOBS < 1 or cls.MAX_QUEUED_JOBS < 0:
+            logger.error("Invalid job limits: MAX_IN_FLIGHT_JOBS=%s, MAX_QUEUED_JOBS=%s", cls.MAX_IN_FLIGHT_JOBS, cls.MAX_QUEUED_JOBS)
+            raise ValueError("MAX_IN_FLIGHT_JOBS must be positive and MAX_QUEUED_JOBS non-negative")
+
+        if cls.QUEUE_POSITION_UPDATE_INTERVAL <= 0:
+            logger.error("QUEUE_POSITION_UPDATE_INTERVAL must be positive, got %s", cls.QUEUE_POSITION_UPDATE_INTERVAL)
+            raise ValueError("QUEUE_POSITION_UPDATE_INTERVAL must be positive")
+
+        if cls.SPECULATION_MAX_JOBS < 0 or cls.SPECULATION_TTL <= 0:
+            logger.error("Invalid speculation limits: SPECULATION_MAX_JOBS=%s, SPECULATION_TTL=%s", cls.SPECULATION_MAX_JOBS, cls.SPECULATION_TTL)
+            raise ValueError("SPECULATION_MAX_JOBS must be non-negative and SPECULATION_TTL positive")
+
+        if cls.CPU_WORKERS < 0:
+            logger.error("CPU_WORKERS must be non-negative, got %s", cls.CPU_WORKERS)
+            raise ValueError("CPU_WORKERS must be non-negative")
+
+        if cls.CPU_JOB_TIMEOUT <= 0:
+            logger.error("CPU_JOB_TIMEOUT must be positive, got %s", cls.CPU_JOB_TIMEOUT)
+            raise ValueError("CPU_JOB_TIMEOUT must be positive")
+
         logger.info("Settings validation successful")
 
+    @classmethod
+    def webhook_url(cls) -> str:
+        """
+        Build the public webhook URL registered with Telegram.
+
+        WEBHOOK_URL is the public base URL, e.g. the HTTPS address of a
+        reverse proxy forwarding to WEBHOOK_LISTEN:WEBHOOK_PORT.
+
+        Returns:
+            Full webhook URL including the path
+        """
+        return f"{cls.WEBHOOK_URL.rstrip('/')}/{cls.WEBHOOK_PATH.lstrip('/')}"
+
 
 settings = Settings()
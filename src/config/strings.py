@@ -17,6 +17,11 @@ ASK_GRID_SIZE = (
     "Картинка будет разрезана на {width}x{height} частей"
 )
 
+ASK_GRID_SIZE_BATCH = (
+    "📐 Получено фото: {count}. Выбери размер сетки, он будет общим для всех фото:\n\n"
+    "Все фото попадут в один эмодзи-пак"
+)
+
 ASK_PADDING = (
     "📏 Выбери отступ между эмодзи (padding):\n\n"
     "1 - минимальный\n"
@@ -26,18 +31,51 @@ ASK_PADDING = (
     "5 - максимальный"
 )
 
+SKIP_BLANK_OFF = "⬜ Пустые эмодзи: оставить"
+
+SKIP_BLANK_ON = "🚫 Пустые эмодзи: убрать"
+
+WITH_STICKERS_OFF = "🖼 Стикерпак 512px: нет"
+
+WITH_STICKERS_ON = "🖼 Стикерпак 512px: да"
+
 PROCESSING = "⏳ Обрабатываю изображение..."
 
+PROCESSING_BATCH = "⏳ Обрабатываю фото: {count}..."
+
 CREATING_PACK = "📦 Создаю эмодзи-пак..."
 
+UPLOADING = "📤 Загружено {uploaded}/{total}"
+
+UPLOADING_UNKNOWN_TOTAL = "📤 Загружено {uploaded}"
+
+QUEUED = "🕒 Вы в очереди на обработку: позиция {position}"
+
+ERROR_QUEUE_FULL = "⏳ Сейчас слишком много запросов. Попробуйте через пару минут."
+
+ERROR_JOB_RUNNING = "⏳ Эмодзи-пак по прошлому запросу ещё создаётся. Дождитесь результата."
+
 SUCCESS = (
     "✅ Готово! Эмодзи-пак создан!\n\n"
     "🔗 Ссылка: {link}\n\n"
     "Нажмите на ссылку чтобы добавить эмодзи-пак и использовать их в своих сообщениях."
 )
 
+SUCCESS_WITH_STICKERS = (
+    "✅ Готово! Эмодзи-пак и стикерпак созданы!\n\n"
+    "🔗 Эмодзи: {link}\n"
+    "🔗 Стикеры: {sticker_link}\n\n"
+    "Нажмите на ссылки чтобы добавить паки и использовать их в своих сообщениях."
+)
+
 ERROR_PROCESSING = "❌ Ошибка при обработке изображения. Попробуйте другую картинку."
 
+ERROR_FILE_TOO_LARGE = "❌ Файл слишком большой. Максимум {limit} МБ."
+
+ERROR_IMAGE_TOO_LARGE = "❌ Картинка слишком большая. Максимум {limit} Мп."
+
+ERROR_UNSUPPORTED_FILE = "❌ Не получилось открыть файл. Отправьте картинку в PNG, JPEG или WebP."
+
 ERROR_CREATING_PACK = "❌ Ошибка при создании эмодзи-пака. Попробуйте позже."
 
 ERROR_INVALID_PADDING = "❌ Неверное значение. Выберите от 1 до 5."
@@ -49,7 +87,7 @@ HELP_MESSAGE = (
     "/emoji_cropper - создать эмодзи-пак\n"
     "/help - показать эту справку\n\n"
     "🖼️ Emoji Cropper:\n"
-    "1. Отправьте картинку\n"
+    "1. Отправьте картинку, можно файлом без сжатия\n"
     "2. Выберите размер сетки (NxM)\n"
     "3. Выберите отступ (1-5)\n"
     "4. Получите ссылку на эмодзи-пак!"
@@ -0,0 +1,305 @@
+"""Content-addressed cache of encoded emoji tiles."""
+
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from src.config import settings
+from src.config.logger import get_logger
+
+logger = get_logger()
+
+_DISK_MAGIC = b"EMJT"
+_DISK_SUFFIX = ".tiles"
+
+
+class CacheKey(NamedTuple):
+    """Identity of a crop result."""
+
+    file_unique_id: str
+    grid_size: Tuple[int, int]
+    padding: int
+    emoji_size: int
+    encode_profile: str
+    skip_blank: bool = False
+    draft_oversample: float = 0.0
+    reducing_gap: float = 0.0
+    decode_max_pixels: int = 0
+
+    @property
+    def digest(self) -> str:
+        """Stable hex digest of the key, used for on-disk file names."""
+        cols, rows = self.grid_size
+        raw = (
+            f"{self.file_unique_id}|{cols}x{rows}|{self.padding}|{self.emoji_size}|{self.encode_profile}"
+            f"|draft={self.draft_oversample:g}|gap={self.reducing_gap:g}|decode={self.decode_max_pixels}"
+        )
+        if self.skip_blank:
+            raw += "|skip_blank"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class ResultCache:
+    """LRU cache of encoded tiles with a byte budget and optional disk tier."""
+
+    def __init__(
+        self,
+        max_bytes: int,
+        disk_dir: str = "",
+        disk_max_bytes: int = 0
+    ):
+        """
+        Initialize result cache.
+
+        Args:
+            max_bytes: Memory budget in bytes, 0 disables the memory tier
+            disk_dir: Directory for the on-disk tier, empty disables it
+            disk_max_bytes: Disk budget in bytes
+        """
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries: "OrderedDict[CacheKey, List[bytes]]" = OrderedDict()
+        self._size = 0
+        self._disk_size = 0
+        self._evicting = False
+        self._lock = threading.Lock()
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._disk_size = sum(size for _, size, _ in self._scan_disk())
+
+        logger.info("ResultCache initialized with max_bytes=%s, disk_dir=%s, disk_max_bytes=%s", max_bytes, disk_dir or None, disk_max_bytes)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any cache tier is enabled."""
+        return self.max_bytes > 0 or bool(self.disk_dir)
+
+    @property
+    def size(self) -> int:
+        """Bytes currently held in memory."""
+        return self._size
+
+    def get(self, key: CacheKey) -> Optional[List[bytes]]:
+        """
+        Look up encoded tiles.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            List of encoded tiles, or None on a miss
+        """
+        with self._lock:
+            tiles = self._entries.get(key)
+            if tiles is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return tiles
+
+        tiles = self._read_disk(key)
+        with self._lock:
+            if tiles is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.disk_hits += 1
+            self._store_memory(key, tiles)
+            return tiles
+
+    def put(self, key: CacheKey, tiles: List[bytes]):
+        """
+        Store encoded tiles.
+
+        Args:
+            key: Cache key
+            tiles: List of encoded tiles
+        """
+        with self._lock:
+            self._store_memory(key, tiles)
+
+        self._write_disk(key, tiles)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dictionary of hit, miss, eviction and size counters
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "disk_bytes": self._disk_size,
+            }
+
+    def _store_memory(self, key: CacheKey, tiles: List[bytes]):
+        """Insert an entry into the memory tier and evict down to budget."""
+        size = sum(len(tile) for tile in tiles)
+        if size > self.max_bytes:
+            return
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= sum(len(tile) for tile in previous)
+
+        self._entries[key] = tiles
+        self._size += size
+
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= sum(len(tile) for tile in evicted)
+            self.evictions += 1
+
+    def _disk_path(self, key: CacheKey) -> str:
+        """Path of an entry in the disk tier."""
+        return os.path.join(self.disk_dir, key.digest + _DISK_SUFFIX)
+
+    def _read_disk(self, key: CacheKey) -> Optional[List[bytes]]:
+        """Read an entry from the disk tier."""
+        if not self.disk_dir:
+            return None
+
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as cache_file:
+                data = cache_file.read()
+        except FileNotFoundError:
+            return None
+
+        tiles = self._parse_disk(data)
+        if tiles is None:
+            logger.warning("Discarding corrupt cache file: %s", path)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                return None
+            with self._lock:
+                self._disk_size -= len(data)
+            return None
+
+        os.utime(path)
+        return tiles
+
+    @staticmethod
+    def _parse_disk(data: bytes) -> Optional[List[bytes]]:
+        """Split a disk tier entry into tiles, None if it is truncated or corrupt."""
+        if data[:4] != _DISK_MAGIC:
+            return None
+
+        try:
+            (count,) = struct.unpack_from("<I", data, 4)
+            lengths = struct.unpack_from(f"<{count}I", data, 8)
+        except struct.error:
+            return None
+
+        offset = 8 + 4 * count
+        if offset + sum(lengths) != len(data):
+            return None
+
+        tiles = []
+        for length in lengths:
+            tiles.append(data[offset:offset + length])
+            offset += length
+        return tiles
+
+    def _write_disk(self, key: CacheKey, tiles: List[bytes]):
+        """Write an entry to the disk tier and evict down to budget."""
+        if not self.disk_dir:
+            return
+
+        header = _DISK_MAGIC + struct.pack(f"<I{len(tiles)}I", len(tiles), *(len(tile) for tile in tiles))
+        path = self._disk_path(key)
+        fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.disk_dir)
+
+        try:
+            with os.fdopen(fd, "wb") as cache_file:
+                cache_file.write(header)
+                for tile in tiles:
+                    cache_file.write(tile)
+            size = os.path.getsize(temp_path)
+
+            with self._lock:
+                try:
+                    previous = os.path.getsize(path)
+                except FileNotFoundError:
+                    previous = 0
+                os.replace(temp_path, path)
+                self._disk_size += size - previous
+                if self._disk_size <= self.disk_max_bytes or self._evicting:
+                    return
+                self._evicting = True
+                counted = self._disk_size
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+        try:
+            self._evict_disk(counted)
+        finally:
+            with self._lock:
+                self._evicting = False
+
+    def _evict_disk(self, counted: int):
+        """
+        Remove the least recently used disk entries until the tier fits its budget.
+
+        The directory scan and the removals run without the lock, so lookups
+        and writes of other threads are not held up by disk I/O.
+
+        Args:
+            counted: Disk tier size tracked when the eviction started
+        """
+        entries = sorted(self._scan_disk(), key=lambda entry: entry[2])
+        remaining = sum(entry_size for _, entry_size, _ in entries)
+        removed = 0
+        for entry_path, entry_size, _ in entries:
+            if remaining <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(entry_path)
+            except FileNotFoundError:
+                continue
+            remaining -= entry_size
+            removed += 1
+
+        with self._lock:
+            self._disk_size += remaining - counted
+            self.evictions += removed
+
+    def _scan_disk(self) -> List[Tuple[str, int, float]]:
+        """List disk tier entries as (path, size, mtime)."""
+        entries = []
+        with os.scandir(self.disk_dir) as scanner:
+            for entry in scanner:
+                if entry.name.endswith(_DISK_SUFFIX):
+                    stat = entry.stat()
+                    entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+
+result_cache = ResultCache(
+    settings.RESULT_CACHE_BYTES,
+    settings.RESULT_CACHE_DIR,
+    settings.RESULT_CACHE_DISK_BYTES
+)
@@ -0,0 +1,172 @@
+"""Bounded cache of decoded photos.
+
+The cache lives in the process that decodes, so with a process pool every
+worker keeps its own bounded set of bitmaps. A daemon thread started with
+the first cached bitmap expires idle ones, so an idle worker process does
+not keep them resident.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from PIL import Image
+
+from src.config import settings
+from src.config.logger import get_logger
+
+logger = get_logger()
+
+
+def bitmap_bytes(img: Image.Image) -> int:
+    """
+    Estimate the resident size of a decoded image.
+
+    Args:
+        img: Decoded image
+
+    Returns:
+        Size of the pixel data in bytes
+    """
+    return img.width * img.height * len(img.getbands())
+
+
+class DecodedImageCache:
+    """LRU cache of decoded images with count, byte and age limits."""
+
+    def __init__(self, max_images: int, max_bytes: int, ttl: float):
+        """
+        Initialize decoded image cache.
+
+        Args:
+            max_images: Maximum number of resident bitmaps, 0 disables the cache
+            max_bytes: Maximum total size of resident bitmaps
+            ttl: Seconds an unused bitmap stays resident
+        """
+        self.max_images = max_images
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries: "OrderedDict[str, Tuple[Image.Image, int, float]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._sweeper: Optional[threading.Thread] = None
+
+        logger.info("DecodedImageCache initialized with max_images=%s, max_bytes=%s, ttl=%s", max_images, max_bytes, ttl)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether bitmaps are cached at all."""
+        return self.max_images > 0 and self.max_bytes > 0
+
+    def get(self, key: str) -> Optional[Image.Image]:
+        """
+        Look up a decoded image.
+
+        The returned image is shared and must not be modified or closed.
+
+        Args:
+            key: Photo identity, e.g. the Telegram file_unique_id
+
+        Returns:
+            Decoded image, or None on a miss
+        """
+        with self._lock:
+            self._expire(time.monotonic())
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            img, size, _ = entry
+            self._entries[key] = (img, size, time.monotonic())
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return img
+
+    def put(self, key: str, img: Image.Image) -> bool:
+        """
+        Store a decoded image.
+
+        Args:
+            key: Photo identity
+            img: Decoded image, owned by the cache afterwards
+
+        Returns:
+            True if the image was cached, False if it does not fit
+        """
+        size = bitmap_bytes(img)
+        if not self.enabled or size > self.max_bytes:
+            return False
+
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+
+            self._entries[key] = (img, size, now)
+            self._size += size
+
+            while len(self._entries) > self.max_images or self._size > self.max_bytes:
+                self._evict_oldest()
+
+            if self._sweeper is None:
+                self._sweeper = threading.Thread(target=self._sweep_periodically, name="decoded-cache-sweeper", daemon=True)
+                self._sweeper.start()
+        return True
+
+    def sweep(self):
+        """Drop bitmaps that have not been used within the TTL."""
+        with self._lock:
+            self._expire(time.monotonic())
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dictionary of hit, miss, eviction and size counters
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "images": len(self._entries),
+                "bytes": self._size,
+            }
+
+    def _expire(self, now: float):
+        """Evict entries idle for longer than the TTL, oldest first."""
+        while self._entries:
+            _, (_, _, last_used) = next(iter(self._entries.items()))
+            if now - last_used <= self.ttl:
+                break
+            self._evict_oldest()
+
+    def _sweep_periodically(self):
+        """Expire idle bitmaps every half TTL for the lifetime of the process."""
+        while True:
+            time.sleep(self.ttl / 2)
+            self.sweep()
+
+    def _evict_oldest(self):
+        """Evict the least recently used entry without closing a bitmap a crop may still read."""
+        _, (_, size, _) = self._entries.popitem(last=False)
+        self._size -= size
+        self.evictions += 1
+
+
+decoded_cache = DecodedImageCache(
+    settings.DECODED_CACHE_IMAGES,
+    settings.DECODED_CACHE_BYTES,
+    settings.DECODED_CACHE_TTL
+)
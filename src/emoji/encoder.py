@@ -0,0 +1,154 @@
+"""PNG encoding profiles for emoji tiles."""
+
+import io
+from typing import Dict, NamedTuple, Optional
+
+from PIL import Image, ImageChops
+
+from src.config.logger import get_logger
+
+logger = get_logger()
+
+MAX_STATIC_STICKER_BYTES = 512 * 1024
+
+
+class EncodeProfile(NamedTuple):
+    """PNG encoder options for a tile."""
+
+    name: str
+    compress_level: int
+    optimize: bool
+    quantize: bool
+    strip_alpha: bool
+
+
+ENCODE_PROFILES: Dict[str, EncodeProfile] = {
+    "fast": EncodeProfile("fast", compress_level=1, optimize=False, quantize=False, strip_alpha=True),
+    "balanced": EncodeProfile("balanced", compress_level=6, optimize=False, quantize=True, strip_alpha=True),
+    "smallest": EncodeProfile("smallest", compress_level=9, optimize=True, quantize=True, strip_alpha=True),
+}
+
+
+class TileEncoder:
+    """Encodes emoji tiles to PNG according to an encode profile."""
+
+    def __init__(self, profile: str = "smallest", max_bytes: int = MAX_STATIC_STICKER_BYTES):
+        """
+        Initialize tile encoder.
+
+        Args:
+            profile: Name of the encode profile
+            max_bytes: Maximum size of an encoded tile
+
+        Raises:
+            ValueError: If the profile is unknown
+        """
+        if profile not in ENCODE_PROFILES:
+            raise ValueError(f"Unknown encode profile: {profile}")
+
+        self.profile = ENCODE_PROFILES[profile]
+        self.max_bytes = max_bytes
+
+    def encode(self, tile: Image.Image) -> bytes:
+        """
+        Encode a tile to PNG bytes.
+
+        Falls back to the smallest profile if the result exceeds the
+        Telegram size limit for static stickers, and to a lossy 256 color
+        palette if even that is too large, which large detailed tiles such
+        as 512px regular stickers can be.
+
+        Args:
+            tile: Tile image
+
+        Returns:
+            PNG-encoded tile
+
+        Raises:
+            ValueError: If the tile cannot be encoded within the size limit
+        """
+        data = self._encode(tile, self.profile)
+
+        if len(data) > self.max_bytes and self.profile.name != "smallest":
+            logger.warning("Tile is %s bytes with profile %s, retrying with smallest", len(data), self.profile.name)
+            data = self._encode(tile, ENCODE_PROFILES["smallest"])
+
+        if len(data) > self.max_bytes:
+            logger.warning("Tile is %s bytes losslessly, reducing it to 256 colors", len(data))
+            data = self._encode_reduced(tile)
+
+        if len(data) > self.max_bytes:
+            raise ValueError(f"Encoded tile is {len(data)} bytes, limit is {self.max_bytes}")
+
+        return data
+
+    @classmethod
+    def _encode(cls, tile: Image.Image, profile: EncodeProfile) -> bytes:
+        """
+        Encode a tile with the given profile.
+
+        Args:
+            tile: Tile image
+            profile: Encode profile
+
+        Returns:
+            PNG-encoded tile
+        """
+        img = tile
+
+        if profile.strip_alpha and img.mode == "RGBA" and img.getextrema()[3][0] == 255:
+            img = img.convert("RGB")
+
+        if profile.quantize:
+            img = cls._to_palette(img) or img
+
+        buffer = io.BytesIO()
+        img.save(
+            buffer,
+            "PNG",
+            compress_level=profile.compress_level,
+            optimize=profile.optimize
+        )
+        return buffer.getvalue()
+
+    @staticmethod
+    def _encode_reduced(tile: Image.Image) -> bytes:
+        """
+        Encode a tile with a lossy palette of at most 256 colors.
+
+        Args:
+            tile: Tile image
+
+        Returns:
+            PNG-encoded tile
+        """
+        img = tile
+        if img.mode == "RGBA" and img.getextrema()[3][0] == 255:
+            img = img.convert("RGB")
+
+        palette = img.quantize(colors=256, method=Image.Quantize.FASTOCTREE)
+        buffer = io.BytesIO()
+        palette.save(buffer, "PNG", compress_level=9, optimize=True)
+        return buffer.getvalue()
+
+    @staticmethod
+    def _to_palette(img: Image.Image) -> Optional[Image.Image]:
+        """
+        Convert an image to palette mode if that is lossless.
+
+        Args:
+            img: RGB or RGBA image
+
+        Returns:
+            Palette image, or None if the image has more than 256 colors
+            or the conversion would change any pixel
+        """
+        colors = img.getcolors(256)
+        if colors is None:
+            return None
+
+        palette = img.quantize(colors=len(colors), method=Image.Quantize.FASTOCTREE)
+        if ImageChops.difference(palette.convert(img.mode), img).getbbox() is not None:
+            return None
+
+        return palette
@@ -0,0 +1,401 @@
+"""Process pool executor for CPU-heavy image work."""
+
+import asyncio
+import multiprocessing
+import queue
+import threading
+import zlib
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from multiprocessing.managers import SyncManager
+from typing import Any, AsyncIterator, Callable, ContextManager, Iterator, List, Optional, Tuple
+
+from src.config import settings
+from src.config.logger import get_logger
+from src.config.metrics import Observation, capture_observations, registry, track_peak_memory
+
+logger = get_logger()
+
+STREAM_ITEM = 0
+STREAM_END = 1
+STREAM_TIMEOUT = 2
+STREAM_PUT_POLL = 0.5
+
+
+class CPUExecutor:
+    """
+    Runs blocking image operations outside of the asyncio event loop.
+
+    Each worker process is a single-worker pool of its own. Jobs given a
+    key always run in the same worker, so repeated crops of one photo find
+    it in that worker's decoded image cache. Jobs without a key go to the
+    worker with the fewest pending jobs.
+    """
+
+    def __init__(self, max_workers: int, job_timeout: float):
+        """
+        Initialize CPU executor.
+
+        Args:
+            max_workers: Number of worker processes, 0 runs jobs in a thread
+            job_timeout: Default timeout for a single job in seconds
+        """
+        self.max_workers = max_workers
+        self.job_timeout = job_timeout
+        self._shards: List[ProcessPoolExecutor] = []
+        self._pending: List[int] = []
+        self._pending_lock = threading.Lock()
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._manager: Optional[SyncManager] = None
+        logger.info("CPUExecutor initialized with max_workers=%s, job_timeout=%s", max_workers, job_timeout)
+
+    @property
+    def running(self) -> bool:
+        """Whether the worker pool has been started."""
+        return bool(self._shards)
+
+    def start(self):
+        """Start the worker pool."""
+        if self._shards:
+            return
+
+        if self.max_workers == 0:
+            logger.info("CPUExecutor running jobs in a thread pool")
+            return
+
+        context = multiprocessing.get_context("spawn")
+        self._shards = [ProcessPoolExecutor(max_workers=1, mp_context=context) for _ in range(self.max_workers)]
+        self._pending = [0] * self.max_workers
+        self._manager = context.Manager()
+        logger.info("CPUExecutor started process pool with %s workers", self.max_workers)
+
+    def shutdown(self):
+        """Stop the worker pool, dropping jobs that have not started yet."""
+        if self._threads is not None:
+            self._threads.shutdown(wait=True, cancel_futures=True)
+            self._threads = None
+        if not self._shards:
+            return
+
+        logger.info("Shutting down CPUExecutor process pool")
+        for shard in self._shards:
+            shard.shutdown(wait=True, cancel_futures=True)
+        self._shards = []
+        self._pending = []
+        self._manager.shutdown()
+        self._manager = None
+        logger.info("CPUExecutor process pool shut down")
+
+    def _submit(self, key: Optional[str], fn: Callable[..., Any], *args: Any) -> Future:
+        """
+        Submit a call to the worker a job belongs to.
+
+        Args:
+            key: Routing key of the job, None for the least busy worker
+            fn: Callable to execute
+            *args: Positional arguments for the callable
+
+        Returns:
+            Future of the call
+        """
+        if not self._shards:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(thread_name_prefix="cpu-job")
+            return self._threads.submit(fn, *args)
+
+        with self._pending_lock:
+            if key is None:
+                index = min(range(len(self._shards)), key=self._pending.__getitem__)
+            else:
+                index = zlib.crc32(key.encode()) % len(self._shards)
+            self._pending[index] += 1
+
+        try:
+            job = self._shards[index].submit(fn, *args)
+        except BaseException:
+            self._job_done(index)
+            raise
+        job.add_done_callback(lambda _: self._job_done(index))
+        return job
+
+    def _job_done(self, index: int):
+        """Count a finished or cancelled job off its worker."""
+        with self._pending_lock:
+            if index < len(self._pending):
+                self._pending[index] -= 1
+
+    async def run(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        timeout: Optional[float] = None,
+        wait_running: bool = False,
+        key: Optional[str] = None
+    ) -> Any:
+        """
+        Run a picklable callable in the worker pool.
+
+        The job is cancelled if it has not started when the timeout expires
+        or the awaiting task is cancelled. A job that is already running in
+        a worker process runs to completion and its result is discarded.
+
+        Args:
+            func: Callable to execute
+            *args: Positional arguments for the callable
+            timeout: Timeout in seconds, defaults to the executor job timeout
+            wait_running: On cancellation, wait until a job that is already
+                running has finished, so callers budgeting the pool keep
+                their budget while the worker is busy
+            key: Routing key, e.g. the photo's file_unique_id; jobs of one
+                key run in the same worker process
+
+        Returns:
+            Result of the callable
+
+        Raises:
+            TimeoutError: If the job did not finish in time
+        """
+        timeout = self.job_timeout if timeout is None else timeout
+        job = self._submit(key, _call_with_observations, func, self.running, *args)
+        future = asyncio.wrap_future(job)
+
+        try:
+            result, observations = await asyncio.wait_for(asyncio.shield(future), timeout)
+            registry.replay(observations)
+            return result
+        except asyncio.TimeoutError:
+            logger.error("CPU job %s timed out after %ss", getattr(func, "__name__", func), timeout)
+            _abandon(job, future)
+            raise
+        except asyncio.CancelledError:
+            logger.info("CPU job %s cancelled", getattr(func, "__name__", func))
+            _abandon(job, future)
+            if wait_running and not future.done():
+                await asyncio.wait([future])
+            raise
+
+    async def stream(
+        self,
+        func: Callable[..., Iterator[Any]],
+        *args: Any,
+        buffer_size: int,
+        timeout: Optional[float] = None,
+        key: Optional[str] = None
+    ) -> AsyncIterator[Any]:
+        """
+        Run a picklable generator function in the worker pool and yield its items.
+
+        Items are passed through a queue of ``buffer_size`` items as soon
+        as the generator produces them. When the consumer falls behind,
+        the generator blocks on the full queue. One reader thread per stream
+        moves items from the queue to the event loop, taking the next item
+        only once the consumer took the previous one. When the consumer
+        stops early, the generator is closed at its next item, and the
+        reader drops the buffered items and exits.
+
+        Args:
+            func: Generator function to execute
+            *args: Positional arguments for the generator function
+            buffer_size: Maximum number of items produced ahead of the consumer
+            timeout: Maximum seconds to wait for each item, defaults to the
+                executor job timeout
+            key: Routing key, e.g. the photo's file_unique_id; jobs of one
+                key run in the same worker process
+
+        Yields:
+            Items of the generator
+
+        Raises:
+            TimeoutError: If the generator did not produce an item in time
+        """
+        timeout = self.job_timeout if timeout is None else timeout
+        if self._manager is None:
+            buffer, cancelled = queue.Queue(buffer_size), threading.Event()
+        else:
+            buffer, cancelled = self._manager.Queue(buffer_size), self._manager.Event()
+
+        loop = asyncio.get_running_loop()
+        job = self._submit(key, _stream_with_observations, func, args, buffer, cancelled, self.running)
+        future = asyncio.wrap_future(job)
+
+        items: "asyncio.Queue[Tuple[int, Any]]" = asyncio.Queue()
+        taken = threading.Semaphore(0)
+        stopped = threading.Event()
+        reader = threading.Thread(
+            target=_read_stream,
+            args=(buffer, timeout, loop, items, taken, stopped),
+            name="cpu-stream-reader",
+            daemon=True
+        )
+        reader.start()
+        try:
+            while True:
+                kind, item = await items.get()
+                if kind == STREAM_TIMEOUT:
+                    logger.error("CPU stream %s produced nothing for %ss", getattr(func, "__name__", func), timeout)
+                    raise asyncio.TimeoutError(f"No item within {timeout}s")
+                if kind == STREAM_END:
+                    break
+                taken.release()
+                yield item
+
+            registry.replay(await future)
+        finally:
+            cancelled.set()
+            stopped.set()
+            taken.release()
+            if future.done():
+                if not future.cancelled():
+                    future.exception()
+            else:
+                _abandon(job, future)
+
+
+def _read_stream(
+    buffer: Any,
+    timeout: float,
+    loop: asyncio.AbstractEventLoop,
+    items: "asyncio.Queue[Tuple[int, Any]]",
+    taken: threading.Semaphore,
+    stopped: threading.Event
+):
+    """
+    Hand the items of a stream queue to the event loop one at a time.
+
+    Runs in the stream's reader thread. Waiting is done in STREAM_PUT_POLL
+    slices, so the thread notices within that time when the consumer
+    stopped, then drops the items left in the queue.
+
+    Args:
+        buffer: Bounded queue filled by the generator
+        timeout: Maximum seconds to wait for each item
+        loop: Event loop of the consumer
+        items: Queue read by the consumer
+        taken: Released by the consumer for every item it took
+        stopped: Set when the consumer stopped reading
+    """
+    def deliver(message: Tuple[int, Any]) -> bool:
+        try:
+            loop.call_soon_threadsafe(items.put_nowait, message)
+            return True
+        except RuntimeError:
+            return False
+
+    while not stopped.is_set():
+        waited = 0.0
+        while True:
+            try:
+                message = buffer.get(timeout=STREAM_PUT_POLL)
+                break
+            except queue.Empty:
+                waited += STREAM_PUT_POLL
+                if stopped.is_set():
+                    _drain(buffer)
+                    return
+                if waited >= timeout:
+                    message = (STREAM_TIMEOUT, None)
+                    break
+
+        if not deliver(message) or message[0] != STREAM_ITEM:
+            return
+        taken.acquire()
+
+    _drain(buffer)
+
+
+def _abandon(job: Future, future: asyncio.Future):
+    """Cancel a job unless it already runs, and drop its eventual outcome."""
+    job.cancel()
+    future.add_done_callback(lambda done: done.cancelled() or done.exception())
+
+
+def _drain(buffer: Any):
+    """Drop the items left in a stream queue."""
+    try:
+        while True:
+            buffer.get_nowait()
+    except queue.Empty:
+        pass
+
+
+def _stream_with_observations(
+    func: Callable[..., Iterator[Any]],
+    args: Tuple[Any, ...],
+    buffer: Any,
+    cancelled: Any,
+    measure_memory: bool
+) -> List[Observation]:
+    """
+    Put the items of a generator into a queue and collect metric observations.
+
+    In a pool process, the peak memory of the job is observed along with
+    the other metrics. The end marker is put even if the generator raises, so the consumer
+    stops reading and picks the exception up from the future.
+
+    Args:
+        func: Generator function to execute
+        args: Positional arguments for the generator function
+        buffer: Bounded queue read by the consumer
+        cancelled: Event set when the consumer stopped reading
+        measure_memory: Whether the job has its process to itself
+
+    Returns:
+        Captured observations
+    """
+    def put(message: Tuple[int, Any]) -> bool:
+        while not cancelled.is_set():
+            try:
+                buffer.put(message, timeout=STREAM_PUT_POLL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    with capture_observations() as observations, _peak_memory(func, measure_memory):
+        try:
+            generator = func(*args)
+            try:
+                for item in generator:
+                    if not put((STREAM_ITEM, item)):
+                        break
+            finally:
+                generator.close()
+        finally:
+            put((STREAM_END, None))
+    return observations
+
+
+def _call_with_observations(func: Callable[..., Any], measure_memory: bool, *args: Any) -> Tuple[Any, List[Observation]]:
+    """
+    Call a function and collect the metric observations it makes, in a pool process including its peak memory.
+
+    Args:
+        func: Callable to execute
+        measure_memory: Whether the job has its process to itself
+        *args: Positional arguments for the callable
+
+    Returns:
+        Tuple of (result, captured observations)
+    """
+    with capture_observations() as observations, _peak_memory(func, measure_memory):
+        result = func(*args)
+    return result, observations
+
+
+def _peak_memory(func: Callable[..., Any], measure: bool) -> ContextManager[None]:
+    """
+    Track the peak memory of a job, unless it shares the process with the bot.
+
+    Resetting the peak in thread mode would reset the peak of the bot
+    process itself, and the measurement would include everything else it
+    holds.
+    """
+    return track_peak_memory(_job_name(func)) if measure else nullcontext()
+
+
+def _job_name(func: Callable[..., Any]) -> str:
+    """Name a job after its callable."""
+    return getattr(func, "__name__", type(func).__name__)
+
+
+cpu_executor = CPUExecutor(settings.CPU_WORKERS, settings.CPU_JOB_TIMEOUT)
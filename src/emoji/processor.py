@@ -1,99 +1,769 @@
 """Image processing and cropping utilities."""
 
+import hashlib
+import io
 import os
+import time
 from PIL import Image
-from typing import List, Tuple
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
 
 from src.config.logger import get_logger
+from src.config.metrics import decoded_cache_requests_total, stage_seconds, tiles_saved_total
+from src.emoji.decoded import decoded_cache
+from src.emoji.encoder import TileEncoder
 
 logger = get_logger()
 
+ImageSource = Union[str, bytes]
+
+MAX_DRAFT_SCALE = 8
+STRIP_ROWS = 256
+
+
+class ImageTooLarge(ValueError):
+    """Raised when an image has more pixels than the pixel budget allows."""
+
+
+class DecodedImage(NamedTuple):
+    """Working bitmap of a photo."""
+
+    image: Image.Image
+    scale: float
+    cached: bool
+
+
+class TileInfo(NamedTuple):
+    """Pixel digest and blankness of a tile."""
+
+    digest: bytes
+    blank: bool
+
 
 class ImageProcessor:
     """Handles image cropping and emoji preparation."""
 
-    def __init__(self, emoji_size: int = 100):
+    def __init__(
+        self,
+        emoji_size: int = 100,
+        reducing_gap: float = 0.0,
+        encode_profile: str = "smallest",
+        draft_oversample: float = 0.0,
+        max_pixels: int = 0,
+        decode_max_pixels: int = 0
+    ):
         """
         Initialize image processor.
 
         Args:
             emoji_size: Target size for each emoji in pixels
+            reducing_gap: Pillow reducing gap for grid resampling, 0 disables it
+            encode_profile: PNG encode profile name for tiles
+            draft_oversample: Minimum decoded pixels per output pixel when
+                decoding at reduced scale, 0 always decodes at full scale
+            max_pixels: Largest source image accepted in pixels, 0 leaves
+                only Pillow's decompression bomb check
+            decode_max_pixels: Largest working bitmap in pixels, larger
+                images are decoded at reduced scale, 0 disables the limit
         """
         self.emoji_size = emoji_size
-        logger.info(f"ImageProcessor initialized with emoji_size={emoji_size}")
+        self.reducing_gap = reducing_gap
+        self.draft_oversample = draft_oversample
+        self.max_pixels = max_pixels
+        self.decode_max_pixels = decode_max_pixels
+        self.encoder = TileEncoder(encode_profile)
+        logger.info("ImageProcessor initialized with emoji_size=%s, reducing_gap=%s, encode_profile=%s, draft_oversample=%s, max_pixels=%s, decode_max_pixels=%s", emoji_size, reducing_gap, encode_profile, draft_oversample, max_pixels, decode_max_pixels)
 
     def crop_to_grid(
         self,
-        input_path: str,
+        input_path: ImageSource,
         output_folder: str,
         grid_size: Tuple[int, int],
-        padding: int
+        padding: int,
+        image_key: Optional[str] = None,
+        skip_blank: bool = False
     ) -> List[str]:
         """
         Crop image into NxM grid with padding.
 
         Args:
-            input_path: Path to input image
+            input_path: Path to input image or its encoded bytes
             output_folder: Folder to save cropped images
             grid_size: Tuple of (columns, rows)
             padding: Padding value (1-5)
+            image_key: Photo identity for reusing the decoded image
+            skip_blank: Leave out uniform and fully transparent tiles
 
         Returns:
             List of paths to cropped images
         """
-        logger.info(f"Starting crop_to_grid: input={input_path}, grid_size={grid_size}, padding={padding}")
+        logger.info("Starting crop_to_grid: output=%s, grid_size=%s, padding=%s", output_folder, grid_size, padding)
 
         os.makedirs(output_folder, exist_ok=True)
-        logger.debug(f"Created output folder: {output_folder}")
+        logger.debug("Created output folder: %s", output_folder)
+
+        cropped_files = []
+
+        for row, col, data in self._iter_encoded(input_path, grid_size, padding, image_key, skip_blank):
+            output_filename = f"emoji_{row}_{col}.png"
+            output_path = os.path.join(output_folder, output_filename)
+
+            with open(output_path, "wb") as output_file:
+                output_file.write(data)
+            cropped_files.append(output_path)
+
+        logger.info("Successfully cropped %s emoji files", len(cropped_files))
+        return cropped_files
+
+    def crop_to_grid_bytes(
+        self,
+        image_data: ImageSource,
+        grid_size: Tuple[int, int],
+        padding: int,
+        image_key: Optional[str] = None,
+        skip_blank: bool = False
+    ) -> List[bytes]:
+        """
+        Crop image into NxM grid with padding without touching the disk.
+
+        Args:
+            image_data: Encoded input image bytes or path to it
+            grid_size: Tuple of (columns, rows)
+            padding: Padding value (1-5)
+            image_key: Photo identity for reusing the decoded image
+            skip_blank: Leave out uniform and fully transparent tiles
+
+        Returns:
+            List of PNG-encoded tiles in row-major order
+        """
+        logger.info("Starting in-memory crop_to_grid: grid_size=%s, padding=%s", grid_size, padding)
+
+        tiles = list(self.iter_encoded_tiles(image_data, grid_size, padding, image_key, skip_blank))
+
+        logger.info("Successfully cropped %s emoji tiles in memory", len(tiles))
+        return tiles
+
+    def iter_encoded_tiles(
+        self,
+        image_data: ImageSource,
+        grid_size: Tuple[int, int],
+        padding: int,
+        image_key: Optional[str] = None,
+        skip_blank: bool = False
+    ) -> Iterator[bytes]:
+        """
+        Yield PNG-encoded grid cells as soon as each one is encoded.
+
+        Args:
+            image_data: Encoded input image bytes or path to it
+            grid_size: Tuple of (columns, rows)
+            padding: Padding value (1-5)
+            image_key: Photo identity for reusing the decoded image
+            skip_blank: Leave out uniform and fully transparent tiles
+
+        Yields:
+            PNG-encoded tiles in row-major order
+        """
+        for _, _, data in self._iter_encoded(image_data, grid_size, padding, image_key, skip_blank):
+            yield data
+
+    def crop_to_grid_sizes(
+        self,
+        image_data: ImageSource,
+        grid_size: Tuple[int, int],
+        padding: int,
+        sizes: Sequence[int],
+        image_key: Optional[str] = None,
+        skip_blank: bool = False
+    ) -> Dict[int, List[bytes]]:
+        """
+        Crop image into NxM grids of several tile sizes from a single decode.
+
+        The image is decoded once for the largest size, and every smaller
+        grid is resampled from the next larger one, see resample_pyramid().
+        With skip_blank a cell is left out of every size when it is blank at
+        every size, so all grids keep the same positions.
+
+        Args:
+            image_data: Encoded input image bytes or path to it
+            grid_size: Tuple of (columns, rows)
+            padding: Padding value (1-5)
+            sizes: Tile sizes in pixels
+            image_key: Photo identity for reusing the decoded image
+            skip_blank: Leave out uniform and fully transparent tiles
+
+        Returns:
+            Dictionary of tile size to PNG-encoded tiles in row-major order
+        """
+        logger.info("Starting in-memory crop_to_grid: grid_size=%s, padding=%s, sizes=%s", grid_size, padding, sizes)
+
+        levels: Dict[int, List[bytes]] = {size: [] for size in sizes}
+        for _, _, encoded in self._iter_encoded_levels(image_data, grid_size, padding, tuple(levels), image_key, skip_blank):
+            for size, data in encoded.items():
+                levels[size].append(data)
+
+        logger.info("Successfully cropped %s tiles in %s sizes in memory", len(levels[sizes[0]]), len(levels))
+        return levels
+
+    def _iter_encoded(
+        self,
+        source: ImageSource,
+        grid_size: Tuple[int, int],
+        padding: int,
+        image_key: Optional[str],
+        skip_blank: bool
+    ) -> Iterator[Tuple[int, int, bytes]]:
+        """
+        Yield encoded grid cells, encoding each distinct tile only once.
+
+        Tiles with identical pixels yield the same bytes object.
+
+        Args:
+            source: Path to input image or its encoded bytes
+            grid_size: Tuple of (columns, rows)
+            padding: Padding value (1-5)
+            image_key: Photo identity for reusing the decoded image
+            skip_blank: Leave out uniform and fully transparent tiles
+
+        Yields:
+            Tuples of (row, col, PNG-encoded tile)
+        """
+        size = self.emoji_size
+        for row, col, encoded in self._iter_encoded_levels(source, grid_size, padding, (size,), image_key, skip_blank):
+            yield row, col, encoded[size]
+
+    def _iter_encoded_levels(
+        self,
+        source: ImageSource,
+        grid_size: Tuple[int, int],
+        padding: int,
+        sizes: Tuple[int, ...],
+        image_key: Optional[str],
+        skip_blank: bool
+    ) -> Iterator[Tuple[int, int, Dict[int, bytes]]]:
+        """
+        Yield encoded grid cells in every size, encoding each distinct tile only once.
+
+        Tiles with identical pixels yield the same bytes object. A cell is
+        blank when it is blank at every size.
+
+        Args:
+            source: Path to input image or its encoded bytes
+            grid_size: Tuple of (columns, rows)
+            padding: Padding value (1-5)
+            sizes: Tile sizes in pixels
+            image_key: Photo identity for reusing the decoded image
+            skip_blank: Leave out uniform and fully transparent tiles
+
+        Yields:
+            Tuples of (row, col, dictionary of tile size to PNG-encoded tile)
+        """
+        encoded: Dict[bytes, bytes] = {}
+        duplicates = 0
+        blanks = 0
+        encode_seconds = 0.0
+        try:
+            for row, col, tiles in self.iter_tile_levels(source, grid_size, padding, sizes, image_key):
+                infos = {size: self.analyze_tile(tile) for size, tile in tiles.items()}
+                if skip_blank and all(info.blank for info in infos.values()):
+                    blanks += len(tiles)
+                    continue
+
+                cell: Dict[int, bytes] = {}
+                for size, tile in tiles.items():
+                    digest = infos[size].digest
+                    data = encoded.get(digest)
+                    if data is None:
+                        start = time.perf_counter()
+                        data = encoded[digest] = self.encoder.encode(tile)
+                        encode_seconds += time.perf_counter() - start
+                    else:
+                        duplicates += 1
+                    cell[size] = data
+                yield row, col, cell
+        finally:
+            stage_seconds.observe(encode_seconds, "encode")
+            tiles_saved_total.inc("encode", amount=duplicates)
+            tiles_saved_total.inc("blank", amount=blanks)
+            if duplicates or blanks:
+                logger.info("Saved %s tile encodes: %s duplicate tiles, %s blank tiles omitted", duplicates + blanks, duplicates, blanks)
+
+    @staticmethod
+    def analyze_tile(tile: Image.Image) -> TileInfo:
+        """
+        Hash the pixels of a tile and check whether it is blank.
+
+        Both checks run over the whole pixel buffer in C: the digest over
+        the raw bytes, the blank check over the per-band extrema. A tile is
+        blank when every band is constant or its alpha is zero everywhere.
+
+        Args:
+            tile: RGBA tile
+
+        Returns:
+            TileInfo of the tile
+        """
+        digest = hashlib.blake2b(tile.tobytes(), digest_size=16).digest()
+        extrema = tile.getextrema()
+        if tile.mode == "RGBA" and extrema[3][1] == 0:
+            return TileInfo(digest, True)
+        return TileInfo(digest, all(low == high for low, high in extrema))
+
+    def iter_tiles(
+        self,
+        source: ImageSource,
+        grid_size: Tuple[int, int],
+        padding: int,
+        image_key: Optional[str] = None
+    ) -> Iterator[Tuple[int, int, Image.Image]]:
+        """
+        Yield resized grid cells of an image in row-major order.
+
+        Args:
+            source: Path to input image or its encoded bytes
+            grid_size: Tuple of (columns, rows)
+            padding: Padding value (1-5)
+            image_key: Photo identity for reusing the decoded image
+
+        Yields:
+            Tuples of (row, col, tile image)
+        """
+        size = self.emoji_size
+        for row, col, tiles in self.iter_tile_levels(source, grid_size, padding, (size,), image_key):
+            yield row, col, tiles[size]
+
+    def iter_tile_levels(
+        self,
+        source: ImageSource,
+        grid_size: Tuple[int, int],
+        padding: int,
+        sizes: Sequence[int],
+        image_key: Optional[str] = None
+    ) -> Iterator[Tuple[int, int, Dict[int, Image.Image]]]:
+        """
+        Yield grid cells of an image in several sizes in row-major order.
+
+        Args:
+            source: Path to input image or its encoded bytes
+            grid_size: Tuple of (columns, rows)
+            padding: Padding value (1-5)
+            sizes: Tile sizes in pixels
+            image_key: Photo identity for reusing the decoded image
+
+        Yields:
+            Tuples of (row, col, dictionary of tile size to tile image)
+        """
+        work, scale, cached = self.decode(source, image_key, grid_size, padding, max(sizes))
+        try:
+            with stage_seconds.time("resample"):
+                levels = self.resample_pyramid(work, grid_size, padding, sizes, scale)
+        finally:
+            if not cached:
+                work.close()
+
+        for size, grid in levels.items():
+            if grid.mode != "RGBA":
+                levels[size] = grid.convert("RGBA")
+                grid.close()
+
+        cols, rows = grid_size
+
+        try:
+            for row in range(rows):
+                for col in range(cols):
+                    yield row, col, {
+                        size: grid.crop((col * size, row * size, (col + 1) * size, (row + 1) * size))
+                        for size, grid in levels.items()
+                    }
+        finally:
+            for grid in levels.values():
+                grid.close()
+
+    def decode(
+        self,
+        source: ImageSource,
+        image_key: Optional[str] = None,
+        grid_size: Optional[Tuple[int, int]] = None,
+        padding: int = 0,
+        emoji_size: Optional[int] = None
+    ) -> DecodedImage:
+        """
+        Decode an image into RGB, or RGBA if it has transparency.
+
+        Given a grid, the image is decoded at the smallest scale from
+        decode_scale(), and always small enough for decode_max_pixels:
+        JPEG photos are scaled in the DCT domain by Pillow's draft mode,
+        other formats are reduced right after decoding. Reductions run in
+        strips of STRIP_ROWS rows, so neither a full-size converted copy nor
+        the premultiplied copy Pillow makes to reduce images with alpha is
+        ever held next to the decoded source.
+
+        With an image key the decoded bitmap is looked up in and stored to
+        the decoded image cache, so the same photo is decoded at most once
+        per scale while it stays resident.
+
+        Args:
+            source: Path to input image or its encoded bytes
+            image_key: Photo identity, e.g. the Telegram file_unique_id
+            grid_size: Tuple of (columns, rows) the image will be cut into
+            padding: Padding value (1-5)
+            emoji_size: Largest tile size the image will be resampled to,
+                defaults to emoji_size of the processor
+
+        Returns:
+            DecodedImage with the bitmap, the number of source pixels per
+            decoded pixel and whether the bitmap is owned by the cache
+
+        Raises:
+            ImageTooLarge: If the image exceeds the pixel budget
+        """
+        img = work = self._open_image(source)
+        source_width, source_height = img.size
+        target_scale = max(
+            self.decode_scale(img.size, grid_size, padding, emoji_size) if grid_size else 1,
+            self.budget_scale(img.size)
+        )
+
+        cache_key = f"{image_key}@{target_scale}" if image_key and decoded_cache.enabled else None
+        if cache_key:
+            cached = decoded_cache.get(cache_key)
+            decoded_cache_requests_total.inc("hit" if cached is not None else "miss")
+            if cached is not None:
+                logger.debug("Reusing decoded image %s", cache_key)
+                img.close()
+                return DecodedImage(cached, source_width / cached.width, True)
+
+        try:
+            with stage_seconds.time("decode"):
+                if target_scale > 1 and img.format == "JPEG":
+                    img.draft(None, (img.width // target_scale, img.height // target_scale))
+                img.load()
+
+                work_mode = "RGBA" if self._has_alpha(img) else "RGB"
+                remaining = round(target_scale * img.width / source_width)
+                if remaining > 1:
+                    logger.debug("Reducing %s image by %s into %s in strips", img.mode, remaining, work_mode)
+                    work = self._reduce_strips(img, work_mode, remaining)
+                elif img.mode != work_mode:
+                    logger.debug("Converting image from %s to %s", img.mode, work_mode)
+                    work = img.convert(work_mode)
+
+                if cache_key and work is img:
+                    work = img.copy()
+        finally:
+            if work is not img:
+                img.close()
+
+        scale = source_width / work.width
+        if scale > 1:
+            logger.debug("Decoded %sx%s image at 1/%.2f scale: %sx%s", source_width, source_height, scale, work.width, work.height)
+
+        if cache_key and decoded_cache.put(cache_key, work):
+            return DecodedImage(work, scale, True)
+        return DecodedImage(work, scale, False)
+
+    def decode_scale(
+        self,
+        size: Tuple[int, int],
+        grid_size: Tuple[int, int],
+        padding: int,
+        emoji_size: Optional[int] = None
+    ) -> int:
+        """
+        Pick the smallest decode scale that keeps enough pixels for the grid.
+
+        The padded cells of the decoded image must keep at least
+        draft_oversample pixels per output pixel on both axes, so the
+        final LANCZOS pass still downsamples.
+
+        Args:
+            size: Full image (width, height)
+            grid_size: Tuple of (columns, rows)
+            padding: Padding value (1-5)
+            emoji_size: Output tile size, defaults to emoji_size of the processor
+
+        Returns:
+            Power-of-two reduction factor between 1 and 8
+        """
+        if not self.draft_oversample:
+            return 1
+
+        emoji_size = emoji_size or self.emoji_size
+        width, height = size
+        cols, rows = grid_size
+        inner_width = cols * (width // cols - 4 * padding)
+        inner_height = rows * (height // rows - 4 * padding)
+        if inner_width <= 0 or inner_height <= 0:
+            return 1
+
+        limit = min(
+            inner_width / (cols * emoji_size),
+            inner_height / (rows * emoji_size)
+        ) / self.draft_oversample
+
+        scale = 1
+        while scale * 2 <= min(limit, MAX_DRAFT_SCALE):
+            scale *= 2
+        return scale
+
+    def budget_scale(self, size: Tuple[int, int]) -> int:
+        """
+        Pick the smallest decode scale that fits the working bitmap budget.
+
+        Args:
+            size: Full image (width, height)
+
+        Returns:
+            Power-of-two reduction factor, 1 if the image fits or no budget is set
+        """
+        width, height = size
+        scale = 1
+        if self.decode_max_pixels:
+            while (width // scale) * (height // scale) > self.decode_max_pixels:
+                scale *= 2
+        return scale
+
+    @staticmethod
+    def _reduce_strips(img: Image.Image, mode: str, factor: int) -> Image.Image:
+        """
+        Convert and reduce a decoded image strip by strip.
+
+        Strips start on multiples of ``factor`` rows, so the result equals
+        ``img.convert(mode).reduce(factor)`` while only one strip is held
+        besides the source and the result.
+
+        Args:
+            img: Loaded source image
+            mode: Working pixel mode
+            factor: Reduction factor on both axes
+
+        Returns:
+            Reduced image in the working mode
+        """
+        width, height = img.size
+        reduced = Image.new(mode, (-(-width // factor), -(-height // factor)))
+        strip_rows = factor * max(1, STRIP_ROWS // factor)
+        for top in range(0, height, strip_rows):
+            with img.crop((0, top, width, min(height, top + strip_rows))) as strip:
+                with strip.convert(mode) as converted:
+                    with converted.reduce(factor) as part:
+                        reduced.paste(part, (0, top // factor))
+        return reduced
+
+    def resample_grid(
+        self,
+        img: Image.Image,
+        grid_size: Tuple[int, int],
+        padding: int,
+        scale: float = 1.0
+    ) -> Image.Image:
+        """
+        Resample the padded cells of an image into one grid image.
+
+        Every cell is cropped to ``cell - 2 * padding_pixels`` on each axis,
+        exactly as if the cells were cut one by one, and resized to
+        ``emoji_size``. The emoji of a cell is the ``emoji_size`` square at
+        ``(col*emoji_size, row*emoji_size)``. See _resample_cells() for how
+        this stays identical to resizing every cell on its own.
 
-        logger.info(f"Opening image: {input_path}")
-        img = Image.open(input_path)
+        Args:
+            img: Decoded RGB or RGBA image
+            grid_size: Tuple of (columns, rows)
+            padding: Padding value (1-5)
+            scale: Source pixels per pixel of img, padding is given in
+                source pixels
 
-        if img.mode != "RGBA":
-            logger.debug(f"Converting image from {img.mode} to RGBA")
-            img = img.convert("RGBA")
+        Returns:
+            Resampled grid image
 
+        Raises:
+            ValueError: If the padding leaves no pixels inside a cell
+        """
+        return self.resample_pyramid(img, grid_size, padding, (self.emoji_size,), scale)[self.emoji_size]
+
+    def resample_pyramid(
+        self,
+        img: Image.Image,
+        grid_size: Tuple[int, int],
+        padding: int,
+        sizes: Sequence[int],
+        scale: float = 1.0
+    ) -> Dict[int, Image.Image]:
+        """
+        Resample the padded cells of an image to several tile sizes.
+
+        The cells are resampled as in resample_grid() to the largest size.
+        Every smaller size is then resampled cell by cell from the nearest
+        larger level instead of from the source, so each level costs a
+        resample of the previous, already reduced one.
+
+        Args:
+            img: Decoded RGB or RGBA image
+            grid_size: Tuple of (columns, rows)
+            padding: Padding value (1-5)
+            sizes: Tile sizes in pixels
+            scale: Source pixels per pixel of img, padding is given in
+                source pixels
+
+        Returns:
+            Dictionary of tile size to resampled grid image
+
+        Raises:
+            ValueError: If the padding leaves no pixels inside a cell
+        """
+        cols, rows = grid_size
+        column_boxes, row_boxes = self._cell_boxes(img, grid_size, padding, scale)
+
+        levels: Dict[int, Image.Image] = {}
+        level = img
+        for size in sorted(set(sizes), reverse=True):
+            level = levels[size] = self._resample_cells(level, column_boxes, row_boxes, size)
+            column_boxes = [(col * size, (col + 1) * size) for col in range(cols)]
+            row_boxes = [(row * size, (row + 1) * size) for row in range(rows)]
+        return levels
+
+    def _cell_boxes(
+        self,
+        img: Image.Image,
+        grid_size: Tuple[int, int],
+        padding: int,
+        scale: float
+    ) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
+        """
+        Compute the padded extent of every grid column and row.
+
+        Args:
+            img: Decoded RGB or RGBA image
+            grid_size: Tuple of (columns, rows)
+            padding: Padding value (1-5)
+            scale: Source pixels per pixel of img
+
+        Returns:
+            Tuple of ((left, right) per column, (top, bottom) per row)
+
+        Raises:
+            ValueError: If the padding leaves no pixels inside a cell
+        """
         cols, rows = grid_size
         img_width, img_height = img.size
-        logger.info(f"Image size: {img_width}x{img_height}, Grid: {cols}x{rows} ({cols*rows} total emojis)")
+        logger.info("Image size: %sx%s, Grid: %sx%s (%s total emojis)", img_width, img_height, cols, rows, cols * rows)
 
         cell_width = img_width // cols
         cell_height = img_height // rows
-        logger.debug(f"Cell dimensions: {cell_width}x{cell_height}")
+        logger.debug("Cell dimensions: %sx%s", cell_width, cell_height)
+
+        padding_pixels = round(padding * 2 / scale)
+        logger.debug("Padding pixels: %s", padding_pixels)
+
+        inner_width = cell_width - 2 * padding_pixels
+        inner_height = cell_height - 2 * padding_pixels
+        if inner_width <= 0 or inner_height <= 0:
+            raise ValueError(f"Image {img_width}x{img_height} is too small for grid {cols}x{rows} with padding {padding}")
+
+        column_boxes = [
+            (col * cell_width + padding_pixels, col * cell_width + padding_pixels + inner_width)
+            for col in range(cols)
+        ]
+        row_boxes = [
+            (row * cell_height + padding_pixels, row * cell_height + padding_pixels + inner_height)
+            for row in range(rows)
+        ]
+        return column_boxes, row_boxes
+
+    def _resample_cells(
+        self,
+        img: Image.Image,
+        column_boxes: List[Tuple[int, int]],
+        row_boxes: List[Tuple[int, int]],
+        size: int
+    ) -> Image.Image:
+        """
+        Resize every cell to ``size`` in two separable passes.
 
-        padding_pixels = padding * 2
-        logger.debug(f"Padding pixels: {padding_pixels}")
+        Pillow resizes horizontally, then vertically, and each output pixel
+        only reads input pixels of the same row or column. Resizing every
+        column strip horizontally and then every row strip of that result
+        vertically therefore gives each cell exactly the pixels of resizing
+        it alone, without the filter reaching into neighbouring cells. Alpha
+        is premultiplied per strip and unpremultiplied once at the end, as a
+        single Pillow resize does.
 
-        cropped_files = []
+        Args:
+            img: RGB or RGBA image, or a premultiplied RGBa level
+            column_boxes: (left, right) of every grid column
+            row_boxes: (top, bottom) of every grid row
+            size: Tile size in pixels
+
+        Returns:
+            Grid image of ``cols*size x rows*size`` in the mode of img
+        """
+        mode = {"RGBA": "RGBa"}.get(img.mode, img.mode)
+        reducing_gap = self.reducing_gap or None
+
+        columns = Image.new(mode, (len(column_boxes) * size, img.height))
+        for col, (left, right) in enumerate(column_boxes):
+            strip = img.crop((left, 0, right, img.height))
+            if strip.mode != mode:
+                strip = strip.convert(mode)
+            with strip.resize((size, img.height), Image.Resampling.LANCZOS, reducing_gap=reducing_gap) as resized:
+                columns.paste(resized, (col * size, 0))
+            strip.close()
+
+        grid = Image.new(mode, (columns.width, len(row_boxes) * size))
+        for row, (top, bottom) in enumerate(row_boxes):
+            with columns.crop((0, top, columns.width, bottom)) as strip:
+                with strip.resize((columns.width, size), Image.Resampling.LANCZOS, reducing_gap=reducing_gap) as resized:
+                    grid.paste(resized, (0, row * size))
+        columns.close()
+
+        if grid.mode != img.mode:
+            converted = grid.convert(img.mode)
+            grid.close()
+            grid = converted
+        return grid
+
+    @staticmethod
+    def _has_alpha(img: Image.Image) -> bool:
+        """
+        Check whether an image carries transparency.
 
-        for row in range(rows):
-            for col in range(cols):
-                left = col * cell_width + padding_pixels
-                top = row * cell_height + padding_pixels
-                right = (col + 1) * cell_width - padding_pixels
-                bottom = (row + 1) * cell_height - padding_pixels
+        Args:
+            img: Opened PIL image
 
-                left = max(0, left)
-                top = max(0, top)
-                right = min(img_width, right)
-                bottom = min(img_height, bottom)
+        Returns:
+            True if the image has an alpha channel or transparent color
+        """
+        return img.mode in ("RGBA", "LA", "PA", "La", "RGBa") or "transparency" in img.info
 
-                cropped = img.crop((left, top, right, bottom))
+    def _open_image(self, source: ImageSource) -> Image.Image:
+        """
+        Open an image from a path or from encoded bytes.
 
-                cropped_resized = cropped.resize(
-                    (self.emoji_size, self.emoji_size),
-                    Image.Resampling.LANCZOS
-                )
+        Only the header is read, so the pixel budget is checked before any
+        pixel data is decoded.
 
-                output_filename = f"emoji_{row}_{col}.png"
-                output_path = os.path.join(output_folder, output_filename)
+        Args:
+            source: Path to image or its encoded bytes
 
-                cropped_resized.save(output_path, "PNG", optimize=True)
-                cropped_files.append(output_path)
+        Returns:
+            Opened PIL image
 
-        logger.info(f"Successfully cropped {len(cropped_files)} emoji files")
-        img.close()
-        return cropped_files
+        Raises:
+            ImageTooLarge: If the image exceeds the pixel budget or Pillow's
+                decompression bomb limit
+        """
+        try:
+            if isinstance(source, (bytes, bytearray)):
+                img = Image.open(io.BytesIO(source))
+            else:
+                img = Image.open(source)
+        except Image.DecompressionBombError as e:
+            raise ImageTooLarge(str(e)) from e
+
+        if self.max_pixels and img.width * img.height > self.max_pixels:
+            width, height = img.size
+            img.close()
+            raise ImageTooLarge(f"Image {width}x{height} exceeds the pixel budget of {self.max_pixels}")
+        return img
 
     def suggest_grid_sizes(self, width: int, height: int) -> List[Tuple[int, int]]:
         """
@@ -106,9 +776,9 @@ class ImageProcessor:
         Returns:
             List of suggested grid sizes
         """
-        logger.info(f"Calculating grid suggestions for {width}x{height}")
+        logger.info("Calculating grid suggestions for %sx%s", width, height)
         aspect_ratio = width / height
-        logger.debug(f"Aspect ratio: {aspect_ratio:.2f}")
+        logger.debug("Aspect ratio: %.2f", aspect_ratio)
 
         target_counts = [21, 36, 56, 72]
 
@@ -136,21 +806,24 @@ class ImageProcessor:
                 unique_sizes.append(size)
 
         result = unique_sizes[:5]
-        logger.info(f"Suggested grid sizes: {result}")
+        logger.info("Suggested grid sizes: %s", result)
         return result
 
-    def get_image_dimensions(self, path: str) -> Tuple[int, int]:
+    def get_image_dimensions(self, path: ImageSource) -> Tuple[int, int]:
         """
-        Get image dimensions.
+        Get image dimensions from the header without decoding pixel data.
 
         Args:
-            path: Path to image
+            path: Path to image or its encoded bytes
 
         Returns:
             Tuple of (width, height)
+
+        Raises:
+            ImageTooLarge: If the image exceeds the pixel budget
         """
-        logger.debug(f"Getting dimensions for: {path}")
-        with Image.open(path) as img:
+        logger.debug("Getting image dimensions")
+        with self._open_image(path) as img:
             dimensions = img.size
-            logger.info(f"Image dimensions: {dimensions[0]}x{dimensions[1]}")
+            logger.info("Image dimensions: %sx%s", dimensions[0], dimensions[1])
             return dimensions
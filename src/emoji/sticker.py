@@ -1,82 +1,521 @@
 """Sticker pack creation and management."""
 
+import asyncio
 import time
-from typing import List
+from contextlib import aclosing
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple, TypeVar, Union
 from telegram import Bot, InputSticker
-from telegram.constants import StickerFormat
+from telegram.constants import StickerFormat, StickerType
+from telegram.error import BadRequest, NetworkError, RetryAfter
 
+from src.config import settings
 from src.config.logger import get_logger
+from src.config.metrics import errors_total, stage_seconds, tiles_saved_total
 
 logger = get_logger()
 
+T = TypeVar("T")
+
+EmojiFile = Union[str, bytes]
+ProgressCallback = Callable[[int, Optional[int]], Awaitable[None]]
+
+STICKER_SIZE = 512
+
+PACK_LINKS = {
+    StickerType.CUSTOM_EMOJI: "https://t.me/addemoji/{name}",
+    StickerType.REGULAR: "https://t.me/addstickers/{name}",
+}
+MAX_PACK_SIZES = {
+    StickerType.CUSTOM_EMOJI: 200,
+    StickerType.REGULAR: 120,
+}
+PACK_PREFIXES = {
+    StickerType.CUSTOM_EMOJI: "emoji",
+    StickerType.REGULAR: "stickers",
+}
+MAX_PACK_NAME_LENGTH = 64
+
 
 class StickerPackCreator:
-    """Handles creation of custom emoji sticker packs."""
+    """Handles creation of custom emoji and regular sticker packs."""
 
-    def __init__(self, bot: Bot):
+    def __init__(
+        self,
+        bot: Bot,
+        upload_concurrency: int = settings.STICKER_UPLOAD_CONCURRENCY,
+        initial_chunk_size: int = settings.STICKER_INITIAL_CHUNK,
+        max_retries: int = settings.STICKER_UPLOAD_RETRIES,
+        progress_interval: float = settings.UPLOAD_PROGRESS_INTERVAL
+    ):
         """
         Initialize sticker pack creator.
 
         Args:
             bot: Telegram bot instance
+            upload_concurrency: Maximum number of concurrent tile uploads
+            initial_chunk_size: Number of stickers passed to create_new_sticker_set
+            max_retries: Retries for a single API call on transient errors
+            progress_interval: Minimum seconds between upload progress reports
         """
         self.bot = bot
-        logger.info(f"StickerPackCreator initialized with bot: {bot.username}")
+        self.upload_concurrency = upload_concurrency
+        self.initial_chunk_size = initial_chunk_size
+        self.max_retries = max_retries
+        self.progress_interval = progress_interval
+        logger.info("StickerPackCreator initialized with bot: %s", bot.username)
 
     async def create_emoji_pack(
         self,
         user_id: int,
-        emoji_files: List[str],
-        pack_title: str = None
+        emoji_files: Union[Iterable[EmojiFile], AsyncIterable[EmojiFile]],
+        pack_title: str = None,
+        total: Optional[int] = None,
+        on_progress: Optional[ProgressCallback] = None
     ) -> str:
         """
         Create custom emoji sticker pack.
 
+        Tiles are uploaded concurrently with upload_sticker_file while later
+        tiles are still being produced, identical tiles only once, the set
+        is created from the first chunk of file ids and the remaining
+        stickers are appended in order with add_sticker_to_set.
+
         Args:
             user_id: Telegram user ID
-            emoji_files: List of paths to emoji images
+            emoji_files: Paths to emoji images or PNG-encoded tiles, or an
+                async iterable producing them
             pack_title: Custom pack title
+            total: Number of tiles, defaults to the length of emoji_files,
+                None if unknown
+            on_progress: Called with (uploaded, total) at most every
+                progress_interval seconds while uploading
 
         Returns:
             URL to the created emoji pack
         """
-        logger.info(f"User {user_id} creating emoji pack with {len(emoji_files)} stickers")
+        return await self.create_pack(
+            user_id,
+            emoji_files,
+            StickerType.CUSTOM_EMOJI,
+            pack_title,
+            total,
+            on_progress
+        )
+
+    async def create_packs(
+        self,
+        user_id: int,
+        emoji_files: List[EmojiFile],
+        sticker_files: List[EmojiFile],
+        pack_title: str = None,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> Tuple[str, str]:
+        """
+        Create a custom emoji pack and a regular sticker pack in parallel.
+
+        Both packs share the upload_concurrency upload slots. If one pack
+        fails, the other is cancelled.
+
+        Args:
+            user_id: Telegram user ID
+            emoji_files: Custom emoji tiles
+            sticker_files: Regular sticker tiles of STICKER_SIZE pixels
+            pack_title: Custom title of both packs
+            on_progress: Called with (uploaded, total) over both packs at
+                most every progress_interval seconds while uploading
+
+        Returns:
+            Tuple of (emoji pack URL, sticker pack URL)
+        """
+        semaphore = asyncio.Semaphore(self.upload_concurrency)
+        total = len(emoji_files) + len(sticker_files)
+        uploaded: Dict[str, int] = {}
+        last_report = 0.0
+
+        def pack_progress(sticker_type: str) -> Optional[ProgressCallback]:
+            if on_progress is None:
+                return None
+
+            async def report(count: int, _: Optional[int]):
+                nonlocal last_report
+                uploaded[sticker_type] = count
+                now = time.monotonic()
+                if now - last_report >= self.progress_interval:
+                    last_report = now
+                    await on_progress(sum(uploaded.values()), total)
+            return report
+
+        tasks = [
+            asyncio.create_task(self.create_pack(
+                user_id,
+                files,
+                sticker_type,
+                pack_title,
+                len(files),
+                pack_progress(sticker_type),
+                semaphore
+            ))
+            for sticker_type, files in (
+                (StickerType.CUSTOM_EMOJI, emoji_files),
+                (StickerType.REGULAR, sticker_files),
+            )
+        ]
+        try:
+            emoji_link, sticker_link = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return emoji_link, sticker_link
+
+    async def create_pack(
+        self,
+        user_id: int,
+        emoji_files: Union[Iterable[EmojiFile], AsyncIterable[EmojiFile]],
+        sticker_type: str,
+        pack_title: str = None,
+        total: Optional[int] = None,
+        on_progress: Optional[ProgressCallback] = None,
+        semaphore: Optional[asyncio.Semaphore] = None
+    ) -> str:
+        """
+        Create a sticker pack of the given type.
+
+        Args:
+            user_id: Telegram user ID
+            emoji_files: Paths to sticker images or PNG-encoded tiles, or an
+                async iterable producing them
+            sticker_type: StickerType.CUSTOM_EMOJI or StickerType.REGULAR
+            pack_title: Custom pack title
+            total: Number of tiles, defaults to the length of emoji_files,
+                None if unknown
+            on_progress: Called with (uploaded, total) at most every
+                progress_interval seconds while uploading
+            semaphore: Upload slots shared with other packs, defaults to
+                upload_concurrency slots of this pack
+
+        Returns:
+            URL to the created pack
+        """
+        if total is None and hasattr(emoji_files, "__len__"):
+            total = len(emoji_files)
+        logger.info("User %s creating %s pack with %s stickers", user_id, sticker_type, total)
 
         timestamp = int(time.time())
-        pack_name = f"emoji_{user_id}_{timestamp}_by_{self.bot.username}"
-        logger.info(f"User {user_id} pack name: {pack_name}")
+        pack_name = self._pack_name(sticker_type, user_id, timestamp)
+        logger.info("User %s pack name: %s", user_id, pack_name)
 
         if not pack_title:
-            pack_title = f"Emoji Pack {timestamp}"
-
-        logger.info(f"User {user_id} pack title: {pack_title}")
-
-        logger.info(f"User {user_id} preparing stickers for pack")
-        stickers = []
-        for idx, emoji_path in enumerate(emoji_files):
-            logger.debug(f"User {user_id} loading sticker {idx+1}/{len(emoji_files)}: {emoji_path}")
-            with open(emoji_path, "rb") as img_file:
-                sticker = InputSticker(
-                    sticker=img_file.read(),
-                    emoji_list=["😀"],
-                    format=StickerFormat.STATIC
-                )
-                stickers.append(sticker)
+            pack_title = f"Emoji Pack {timestamp}" if sticker_type == StickerType.CUSTOM_EMOJI else f"Sticker Pack {timestamp}"
+
+        logger.info("User %s pack title: %s", user_id, pack_title)
 
-        logger.info(f"User {user_id} calling Telegram API to create sticker set")
+        logger.info("User %s uploading %s sticker files", user_id, total)
         try:
-            await self.bot.create_new_sticker_set(
-                user_id=user_id,
-                name=pack_name,
-                title=pack_title,
-                stickers=stickers,
-                sticker_type="custom_emoji"
+            with stage_seconds.time("upload_files"):
+                file_ids = await self._upload_sticker_files(user_id, emoji_files, total, on_progress, semaphore)
+        except Exception:
+            errors_total.inc("upload_files")
+            raise
+
+        stickers = [
+            InputSticker(
+                sticker=file_id,
+                emoji_list=["😀"],
+                format=StickerFormat.STATIC
             )
-            logger.info(f"User {user_id} sticker set created successfully")
+            for file_id in file_ids
+        ]
+        initial, remaining = stickers[:self.initial_chunk_size], stickers[self.initial_chunk_size:]
+
+        logger.info("User %s calling Telegram API to create sticker set with %s stickers", user_id, len(initial))
+        stage = "create_set"
+        try:
+            with stage_seconds.time("create_set"):
+                await self._with_retries(
+                    lambda: self.bot.create_new_sticker_set(
+                        user_id=user_id,
+                        name=pack_name,
+                        title=pack_title,
+                        stickers=initial,
+                        sticker_type=sticker_type
+                    ),
+                    "User %s create_new_sticker_set",
+                    user_id,
+                    applied=lambda: self._sticker_set_size_reached(pack_name, 1)
+                )
+            logger.info("User %s sticker set created successfully", user_id)
+
+            stage = "add_stickers"
+            with stage_seconds.time("add_stickers"):
+                for idx, sticker in enumerate(remaining, start=len(initial) + 1):
+                    logger.debug("User %s adding sticker %s/%s to set", user_id, idx, len(stickers))
+                    await self._with_retries(
+                        lambda sticker=sticker: self.bot.add_sticker_to_set(
+                            user_id=user_id,
+                            name=pack_name,
+                            sticker=sticker
+                        ),
+                        "User %s add_sticker_to_set %s",
+                        user_id,
+                        idx,
+                        applied=lambda idx=idx: self._sticker_set_size_reached(pack_name, idx)
+                    )
+            if remaining:
+                logger.info("User %s added %s more stickers to set", user_id, len(remaining))
         except Exception as e:
-            logger.error(f"User {user_id} failed to create sticker set: {e}", exc_info=True)
+            errors_total.inc(stage)
+            logger.error("User %s failed to create sticker set: %s", user_id, e, exc_info=True)
             raise
 
-        pack_url = f"https://t.me/addemoji/{pack_name}"
-        logger.info(f"User {user_id} pack URL: {pack_url}")
+        pack_url = PACK_LINKS[sticker_type].format(name=pack_name)
+        logger.info("User %s pack URL: %s", user_id, pack_url)
         return pack_url
+
+    async def _upload_sticker_files(
+        self,
+        user_id: int,
+        emoji_files: Union[Iterable[EmojiFile], AsyncIterable[EmojiFile]],
+        total: Optional[int],
+        on_progress: Optional[ProgressCallback],
+        semaphore: Optional[asyncio.Semaphore] = None
+    ) -> List[str]:
+        """
+        Upload tiles as they arrive, at most upload_concurrency at a time.
+
+        The next tile is only taken from emoji_files once an upload slot is
+        free, so a producer feeding the iterable is held back by the uploads.
+        A tile identical to an earlier one reuses that tile's upload.
+
+        Args:
+            user_id: Telegram user ID
+            emoji_files: Tiles or an async iterable producing them
+            total: Number of tiles in the pack, None if unknown
+            on_progress: Called with (uploaded, total) while uploading
+            semaphore: Upload slots shared with other packs, defaults to
+                upload_concurrency slots of this call
+
+        Returns:
+            Telegram file ids in tile order
+
+        Raises:
+            ValueError: If there are no tiles
+        """
+        semaphore = semaphore or asyncio.Semaphore(self.upload_concurrency)
+        tasks: List[asyncio.Task] = []
+        uploads: Dict[bytes, asyncio.Task] = {}
+        positions: Dict[asyncio.Task, int] = {}
+        succeeded: Set[asyncio.Task] = set()
+        uploaded = 0
+        failed = False
+        last_report = time.monotonic()
+        report: Optional[asyncio.Task] = None
+
+        async def report_progress(count: int):
+            try:
+                await on_progress(count, total)
+            except Exception as e:
+                logger.warning("User %s upload progress update failed: %s", user_id, e)
+
+        def finished(task: asyncio.Task):
+            nonlocal uploaded, failed, last_report, report
+            semaphore.release()
+            if task.cancelled() or task.exception() is not None:
+                failed = True
+                return
+            succeeded.add(task)
+            uploaded += positions[task]
+            now = time.monotonic()
+            if on_progress and now - last_report >= self.progress_interval and (report is None or report.done()):
+                last_report = now
+                report = asyncio.create_task(report_progress(uploaded))
+
+        tiles = emoji_files if hasattr(emoji_files, "aclose") else _aiter(emoji_files)
+        try:
+            async with aclosing(tiles):
+                async for emoji_file in tiles:
+                    sticker_data = emoji_file if isinstance(emoji_file, bytes) else _read_file(emoji_file)
+
+                    task = uploads.get(sticker_data)
+                    if task is not None:
+                        positions[task] += 1
+                        if task in succeeded:
+                            uploaded += 1
+                        tasks.append(task)
+                        continue
+
+                    await semaphore.acquire()
+                    if failed:
+                        semaphore.release()
+                        break
+                    task = asyncio.create_task(self._upload_sticker_file(user_id, len(tasks), sticker_data, total))
+                    uploads[sticker_data] = task
+                    positions[task] = 1
+                    task.add_done_callback(finished)
+                    tasks.append(task)
+
+            if not tasks:
+                raise ValueError("No tiles to upload")
+            file_ids = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in uploads.values():
+                task.cancel()
+            raise
+        finally:
+            if report is not None:
+                await report
+
+        saved = len(tasks) - len(uploads)
+        if saved:
+            tiles_saved_total.inc("upload", amount=saved)
+            logger.info("User %s uploaded %s distinct tiles for %s stickers, %s uploads saved", user_id, len(uploads), len(tasks), saved)
+        if total is not None and len(file_ids) != total:
+            logger.warning("User %s got %s tiles, expected %s", user_id, len(file_ids), total)
+        return file_ids
+
+    async def _upload_sticker_file(
+        self,
+        user_id: int,
+        idx: int,
+        sticker_data: bytes,
+        total: Optional[int]
+    ) -> str:
+        """
+        Upload a single tile and return its file id.
+
+        Args:
+            user_id: Telegram user ID
+            idx: Index of the tile in the pack
+            sticker_data: PNG-encoded tile
+            total: Number of tiles in the pack, None if unknown
+
+        Returns:
+            Telegram file id of the uploaded sticker
+        """
+        logger.debug("User %s uploading sticker %s/%s", user_id, idx + 1, total)
+        uploaded = await self._with_retries(
+            lambda: self.bot.upload_sticker_file(
+                user_id=user_id,
+                sticker=sticker_data,
+                sticker_format=StickerFormat.STATIC
+            ),
+            "User %s upload_sticker_file %s",
+            user_id,
+            idx + 1
+        )
+        return uploaded.file_id
+
+    def _pack_name(self, sticker_type: str, user_id: int, timestamp: int) -> str:
+        """
+        Build a unique pack name within Telegram's length limit.
+
+        Names longer than MAX_PACK_NAME_LENGTH, e.g. with a long bot
+        username, fall back to a one-letter prefix and base 36 numbers.
+
+        Args:
+            sticker_type: StickerType.CUSTOM_EMOJI or StickerType.REGULAR
+            user_id: Telegram user ID
+            timestamp: Creation time in seconds
+
+        Returns:
+            Pack name ending in ``_by_<bot username>``
+        """
+        prefix = PACK_PREFIXES[sticker_type]
+        suffix = f"_by_{self.bot.username}"
+        name = f"{prefix}_{user_id}_{timestamp}"
+        if len(name) + len(suffix) > MAX_PACK_NAME_LENGTH:
+            name = f"{prefix[0]}{_base36(user_id)}_{_base36(timestamp)}"
+        return name + suffix
+
+    async def _sticker_set_size_reached(self, name: str, size: int) -> bool:
+        """
+        Check whether a sticker set exists with at least ``size`` stickers.
+
+        Args:
+            name: Sticker set name
+            size: Expected number of stickers
+
+        Returns:
+            True if the set exists and holds at least ``size`` stickers
+        """
+        try:
+            sticker_set = await self.bot.get_sticker_set(name)
+        except BadRequest:
+            return False
+        return len(sticker_set.stickers) >= size
+
+    async def _with_retries(
+        self,
+        call: Callable[[], Awaitable[T]],
+        description: str,
+        *args: Any,
+        applied: Optional[Callable[[], Awaitable[bool]]] = None
+    ) -> Optional[T]:
+        """
+        Run an API call, retrying it on transient errors.
+
+        Rate limits are always retried. A network error or timeout may hide
+        a request that Telegram already applied, so for calls that are not
+        idempotent ``applied`` is asked first and the call is only resent
+        if it reports that nothing changed.
+
+        Args:
+            call: Factory returning a fresh awaitable for each attempt
+            description: Format string describing the call for logging,
+                only formatted when a retry is logged
+            *args: Arguments of the description
+            applied: Checks whether a failed attempt took effect anyway,
+                None for idempotent calls that are resent blindly
+
+        Returns:
+            Result of the call, None if a failed attempt turned out applied
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await call()
+            except RetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = e.retry_after.total_seconds() if hasattr(e.retry_after, "total_seconds") else e.retry_after
+                logger.warning(f"{description} rate limited, retrying in %ss", *args, delay)
+                await asyncio.sleep(delay)
+            except BadRequest:
+                raise
+            except NetworkError as e:
+                if attempt == self.max_retries and applied is None:
+                    raise
+                delay = 2 ** attempt
+                logger.warning(f"{description} failed with %s, checking again in %ss (%s/%s)", *args, e, delay, attempt + 1, self.max_retries)
+                await asyncio.sleep(delay)
+                if applied is not None and await applied():
+                    logger.warning(f"{description} was applied despite %s", *args, e)
+                    return None
+                if attempt == self.max_retries:
+                    raise
+
+
+def _base36(number: int) -> str:
+    """Format a non-negative integer in base 36."""
+    digits = ""
+    while True:
+        number, digit = divmod(number, 36)
+        digits = "0123456789abcdefghijklmnopqrstuvwxyz"[digit] + digits
+        if not number:
+            return digits
+
+
+def _read_file(path: str) -> bytes:
+    """Read a file into memory."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+async def _aiter(items: Union[Iterable[T], AsyncIterable[T]]) -> AsyncIterator[T]:
+    """Iterate a sync or async iterable asynchronously."""
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
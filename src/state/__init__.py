@@ -0,0 +1 @@
+"""State package for state shared between bot processes."""
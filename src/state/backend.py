@@ -0,0 +1,319 @@
+"""Interface of the shared state backend and the configured instance."""
+
+import os
+import socket
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from src.config import settings
+from src.config.logger import get_logger
+from src.config.metrics import Observation
+
+logger = get_logger()
+
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+
+class JobRecord(NamedTuple):
+    """Persisted state of an emoji pack job."""
+
+    id: str
+    user_id: int
+    status: str
+    payload: Dict[str, Any]
+    owner: Optional[str]
+    attempts: int
+    error: Optional[str]
+    created_at: float
+    updated_at: float
+
+
+class TaskRecord(NamedTuple):
+    """Crop task queued for image workers."""
+
+    id: str
+    status: str
+    payload: Dict[str, Any]
+    data: bytes
+    owner: Optional[str]
+    attempts: int
+    error: Optional[str]
+    observations: Optional[List[Observation]] = None
+    created_at: float = 0.0
+
+
+class StateBackend(ABC):
+    """
+    Storage for state shared by all bot processes.
+
+    Holds conversation sessions, per-user leases, job records and the
+    crop task queue consumed by image workers. All
+    methods are blocking and safe to call from several threads; async
+    callers run them with ``asyncio.to_thread``. Timestamps are wall-clock
+    seconds so processes on different hosts agree on expiry.
+    """
+
+    @abstractmethod
+    def load_session(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Load a user's session.
+
+        Args:
+            user_id: Telegram user ID
+
+        Returns:
+            Session fields, or None if the user has no live session
+        """
+
+    @abstractmethod
+    def save_session(self, user_id: int, data: Dict[str, Any], ttl: float):
+        """
+        Store a user's session.
+
+        Args:
+            user_id: Telegram user ID
+            data: JSON-serializable session fields
+            ttl: Seconds until the session expires
+        """
+
+    @abstractmethod
+    def acquire_lease(self, user_id: int, owner: str, ttl: float) -> bool:
+        """
+        Take exclusive ownership of a user's processing.
+
+        Args:
+            user_id: Telegram user ID
+            owner: Identity of the taker
+            ttl: Seconds until the lease lapses unless renewed
+
+        Returns:
+            True if the lease is now held by ``owner``
+        """
+
+    @abstractmethod
+    def renew_lease(self, user_id: int, owner: str, ttl: float) -> bool:
+        """
+        Extend a held lease.
+
+        Args:
+            user_id: Telegram user ID
+            owner: Identity of the holder
+            ttl: Seconds until the lease lapses unless renewed again
+
+        Returns:
+            False if the lease lapsed and is no longer held by ``owner``
+        """
+
+    @abstractmethod
+    def release_lease(self, user_id: int, owner: str):
+        """
+        Give up a held lease.
+
+        Args:
+            user_id: Telegram user ID
+            owner: Identity of the holder
+        """
+
+    @abstractmethod
+    def create_job(self, user_id: int, payload: Dict[str, Any], stale_after: float) -> Tuple[JobRecord, bool]:
+        """
+        Record a new queued job unless the user already has an unfinished one.
+
+        The check and the insert happen in one transaction, so two processes
+        cannot both start a job for the same user.
+
+        Args:
+            user_id: Telegram user ID owning the job
+            payload: JSON-serializable job parameters
+            stale_after: Seconds without an update after which an unfinished
+                job is considered abandoned by a crashed process
+
+        Returns:
+            Tuple of (created job, True), or (the user's active job, False)
+        """
+
+    @abstractmethod
+    def update_job(self, job_id: str, status: str, owner: Optional[str] = None, error: Optional[str] = None):
+        """
+        Move a job to another status and refresh its update time.
+
+        Moving a job to running counts an attempt.
+
+        Args:
+            job_id: Job ID
+            status: New status
+            owner: Process handling the job
+            error: Failure description
+        """
+
+    @abstractmethod
+    def touch_job(self, job_id: str) -> bool:
+        """
+        Refresh the update time of an unfinished job.
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            False if the job is unknown or already finished
+        """
+
+    @abstractmethod
+    def enqueue_task(self, payload: Dict[str, Any], data: bytes) -> str:
+        """
+        Queue a crop task for the image workers.
+
+        Args:
+            payload: JSON-serializable task parameters
+            data: Encoded input image
+
+        Returns:
+            Task ID
+        """
+
+    @abstractmethod
+    def claim_task(self, worker: str, stale_after: float, max_attempts: int) -> Optional[TaskRecord]:
+        """
+        Take the oldest queued task.
+
+        Running tasks whose worker has not sent a heartbeat for
+        ``stale_after`` seconds are queued again first, or failed once they
+        were attempted ``max_attempts`` times.
+
+        Args:
+            worker: Identity of the claiming worker
+            stale_after: Seconds without a heartbeat after which a worker is dead
+            max_attempts: Maximum number of attempts of a task
+
+        Returns:
+            Claimed task, or None if the queue is empty
+        """
+
+    @abstractmethod
+    def heartbeat(self, worker: str, task_id: Optional[str] = None):
+        """
+        Report a worker as alive.
+
+        Args:
+            worker: Identity of the worker
+            task_id: Task the worker is running, kept from being reclaimed
+        """
+
+    @abstractmethod
+    def finish_task(
+        self,
+        task_id: str,
+        worker: str,
+        results: Optional[List[bytes]],
+        error: Optional[str] = None,
+        observations: Optional[List[Observation]] = None
+    ) -> bool:
+        """
+        Store the outcome of a claimed task.
+
+        Args:
+            task_id: Task ID
+            worker: Identity of the worker that claimed the task
+            results: Output tiles, None if the task failed
+            error: Failure description
+            observations: Metric observations made by the worker, replayed
+                by the frontend that queued the task
+
+        Returns:
+            False if the task was reclaimed by another worker or deleted meanwhile
+        """
+
+    @abstractmethod
+    def get_task(self, task_id: str) -> Optional[TaskRecord]:
+        """
+        Load a task without its input image.
+
+        Args:
+            task_id: Task ID
+
+        Returns:
+            Task record, or None if unknown
+        """
+
+    @abstractmethod
+    def task_results(self, task_id: str) -> List[bytes]:
+        """
+        Load the output tiles of a completed task.
+
+        Args:
+            task_id: Task ID
+
+        Returns:
+            Output tiles in order
+        """
+
+    @abstractmethod
+    def delete_task(self, task_id: str):
+        """
+        Delete a task and its results.
+
+        Args:
+            task_id: Task ID
+        """
+
+    @abstractmethod
+    def live_workers(self, stale_after: float) -> int:
+        """
+        Count workers that sent a heartbeat recently.
+
+        Args:
+            stale_after: Seconds without a heartbeat after which a worker is dead
+
+        Returns:
+            Number of live workers
+        """
+
+    @abstractmethod
+    def purge(self) -> int:
+        """
+        Delete expired sessions and leases, old finished jobs and tasks and
+        long-dead workers.
+
+        Returns:
+            Number of deleted rows
+        """
+
+    @abstractmethod
+    def close(self):
+        """Release connections."""
+
+
+def create_backend(url: str) -> Optional[StateBackend]:
+    """
+    Create the state backend for a URL.
+
+    Args:
+        url: Backend URL, empty for none. ``sqlite:///data/state.db`` is
+            relative to the working directory, ``sqlite:////var/lib/state.db``
+            is absolute
+
+    Returns:
+        State backend, or None to keep all state in process memory
+
+    Raises:
+        ValueError: If the URL scheme is not supported
+    """
+    if not url:
+        return None
+
+    scheme, _, location = url.partition("://")
+    if scheme == "sqlite":
+        from src.state.sqlite import SQLiteBackend
+        path = location[1:] if location.startswith("/") else location
+        return SQLiteBackend(path, settings.STATE_JOB_RETENTION)
+
+    raise ValueError(f"Unsupported STATE_URL scheme: {scheme}")
+
+
+state_backend = create_backend(settings.STATE_URL)
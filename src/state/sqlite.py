@@ -0,0 +1,360 @@
+"""SQLite state backend in WAL mode."""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.config.logger import get_logger
+from src.config.metrics import Observation
+from src.state.backend import JOB_COMPLETED, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, JobRecord, StateBackend, TaskRecord
+
+logger = get_logger()
+
+BUSY_TIMEOUT_MS = 5000
+PURGE_INTERVAL = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    user_id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    user_id INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    owner TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS jobs_user ON jobs (user_id, status);
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    data BLOB NOT NULL,
+    owner TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    observations TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, created_at);
+CREATE TABLE IF NOT EXISTS task_results (
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    heartbeat_at REAL NOT NULL
+);
+"""
+
+
+class SQLiteBackend(StateBackend):
+    """
+    State backend on a SQLite file shared by processes on one host.
+
+    The database runs in WAL mode, so readers never block the writer and
+    several bot and worker processes can use the same file. Every thread gets its own
+    connection. Leases are taken inside ``BEGIN IMMEDIATE`` transactions,
+    which serialize writers across processes. WAL needs shared memory, so
+    the file must live on a local filesystem, not on a network share.
+    """
+
+    def __init__(self, path: str, job_retention: float):
+        """
+        Initialize SQLite backend.
+
+        Args:
+            path: Database file path
+            job_retention: Seconds finished job records are kept
+        """
+        self.path = path
+        self.job_retention = job_retention
+
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(SCHEMA)
+
+        logger.info("SQLiteBackend initialized with path=%s, job_retention=%s", path, job_retention)
+
+    def load_session(self, user_id: int) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT data FROM sessions WHERE user_id = ? AND expires_at > ?",
+            (user_id, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_session(self, user_id: int, data: Dict[str, Any], ttl: float):
+        self._connection().execute(
+            "INSERT INTO sessions (user_id, data, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (user_id) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at",
+            (user_id, json.dumps(data), time.time() + ttl)
+        )
+        self._maybe_purge()
+
+    def acquire_lease(self, user_id: int, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._transaction() as db:
+            row = db.execute("SELECT owner, expires_at FROM leases WHERE user_id = ?", (user_id,)).fetchone()
+            if row and row[0] != owner and row[1] > now:
+                return False
+            db.execute(
+                "INSERT OR REPLACE INTO leases (user_id, owner, expires_at) VALUES (?, ?, ?)",
+                (user_id, owner, now + ttl)
+            )
+            return True
+
+    def renew_lease(self, user_id: int, owner: str, ttl: float) -> bool:
+        now = time.time()
+        cursor = self._connection().execute(
+            "UPDATE leases SET expires_at = ? WHERE user_id = ? AND owner = ? AND expires_at > ?",
+            (now + ttl, user_id, owner, now)
+        )
+        return cursor.rowcount == 1
+
+    def release_lease(self, user_id: int, owner: str):
+        self._connection().execute("DELETE FROM leases WHERE user_id = ? AND owner = ?", (user_id, owner))
+
+    def create_job(self, user_id: int, payload: Dict[str, Any], stale_after: float) -> Tuple[JobRecord, bool]:
+        now = time.time()
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT id, user_id, status, payload, owner, attempts, error, created_at, updated_at FROM jobs "
+                "WHERE user_id = ? AND status IN (?, ?) AND updated_at > ? ORDER BY created_at DESC LIMIT 1",
+                (user_id, JOB_QUEUED, JOB_RUNNING, now - stale_after)
+            ).fetchone()
+            if row:
+                return self._job(row), False
+
+            abandoned = db.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE user_id = ? AND status IN (?, ?)",
+                (JOB_FAILED, "abandoned", now, user_id, JOB_QUEUED, JOB_RUNNING)
+            ).rowcount
+            if abandoned:
+                logger.warning("User %s had %s abandoned jobs, marked failed", user_id, abandoned)
+
+            job = JobRecord(uuid.uuid4().hex, user_id, JOB_QUEUED, payload, None, 0, None, now, now)
+            db.execute(
+                "INSERT INTO jobs (id, user_id, status, payload, owner, attempts, error, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job.id, job.user_id, job.status, json.dumps(payload), None, 0, None, now, now)
+            )
+            return job, True
+
+    def update_job(self, job_id: str, status: str, owner: Optional[str] = None, error: Optional[str] = None):
+        self._connection().execute(
+            "UPDATE jobs SET attempts = attempts + (? = ? AND status != ?), "
+            "status = ?, owner = COALESCE(?, owner), error = ?, updated_at = ? WHERE id = ?",
+            (status, JOB_RUNNING, JOB_RUNNING, status, owner, error, time.time(), job_id)
+        )
+
+    def touch_job(self, job_id: str) -> bool:
+        cursor = self._connection().execute(
+            "UPDATE jobs SET updated_at = ? WHERE id = ? AND status IN (?, ?)",
+            (time.time(), job_id, JOB_QUEUED, JOB_RUNNING)
+        )
+        return cursor.rowcount == 1
+
+    def enqueue_task(self, payload: Dict[str, Any], data: bytes) -> str:
+        task_id = uuid.uuid4().hex
+        now = time.time()
+        self._connection().execute(
+            "INSERT INTO tasks (id, status, payload, data, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (task_id, JOB_QUEUED, json.dumps(payload), data, now, now)
+        )
+        return task_id
+
+    def claim_task(self, worker: str, stale_after: float, max_attempts: int) -> Optional[TaskRecord]:
+        now = time.time()
+        with self._transaction() as db:
+            requeued = db.execute(
+                "UPDATE tasks SET status = ?, owner = NULL WHERE status = ? AND updated_at <= ? AND attempts < ?",
+                (JOB_QUEUED, JOB_RUNNING, now - stale_after, max_attempts)
+            ).rowcount
+            db.execute(
+                "UPDATE tasks SET status = ?, error = 'worker lost', updated_at = ? WHERE status = ? AND updated_at <= ?",
+                (JOB_FAILED, now, JOB_RUNNING, now - stale_after)
+            )
+            if requeued:
+                logger.warning("Requeued %s tasks of dead workers", requeued)
+
+            row = db.execute(
+                "SELECT id, status, payload, data, owner, attempts, error, created_at FROM tasks "
+                "WHERE status = ? ORDER BY created_at LIMIT 1",
+                (JOB_QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            db.execute(
+                "UPDATE tasks SET status = ?, owner = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (JOB_RUNNING, worker, now, row[0])
+            )
+        task_id, _, payload, data, _, attempts, _, created_at = row
+        return TaskRecord(task_id, JOB_RUNNING, json.loads(payload), data, worker, attempts + 1, None, None, created_at)
+
+    def heartbeat(self, worker: str, task_id: Optional[str] = None):
+        now = time.time()
+        db = self._connection()
+        db.execute(
+            "INSERT INTO workers (id, heartbeat_at) VALUES (?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET heartbeat_at = excluded.heartbeat_at",
+            (worker, now)
+        )
+        if task_id is not None:
+            db.execute(
+                "UPDATE tasks SET updated_at = ? WHERE id = ? AND owner = ? AND status = ?",
+                (now, task_id, worker, JOB_RUNNING)
+            )
+        self._maybe_purge()
+
+    def finish_task(
+        self,
+        task_id: str,
+        worker: str,
+        results: Optional[List[bytes]],
+        error: Optional[str] = None,
+        observations: Optional[List[Observation]] = None
+    ) -> bool:
+        with self._transaction() as db:
+            updated = db.execute(
+                "UPDATE tasks SET status = ?, error = ?, observations = ?, data = x'', updated_at = ? "
+                "WHERE id = ? AND owner = ? AND status = ?",
+                (
+                    JOB_FAILED if results is None else JOB_COMPLETED,
+                    error,
+                    json.dumps(observations) if observations else None,
+                    time.time(),
+                    task_id,
+                    worker,
+                    JOB_RUNNING
+                )
+            ).rowcount
+            if updated and results is not None:
+                db.executemany(
+                    "INSERT INTO task_results (task_id, idx, data) VALUES (?, ?, ?)",
+                    [(task_id, idx, tile) for idx, tile in enumerate(results)]
+                )
+        return updated == 1
+
+    def get_task(self, task_id: str) -> Optional[TaskRecord]:
+        row = self._connection().execute(
+            "SELECT id, status, payload, owner, attempts, error, observations, created_at FROM tasks WHERE id = ?",
+            (task_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        task_id, status, payload, owner, attempts, error, observations, created_at = row
+        observations = json.loads(observations) if observations else None
+        return TaskRecord(task_id, status, json.loads(payload), b"", owner, attempts, error, observations, created_at)
+
+    def task_results(self, task_id: str) -> List[bytes]:
+        rows = self._connection().execute(
+            "SELECT data FROM task_results WHERE task_id = ? ORDER BY idx",
+            (task_id,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def delete_task(self, task_id: str):
+        with self._transaction() as db:
+            db.execute("DELETE FROM task_results WHERE task_id = ?", (task_id,))
+            db.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+    def live_workers(self, stale_after: float) -> int:
+        row = self._connection().execute(
+            "SELECT COUNT(*) FROM workers WHERE heartbeat_at > ?",
+            (time.time() - stale_after,)
+        ).fetchone()
+        return row[0]
+
+    def purge(self) -> int:
+        now = time.time()
+        with self._transaction() as db:
+            deleted = db.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,)).rowcount
+            deleted += db.execute("DELETE FROM leases WHERE expires_at <= ?", (now,)).rowcount
+            deleted += db.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at <= ?",
+                (JOB_COMPLETED, JOB_FAILED, now - self.job_retention)
+            ).rowcount
+            deleted += db.execute(
+                "DELETE FROM task_results WHERE task_id IN "
+                "(SELECT id FROM tasks WHERE status IN (?, ?) AND updated_at <= ?)",
+                (JOB_COMPLETED, JOB_FAILED, now - self.job_retention)
+            ).rowcount
+            deleted += db.execute(
+                "DELETE FROM tasks WHERE status IN (?, ?) AND updated_at <= ?",
+                (JOB_COMPLETED, JOB_FAILED, now - self.job_retention)
+            ).rowcount
+            deleted += db.execute("DELETE FROM workers WHERE heartbeat_at <= ?", (now - self.job_retention,)).rowcount
+        self._last_purge = now
+        if deleted:
+            logger.debug("Purged %s expired state rows", deleted)
+        return deleted
+
+    def close(self):
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self._local = threading.local()
+        logger.info("SQLiteBackend closed")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the calling thread's connection, opening it on first use."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run statements in a write transaction taken up front."""
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def _maybe_purge(self):
+        """Purge expired rows at most every PURGE_INTERVAL seconds."""
+        if time.time() - self._last_purge >= PURGE_INTERVAL:
+            self.purge()
+
+    @staticmethod
+    def _job(row) -> JobRecord:
+        """Build a job record from a database row."""
+        job_id, user_id, status, payload, owner, attempts, error, created_at, updated_at = row
+        return JobRecord(job_id, user_id, status, json.loads(payload), owner, attempts, error, created_at, updated_at)
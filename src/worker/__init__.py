@@ -0,0 +1 @@
+"""Worker package for image workers running apart from the bot frontend."""
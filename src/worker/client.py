@@ -0,0 +1,269 @@
+"""Frontend side of the crop task queue."""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.config import settings
+from src.config.logger import get_logger
+from src.config.metrics import registry, worker_tasks_total
+from src.emoji.processor import ImageProcessor, ImageSource
+from src.state.backend import JOB_COMPLETED, JOB_FAILED, JOB_RUNNING, StateBackend, state_backend
+
+logger = get_logger()
+
+
+class CropTaskFailed(Exception):
+    """Raised when an image worker could not crop a photo."""
+
+
+class CropQueue:
+    """
+    Hand crops to image worker processes through the state backend.
+
+    The photo and the processor parameters are queued as a task, a worker
+    crops it and stores the tiles, and the frontend polls the task until it
+    finished. The task is deleted once its result was read or the caller
+    gave up on it. Metrics recorded by the worker, including how long the
+    task waited for it (the ``worker_queue_wait`` stage), come back with the
+    outcome and are replayed into the local registry.
+
+    The task timeout counts from the moment a worker starts the task, so
+    time spent waiting for a free worker is not held against it. A queued
+    task only times out if no live worker is left to take it.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[StateBackend],
+        poll_interval: float,
+        worker_timeout: float,
+        task_timeout: float
+    ):
+        """
+        Initialize crop queue.
+
+        Args:
+            backend: Shared state backend, None disables the queue
+            poll_interval: Seconds between task status checks
+            worker_timeout: Seconds without a heartbeat after which a worker is dead
+            task_timeout: Default seconds a worker may spend on a task
+        """
+        self.backend = backend
+        self.poll_interval = poll_interval
+        self.worker_timeout = worker_timeout
+        self.task_timeout = task_timeout
+        logger.info("CropQueue initialized with poll_interval=%s, task_timeout=%s", poll_interval, task_timeout)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether crops are sent to image workers."""
+        return self.backend is not None
+
+    async def crop(
+        self,
+        processor: ImageProcessor,
+        source: ImageSource,
+        grid_size: Tuple[int, int],
+        padding: int,
+        image_key: Optional[str] = None,
+        skip_blank: bool = False,
+        timeout: Optional[float] = None,
+        wait_running: bool = False
+    ) -> List[bytes]:
+        """
+        Crop a photo into PNG tiles on an image worker.
+
+        Args:
+            processor: Processor whose parameters the worker uses
+            source: Encoded input image bytes or path to it
+            grid_size: Tuple of (columns, rows)
+            padding: Padding value (1-5)
+            image_key: Photo identity for reusing the decoded image
+            skip_blank: Leave out uniform and fully transparent tiles
+            timeout: Seconds a worker may spend on the task, defaults to the
+                queue task timeout
+            wait_running: On cancellation, wait until a worker that already
+                took the task has finished it
+
+        Returns:
+            List of PNG-encoded tiles in row-major order
+
+        Raises:
+            TimeoutError: If the worker did not finish the task in time, or
+                no live worker is left to take it
+            CropTaskFailed: If the worker failed to crop the photo
+        """
+        payload = self._payload(processor, grid_size, padding, image_key, skip_blank)
+        return await self._run(payload, source, timeout, wait_running)
+
+    async def crop_sizes(
+        self,
+        processor: ImageProcessor,
+        source: ImageSource,
+        grid_size: Tuple[int, int],
+        padding: int,
+        sizes: Sequence[int],
+        image_key: Optional[str] = None,
+        skip_blank: bool = False,
+        timeout: Optional[float] = None
+    ) -> Dict[int, List[bytes]]:
+        """
+        Crop a photo into PNG tiles of several sizes on an image worker.
+
+        The worker stores the tiles of all sizes one after another; every
+        size has the same number of tiles.
+
+        Args:
+            processor: Processor whose parameters the worker uses
+            source: Encoded input image bytes or path to it
+            grid_size: Tuple of (columns, rows)
+            padding: Padding value (1-5)
+            sizes: Tile sizes in pixels
+            image_key: Photo identity for reusing the decoded image
+            skip_blank: Leave out uniform and fully transparent tiles
+            timeout: Seconds a worker may spend on the task, defaults to the
+                queue task timeout
+
+        Returns:
+            Dictionary of tile size to PNG-encoded tiles in row-major order
+
+        Raises:
+            TimeoutError: If the worker did not finish the task in time, or
+                no live worker is left to take it
+            CropTaskFailed: If the worker failed to crop the photo
+        """
+        payload = self._payload(processor, grid_size, padding, image_key, skip_blank)
+        payload["sizes"] = list(sizes)
+        tiles = await self._run(payload, source, timeout)
+
+        count = len(tiles) // len(sizes)
+        return {size: tiles[index * count:(index + 1) * count] for index, size in enumerate(sizes)}
+
+    @staticmethod
+    def _payload(
+        processor: ImageProcessor,
+        grid_size: Tuple[int, int],
+        padding: int,
+        image_key: Optional[str],
+        skip_blank: bool
+    ) -> Dict[str, Any]:
+        """Describe a crop and the processor parameters for a worker."""
+        return {
+            "grid_size": list(grid_size),
+            "padding": padding,
+            "image_key": image_key,
+            "skip_blank": skip_blank,
+            "emoji_size": processor.emoji_size,
+            "reducing_gap": processor.reducing_gap,
+            "encode_profile": processor.encoder.profile.name,
+            "draft_oversample": processor.draft_oversample,
+            "max_pixels": processor.max_pixels,
+            "decode_max_pixels": processor.decode_max_pixels,
+        }
+
+    async def _run(
+        self,
+        payload: Dict[str, Any],
+        source: ImageSource,
+        timeout: Optional[float],
+        wait_running: bool = False
+    ) -> List[bytes]:
+        """
+        Queue a crop task and wait for its tiles.
+
+        Args:
+            payload: Task payload from _payload()
+            source: Encoded input image bytes or path to it
+            timeout: Seconds a worker may spend on the task, defaults to the
+                queue task timeout
+            wait_running: On cancellation, wait until a worker that already
+                took the task has finished it
+
+        Returns:
+            Tiles stored by the worker
+
+        Raises:
+            TimeoutError: If the worker did not finish the task in time, or
+                no live worker is left to take it
+            CropTaskFailed: If the worker failed to crop the photo
+        """
+        timeout = self.task_timeout if timeout is None else timeout
+        data = source if isinstance(source, bytes) else await asyncio.to_thread(_read_file, source)
+        grid_size, padding = payload["grid_size"], payload["padding"]
+
+        task_id = await asyncio.to_thread(self.backend.enqueue_task, payload, data)
+        logger.debug("Crop task %s queued: grid_size=%s, padding=%s", task_id, grid_size, padding)
+
+        loop = asyncio.get_running_loop()
+        enqueued_at = loop.time()
+        deadline = enqueued_at + timeout
+        attempt = 0
+        try:
+            while True:
+                task = await asyncio.to_thread(self.backend.get_task, task_id)
+                if task is None:
+                    raise CropTaskFailed(f"Crop task {task_id} disappeared")
+
+                if task.status in (JOB_COMPLETED, JOB_FAILED):
+                    registry.replay(task.observations or [])
+
+                if task.status == JOB_COMPLETED:
+                    tiles = await asyncio.to_thread(self.backend.task_results, task_id)
+                    worker_tasks_total.inc("completed")
+                    logger.debug("Crop task %s completed by %s after %s attempts", task_id, task.owner, task.attempts)
+                    return tiles
+
+                if task.status == JOB_FAILED:
+                    worker_tasks_total.inc("failed")
+                    raise CropTaskFailed(f"Crop task {task_id} failed: {task.error}")
+
+                now = loop.time()
+                if task.status == JOB_RUNNING and task.attempts != attempt:
+                    attempt = task.attempts
+                    deadline = now + timeout
+
+                if now >= deadline:
+                    workers = await asyncio.to_thread(self.backend.live_workers, self.worker_timeout)
+                    if task.status == JOB_RUNNING or not workers:
+                        worker_tasks_total.inc("timeout")
+                        logger.error("Crop task %s timed out after %ss in status %s, %s live workers", task_id, timeout, task.status, workers)
+                        raise asyncio.TimeoutError(f"Crop task {task_id} timed out")
+                    logger.warning("Crop task %s still queued after %.0fs, %s live workers busy", task_id, now - enqueued_at, workers)
+                    deadline = now + timeout
+
+                await asyncio.sleep(self.poll_interval)
+        except asyncio.CancelledError:
+            if wait_running:
+                await self._wait_running(task_id, timeout)
+            raise
+        finally:
+            await asyncio.to_thread(self.backend.delete_task, task_id)
+
+    async def _wait_running(self, task_id: str, timeout: float):
+        """
+        Wait while a worker runs a task, at most ``timeout`` seconds.
+
+        Args:
+            task_id: Task ID
+            timeout: Maximum seconds to wait
+        """
+        deadline = asyncio.get_running_loop().time() + timeout
+        while asyncio.get_running_loop().time() < deadline:
+            task = await asyncio.to_thread(self.backend.get_task, task_id)
+            if task is None or task.status != JOB_RUNNING:
+                return
+            await asyncio.sleep(self.poll_interval)
+
+
+def _read_file(path: str) -> bytes:
+    """Read a file into memory."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+crop_queue = CropQueue(
+    state_backend if settings.CROP_MODE == "worker" else None,
+    settings.WORKER_POLL_INTERVAL,
+    settings.WORKER_TIMEOUT,
+    settings.CPU_JOB_TIMEOUT
+)
@@ -0,0 +1,165 @@
+"""Image worker consuming crop tasks from the state backend."""
+
+import multiprocessing
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.config.logger import get_logger
+from src.config.metrics import capture_observations, stage_seconds, track_peak_memory
+from src.emoji.decoded import decoded_cache
+from src.emoji.processor import ImageProcessor
+from src.state.backend import StateBackend, TaskRecord
+
+logger = get_logger()
+
+
+class ImageWorker:
+    """
+    Claim crop tasks and run them with ``ImageProcessor``.
+
+    A background thread sends heartbeats for the worker and the task it is
+    running. When a worker dies, its task is handed to another worker after
+    ``timeout`` seconds without a heartbeat. The peak memory of each task
+    is observed when the worker runs in a process of its own. Metrics a
+    task records are stored with its outcome and replayed by the frontend,
+    which serves them on its /metrics endpoint.
+    """
+
+    def __init__(
+        self,
+        backend: StateBackend,
+        worker_id: str,
+        heartbeat_interval: float,
+        timeout: float,
+        max_attempts: int,
+        poll_interval: float
+    ):
+        """
+        Initialize image worker.
+
+        Args:
+            backend: Shared state backend holding the task queue
+            worker_id: Identity of the worker
+            heartbeat_interval: Seconds between heartbeats
+            timeout: Seconds without a heartbeat after which a worker is dead
+            max_attempts: Maximum number of attempts of a task
+            poll_interval: Seconds to wait when the queue is empty
+        """
+        self.backend = backend
+        self.worker_id = worker_id
+        self.heartbeat_interval = heartbeat_interval
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+
+        self.completed = 0
+        self.failed = 0
+
+        self._task_id: Optional[str] = None
+        self._measure_memory = multiprocessing.parent_process() is not None
+        self._processors: Dict[Tuple[Any, ...], ImageProcessor] = {}
+
+        logger.info("ImageWorker %s initialized with heartbeat_interval=%s, timeout=%s", worker_id, heartbeat_interval, timeout)
+
+    def run(self, stop: threading.Event):
+        """
+        Process tasks until ``stop`` is set.
+
+        Args:
+            stop: Event ending the worker after its current task
+        """
+        heartbeat = threading.Thread(target=self._send_heartbeats, args=(stop,), name="worker-heartbeat", daemon=True)
+        heartbeat.start()
+        logger.info("ImageWorker %s started", self.worker_id)
+
+        while not stop.is_set():
+            try:
+                task = self.backend.claim_task(self.worker_id, self.timeout, self.max_attempts)
+            except Exception as e:
+                logger.error("ImageWorker %s failed to claim a task: %s", self.worker_id, e)
+                stop.wait(self.poll_interval)
+                continue
+
+            if task is None:
+                decoded_cache.sweep()
+                stop.wait(self.poll_interval)
+                continue
+
+            self._task_id = task.id
+            try:
+                self._process(task)
+            finally:
+                self._task_id = None
+
+        heartbeat.join()
+        logger.info("ImageWorker %s stopped, %s tasks completed, %s failed", self.worker_id, self.completed, self.failed)
+
+    def _process(self, task: TaskRecord):
+        """Crop the photo of a task and store the outcome."""
+        logger.info("ImageWorker %s running task %s, attempt %s", self.worker_id, task.id, task.attempts)
+
+        results: Optional[List[bytes]] = None
+        error = None
+        with capture_observations() as observations:
+            if task.attempts == 1:
+                stage_seconds.observe(max(time.time() - task.created_at, 0.0), "worker_queue_wait")
+            try:
+                with track_peak_memory("worker_task") if self._measure_memory else nullcontext():
+                    results = self._crop(task)
+                self.completed += 1
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                self.failed += 1
+                logger.error("ImageWorker %s task %s failed: %s", self.worker_id, task.id, e, exc_info=True)
+
+        if not self.backend.finish_task(task.id, self.worker_id, results, error, observations):
+            logger.warning("ImageWorker %s task %s was reclaimed or cancelled, result dropped", self.worker_id, task.id)
+
+    def _crop(self, task: TaskRecord) -> List[bytes]:
+        """Run the crop described by a task."""
+        payload = task.payload
+        processor = self._processor(payload)
+        if payload.get("sizes"):
+            levels = processor.crop_to_grid_sizes(
+                task.data,
+                tuple(payload["grid_size"]),
+                payload["padding"],
+                payload["sizes"],
+                payload.get("image_key"),
+                payload.get("skip_blank", False)
+            )
+            return [tile for size in payload["sizes"] for tile in levels[size]]
+        return processor.crop_to_grid_bytes(
+            task.data,
+            tuple(payload["grid_size"]),
+            payload["padding"],
+            payload.get("image_key"),
+            payload.get("skip_blank", False)
+        )
+
+    def _processor(self, payload: Dict[str, Any]) -> ImageProcessor:
+        """Get a processor with the parameters of a task."""
+        key = (
+            payload["emoji_size"],
+            payload["reducing_gap"],
+            payload["encode_profile"],
+            payload["draft_oversample"],
+            payload.get("max_pixels", 0),
+            payload.get("decode_max_pixels", 0)
+        )
+        processor = self._processors.get(key)
+        if processor is None:
+            processor = self._processors[key] = ImageProcessor(*key)
+        return processor
+
+    def _send_heartbeats(self, stop: threading.Event):
+        """Report the worker and its running task as alive until stopped."""
+        while True:
+            try:
+                self.backend.heartbeat(self.worker_id, self._task_id)
+            except Exception as e:
+                logger.warning("ImageWorker %s heartbeat failed: %s", self.worker_id, e)
+            if stop.wait(self.heartbeat_interval):
+                return
@@ -0,0 +1,19 @@
+"""Shared test setup: configuration defaults and helpers."""
+
+import os
+import socket
+import sys
+
+os.environ.setdefault("BOT_TOKEN", "123456:TEST")
+os.environ.setdefault("CPU_WORKERS", "0")
+os.environ.setdefault("METRICS_PORT", "0")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def free_port() -> int:
+    """Get a local TCP port nothing listens on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
@@ -0,0 +1,54 @@
+"""Tests of media group collection."""
+
+import asyncio
+from datetime import datetime, timezone
+
+from telegram import Chat, Message, Update, User
+
+from src.bot.batch import MediaGroupCollector
+from src.bot.dispatch import PerUserUpdateProcessor
+
+
+def _update(update_id: int, user_id: int) -> Update:
+    """Build a text message update from a user."""
+    message = Message(
+        message_id=update_id,
+        date=datetime.now(timezone.utc),
+        chat=Chat(user_id, Chat.PRIVATE),
+        from_user=User(user_id, "user", False),
+        text="hi"
+    )
+    return Update(update_id, message=message)
+
+
+def test_media_group_completes_between_updates():
+    """A completed album is handled under the user's lock, never inside another update."""
+    async def scenario():
+        processor = PerUserUpdateProcessor(8)
+        collector = MediaGroupCollector(0.05)
+        events = []
+
+        async def on_complete(user_id, items):
+            events.append(("flush-start", len(items)))
+            await asyncio.sleep(0.1)
+            events.append(("flush-end", len(items)))
+
+        async def slow_update():
+            events.append(("update-start", 0))
+            await asyncio.sleep(0.1)
+            events.append(("update-end", 0))
+
+        for idx in range(3):
+            collector.add(5, "album", idx, on_complete, processor.exclusive)
+        await asyncio.sleep(0.07)
+        await processor.process_update(_update(1, 5), slow_update())
+        await collector.shutdown()
+
+        assert events == [
+            ("flush-start", 3),
+            ("flush-end", 3),
+            ("update-start", 0),
+            ("update-end", 0),
+        ]
+
+    asyncio.run(scenario())
@@ -0,0 +1,97 @@
+"""Tests of per-user update ordering."""
+
+import asyncio
+from datetime import datetime, timezone
+
+from telegram import Chat, Message, Update, User
+
+from src.bot.dispatch import PerUserUpdateProcessor
+from src.state.sqlite import SQLiteBackend
+
+
+def _update(update_id: int, user_id: int) -> Update:
+    """Build a text message update from a user."""
+    message = Message(
+        message_id=update_id,
+        date=datetime.now(timezone.utc),
+        chat=Chat(user_id, Chat.PRIVATE),
+        from_user=User(user_id, "user", False),
+        text="hi"
+    )
+    return Update(update_id, message=message)
+
+
+def test_updates_of_one_user_run_in_order():
+    """Updates of one user never overlap, updates of different users do."""
+    async def scenario():
+        processor = PerUserUpdateProcessor(8)
+        events = []
+        running = set()
+        overlapped = []
+
+        async def handle(name: str, user_id: int, delay: float):
+            if user_id in running:
+                overlapped.append(name)
+            running.add(user_id)
+            events.append(("start", name))
+            await asyncio.sleep(delay)
+            events.append(("end", name))
+            running.discard(user_id)
+
+        await asyncio.gather(
+            processor.process_update(_update(1, 1), handle("a1", 1, 0.05)),
+            processor.process_update(_update(2, 1), handle("a2", 1, 0.0)),
+            processor.process_update(_update(3, 2), handle("b1", 2, 0.0)),
+        )
+
+        assert overlapped == []
+        assert events.index(("end", "a1")) < events.index(("start", "a2"))
+        assert events.index(("end", "b1")) < events.index(("end", "a1"))
+        assert processor.active_users == 0
+
+    asyncio.run(scenario())
+
+
+def test_update_waits_for_lease_of_other_process(tmp_path):
+    """An update is only handled once another process released the user's lease."""
+    async def scenario():
+        backend = SQLiteBackend(str(tmp_path / "state.db"), 60)
+        processor = PerUserUpdateProcessor(8, backend, 60)
+        assert backend.acquire_lease(7, "other-process", 60)
+
+        handled = asyncio.Event()
+
+        async def handle():
+            handled.set()
+
+        task = asyncio.create_task(processor.process_update(_update(1, 7), handle()))
+        await asyncio.sleep(0.5)
+        assert not handled.is_set()
+
+        backend.release_lease(7, "other-process")
+        await asyncio.wait_for(task, 5)
+        assert handled.is_set()
+        assert backend.acquire_lease(7, "other-process", 60)
+        backend.close()
+
+    asyncio.run(scenario())
+
+
+def test_long_update_keeps_its_lease(tmp_path):
+    """A lease outlives its TTL while the update holding it runs."""
+    async def scenario():
+        backend = SQLiteBackend(str(tmp_path / "state.db"), 60)
+        processor = PerUserUpdateProcessor(8, backend, 0.3)
+        taken = []
+
+        async def handle():
+            await asyncio.sleep(1.0)
+            taken.append(backend.acquire_lease(7, "other-process", 60))
+
+        await processor.process_update(_update(1, 7), handle())
+
+        assert taken == [False]
+        assert backend.acquire_lease(7, "other-process", 60)
+        backend.close()
+
+    asyncio.run(scenario())
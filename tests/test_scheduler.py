@@ -0,0 +1,75 @@
+"""Tests of the fair job scheduler."""
+
+import asyncio
+
+import pytest
+
+from src.bot.scheduler import JobRejected, JobScheduler
+
+
+def test_jobs_of_one_user_run_one_at_a_time():
+    """A user's second job waits, other users get the free slots round-robin."""
+    async def scenario():
+        scheduler = JobScheduler(2, 10, 60)
+        order = []
+
+        def job(name: str):
+            async def run():
+                order.append(name)
+                await asyncio.sleep(0.05)
+            return run
+
+        scheduler.submit(1, job("a1"))
+        scheduler.submit(1, job("a2"))
+        scheduler.submit(2, job("b1"))
+        await asyncio.sleep(0.2)
+        await scheduler.shutdown()
+
+        assert order == ["a1", "b1", "a2"]
+        assert scheduler.completed == 3
+
+    asyncio.run(scenario())
+
+
+def test_queue_position_is_reported_before_job_starts():
+    """A slow position update finishes before the job edits its own status."""
+    async def scenario():
+        scheduler = JobScheduler(1, 10, 60)
+        messages = []
+
+        async def report(position: int):
+            await asyncio.sleep(0.1)
+            messages.append(f"queued {position}")
+
+        async def first():
+            await asyncio.sleep(0.01)
+
+        async def second():
+            messages.append("processing")
+
+        scheduler.submit(1, first)
+        assert scheduler.submit(2, second, on_position=report) == 1
+        await asyncio.sleep(0.3)
+        await scheduler.shutdown()
+
+        assert messages == ["queued 1", "processing"]
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_rejects_jobs():
+    """Jobs beyond max_queue are rejected."""
+    async def scenario():
+        scheduler = JobScheduler(1, 1, 60)
+
+        async def run():
+            await asyncio.sleep(0.05)
+
+        scheduler.submit(1, run)
+        scheduler.submit(2, run)
+        with pytest.raises(JobRejected):
+            scheduler.submit(3, run)
+        await scheduler.shutdown()
+        assert scheduler.rejected == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,41 @@
+"""Tests of speculative precomputation."""
+
+import asyncio
+import time
+
+from src.bot.speculation import Speculator
+from src.emoji.executor import CPUExecutor
+
+
+def _sleep(seconds: float) -> float:
+    """Block a worker like a crop does."""
+    time.sleep(seconds)
+    return seconds
+
+
+def test_cancelled_speculation_keeps_its_slot_until_the_worker_is_free():
+    """A replaced guess blocks the next one until its crop has finished."""
+    async def scenario():
+        executor = CPUExecutor(0, 30)
+        speculator = Speculator(1, 60)
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
+        starts = {}
+
+        def crop(name: str):
+            async def run():
+                starts[name] = loop.time() - started_at
+                return await executor.run(_sleep, 0.5, wait_running=True)
+            return run
+
+        speculator.speculate(1, "first", crop("first"))
+        await asyncio.sleep(0.1)
+        speculator.speculate(1, "second", crop("second"))
+        await asyncio.sleep(1.0)
+        await speculator.shutdown()
+        executor.shutdown()
+
+        assert starts["first"] < 0.1
+        assert starts["second"] >= 0.5
+
+    asyncio.run(scenario())
@@ -0,0 +1,88 @@
+"""Tests of the SQLite state backend."""
+
+import threading
+import time
+
+from src.state.backend import JOB_COMPLETED, JOB_FAILED, JOB_RUNNING
+from src.state.sqlite import SQLiteBackend
+
+
+def test_create_job_admits_one_job_per_user(tmp_path):
+    """Concurrent job starts of one user create exactly one job."""
+    backend = SQLiteBackend(str(tmp_path / "state.db"), 60)
+    created = []
+
+    def start():
+        created.append(backend.create_job(1, {}, 60))
+
+    threads = [threading.Thread(target=start) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(1 for _, ok in created if ok) == 1
+    assert len({job.id for job, _ in created}) == 1
+    assert backend.create_job(2, {}, 60)[1]
+    backend.close()
+
+
+def test_job_heartbeat_keeps_job_active(tmp_path):
+    """A touched job blocks new jobs, an abandoned one is replaced and failed."""
+    backend = SQLiteBackend(str(tmp_path / "state.db"), 60)
+    job, _ = backend.create_job(1, {}, 0.3)
+    backend.update_job(job.id, JOB_RUNNING, "owner")
+
+    time.sleep(0.2)
+    assert backend.touch_job(job.id)
+    time.sleep(0.2)
+    active, created = backend.create_job(1, {}, 0.3)
+    assert not created and active.id == job.id
+
+    time.sleep(0.4)
+    replacement, created = backend.create_job(1, {}, 0.3)
+    assert created and replacement.id != job.id
+    assert not backend.touch_job(job.id)
+
+    backend.update_job(replacement.id, JOB_COMPLETED)
+    assert not backend.touch_job(replacement.id)
+    assert backend.create_job(1, {}, 0.3)[1]
+    backend.close()
+
+
+def test_lease_is_exclusive_until_released_or_expired(tmp_path):
+    """Only one owner holds a user's lease at a time."""
+    backend = SQLiteBackend(str(tmp_path / "state.db"), 60)
+    assert backend.acquire_lease(1, "a", 0.2)
+    assert backend.acquire_lease(1, "a", 0.2)
+    assert not backend.acquire_lease(1, "b", 0.2)
+
+    backend.release_lease(1, "a")
+    assert backend.acquire_lease(1, "b", 0.2)
+
+    time.sleep(0.3)
+    assert backend.acquire_lease(1, "a", 0.2)
+    backend.close()
+
+
+def test_task_outcome_carries_observations(tmp_path):
+    """Metric observations of a worker come back with the task."""
+    backend = SQLiteBackend(str(tmp_path / "state.db"), 60)
+    task_id = backend.enqueue_task({"grid_size": [1, 1]}, b"image")
+    task = backend.claim_task("worker", 60, 3)
+    assert task.id == task_id and task.attempts == 1 and task.created_at > 0
+
+    observations = [("emoji_stage_seconds", ("decode",), 0.5)]
+    assert backend.finish_task(task_id, "worker", [b"tile"], observations=observations)
+
+    task = backend.get_task(task_id)
+    assert task.status == JOB_COMPLETED
+    assert task.observations == [["emoji_stage_seconds", ["decode"], 0.5]]
+    assert backend.task_results(task_id) == [b"tile"]
+
+    failed_id = backend.enqueue_task({}, b"image")
+    backend.claim_task("worker", 60, 3)
+    assert backend.finish_task(failed_id, "worker", None, "ValueError: broken")
+    failed = backend.get_task(failed_id)
+    assert failed.status == JOB_FAILED and failed.observations is None
+    backend.close()
@@ -0,0 +1,96 @@
+"""End-to-end test of the bot application served over a webhook."""
+
+import asyncio
+
+from telegram.ext import Application
+
+from benchmarks.tiling import make_photo
+from conftest import free_port
+from loadtest.fake_bot_api import FakeBotAPI, callback_data
+from main import build_application
+from src.config import strings
+
+STEP_TIMEOUT = 30
+
+
+async def _serve(api: FakeBotAPI, webhook_port: int) -> Application:
+    """Start the bot application in webhook mode against the fake Bot API."""
+    builder = (
+        Application.builder()
+        .token("123456:FAKE")
+        .base_url(api.base_url)
+        .base_file_url(api.base_file_url)
+    )
+    application = build_application(builder)
+    await application.initialize()
+    await application.post_init(application)
+    await application.updater.start_webhook(
+        listen="127.0.0.1",
+        port=webhook_port,
+        url_path="webhook",
+        webhook_url=f"http://127.0.0.1:{webhook_port}/webhook",
+        secret_token="test-secret",
+    )
+    await application.start()
+    return application
+
+
+async def _stop(application: Application):
+    """Stop an application started by _serve()."""
+    await application.updater.stop()
+    await application.stop()
+    await application.shutdown()
+    await application.post_shutdown(application)
+
+
+async def _step(api: FakeBotAPI, chat_id: int, update: dict, predicate=None) -> dict:
+    """Post an update and wait for the matching reply."""
+    reply = api.expect_reply(chat_id, predicate)
+    await api.push_update(update)
+    _, params = await asyncio.wait_for(reply, STEP_TIMEOUT)
+    return params
+
+
+def test_emoji_flow_over_webhook():
+    """A user walks from /start to a finished pack through the webhook."""
+    async def scenario():
+        api = FakeBotAPI(free_port())
+        await api.start()
+        application = await _serve(api, free_port())
+        chat_id = 4242
+        try:
+            assert api.webhook_url.endswith("/webhook")
+
+            params = await _step(api, chat_id, api.command_update(chat_id, "/start"))
+            assert params["text"] == strings.START_MESSAGE
+
+            params = await _step(
+                api,
+                chat_id,
+                api.photo_update(chat_id, make_photo(640, 480), 640, 480),
+                lambda p: any(data.startswith("grid_") for data in callback_data(p))
+            )
+            grid = callback_data(params)[0]
+            cols, rows = map(int, grid[len("grid_"):].split("x"))
+
+            params = await _step(
+                api,
+                chat_id,
+                api.callback_update(chat_id, params["message_id"], grid),
+                lambda p: any(data.startswith("padding_") for data in callback_data(p))
+            )
+
+            params = await _step(
+                api,
+                chat_id,
+                api.callback_update(chat_id, params["message_id"], "padding_1"),
+                lambda p: "t.me/addemoji/" in p.get("text", "") or p.get("text") == strings.ERROR_CREATING_PACK
+            )
+            assert "t.me/addemoji/" in params["text"]
+            assert api.calls["uploadStickerFile"] == cols * rows
+            assert list(api.sticker_sets.values()) == [cols * rows]
+        finally:
+            await _stop(application)
+            await api.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,86 @@
+"""Entry point for image workers consuming crop tasks."""
+
+import argparse
+import multiprocessing
+import signal
+import threading
+import time
+from typing import List, Optional
+
+from src.config import settings
+from src.config.logger import setup_logger
+from src.state.backend import INSTANCE_ID, state_backend
+from src.worker.runner import ImageWorker
+
+logger = setup_logger()
+
+SUPERVISE_INTERVAL = 1.0
+
+
+def run_worker():
+    """Run one image worker until the process receives SIGTERM."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGTERM})
+    setup_logger()
+
+    stop = threading.Event()
+    worker = ImageWorker(
+        state_backend,
+        INSTANCE_ID,
+        settings.WORKER_HEARTBEAT_INTERVAL,
+        settings.WORKER_TIMEOUT,
+        settings.WORKER_MAX_ATTEMPTS,
+        settings.WORKER_POLL_INTERVAL
+    )
+    thread = threading.Thread(target=worker.run, args=(stop,), name="image-worker")
+    thread.start()
+
+    signal.sigwait({signal.SIGTERM})
+    stop.set()
+    thread.join()
+    state_backend.close()
+
+
+def main():
+    """Start image workers and restart the ones that die."""
+    parser = argparse.ArgumentParser(description="Run image workers for CROP_MODE=worker.")
+    parser.add_argument("--workers", type=int, default=max(settings.CPU_WORKERS, 1), help="number of worker processes")
+    args = parser.parse_args()
+
+    if not settings.STATE_URL:
+        logger.critical("STATE_URL is required to run image workers")
+        raise SystemExit(1)
+    if args.workers < 1:
+        parser.error("--workers must be positive")
+
+    context = multiprocessing.get_context("spawn")
+    signals: List[int] = []
+
+    def request_stop(signum, frame):
+        signals.append(signum)
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    logger.info("Starting %s image workers", args.workers)
+    processes: List[Optional[multiprocessing.Process]] = [None] * args.workers
+    while not signals:
+        for index, process in enumerate(processes):
+            if process is not None and process.is_alive():
+                continue
+            if process is not None:
+                logger.error("Image worker %s exited with code %s, restarting", process.pid, process.exitcode)
+            processes[index] = context.Process(target=run_worker, name=f"image-worker-{index}")
+            processes[index].start()
+        time.sleep(SUPERVISE_INTERVAL)
+
+    logger.info("Received signal %s, stopping image workers", signals[0])
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join()
+    logger.info("Image workers stopped")
+
+
+if __name__ == "__main__":
+    main()